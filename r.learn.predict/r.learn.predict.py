@@ -25,16 +25,17 @@
 #%option G_OPT_I_GROUP
 #% key: group
 #% label: Group of raster layers used for prediction
-#% description: GRASS imagery group of raster maps representing feature variables to be used in the machine learning model
-#% required: yes
-#% multiple: no
+#% description: GRASS imagery group of raster maps representing feature variables to be used in the machine learning model. Several groups can be predicted using the same model by supplying one output name for each group
+#% required: no
+#% multiple: yes
 #%end
 
 #%option G_OPT_F_INPUT
 #% key: load_model
 #% label: Load model from file
-#% description: File representing pickled scikit-learn estimator model
+#% description: File representing pickled scikit-learn estimator model. If several files are given, the models are applied together as an ensemble and only the combined prediction is written
 #% required: yes
+#% multiple: yes
 #% guisection: Required
 #%end
 
@@ -43,7 +44,46 @@
 #% label: Output Map
 #% description: Raster layer name to store result from classification or regression model. The name will also used as a perfix if class probabilities or intermediate of cross-validation results are ordered as maps.
 #% guisection: Required
-#% required: yes
+#% required: no
+#% multiple: yes
+#%end
+
+#%option G_OPT_F_INPUT
+#% key: batch_file
+#% label: Text file of imagery groups and output names to predict
+#% description: Text file containing an imagery group and an output raster name separated by a comma on each line. The model is loaded once and applied to every group
+#% required: no
+#% guisection: Batch
+#%end
+
+#%option
+#% key: batch_jobs
+#% type: integer
+#% label: Number of imagery groups to predict concurrently
+#% description: Number of imagery groups that are predicted at the same time in separate processes. The n_jobs cores are divided between the groups
+#% answer: 1
+#% guisection: Batch
+#%end
+
+#%option G_OPT_STRDS_INPUTS
+#% key: strds
+#% label: Space-time raster datasets used for prediction
+#% description: Space-time raster datasets containing the same number of maps. Each timestep is predicted using the maps at the same temporal position within each dataset, followed by the static rasters
+#% required: no
+#% guisection: Temporal
+#%end
+
+#%option G_OPT_R_INPUTS
+#% key: static
+#% label: Static rasters that are used for every timestep
+#% description: Rasters such as a DEM that are appended to the maps of every timestep, and which are read once for all of the timesteps
+#% required: no
+#% guisection: Temporal
+#%end
+
+#%option G_OPT_T_WHERE
+#% key: where
+#% guisection: Temporal
 #%end
 
 #%flag
@@ -68,9 +108,98 @@
 #% guisection: Optional
 #%end
 
+#%option
+#% key: resampling
+#% type: string
+#% label: Resampling of rasters that are coarser than the region
+#% description: Nearest uses the nearest neighbour resampling of GRASS GIS. Bilinear reads coarse rasters at their native resolution and interpolates them in memory, caching the rows that are shared by adjacent blocks of rows. Integer rasters always use nearest
+#% answer: nearest
+#% options: nearest,bilinear
+#% guisection: Optional
+#%end
+
+#%flag
+#% key: u
+#% label: Only predict the unique pixel values of each block of rows
+#% description: Deduplicate the pixels of each block of rows and apply the model only to the unique combinations of values, which is faster for imagery groups of integer or categorical rasters
+#% guisection: Optional
+#%end
+
+#%option
+#% key: memo_size
+#% type: integer
+#% label: Number of unique pixel values whose predictions are cached
+#% description: Maximum number of predictions of unique pixel values that are retained across blocks of rows when using the -u flag, or 0 to only deduplicate the pixels within each block
+#% answer: 0
+#% guisection: Optional
+#%end
+
+#%option
+#% key: preview
+#% type: integer
+#% label: Decimation factor of a preview raster
+#% description: Predict every k-th row and column into a raster named output_preview before the full resolution prediction, or 0 for no preview
+#% answer: 0
+#% guisection: Progressive
+#%end
+
+#%option
+#% key: tolerance
+#% type: double
+#% label: Tolerance for filling homogeneous areas from the preview
+#% description: Pixels are filled from the preview instead of being predicted if the preview values of their cell and its eight neighbours differ by no more than the tolerance. Use 0 for classification. If not specified then every pixel is predicted
+#% required: no
+#% guisection: Progressive
+#%end
+
+#%option G_OPT_F_INPUT
+#% key: cascade_model
+#% label: Slower model that classifies the uncertain pixels
+#% description: File of a fitted classification model that is only applied to the pixels where the maximum class probability of the load_model classification is below the threshold. A raster named output_stage records whether each pixel was decided by the first (1) or the cascade (2) model
+#% required: no
+#% guisection: Cascade
+#%end
+
+#%option
+#% key: threshold
+#% type: double
+#% label: Class probability threshold of the cascade
+#% description: Pixels where the maximum class probability of the first model is below the threshold are classified by the cascade model
+#% answer: 0.9
+#% guisection: Cascade
+#%end
+
+#%option
+#% key: voting
+#% type: string
+#% label: Method used to combine the predictions of several models
+#% description: Soft voting averages the class probabilities, hard voting uses the majority class, and regression predictions are combined using the mean or median. Auto uses soft voting for classification and the mean for regression
+#% answer: auto
+#% options: auto,soft,hard,mean,median
+#% guisection: Optional
+#%end
+
+#%option
+#% key: n_jobs
+#% type: integer
+#% label: Number of cores for multiprocessing
+#% description: Number of cores for multiprocessing, -2 is n_cores-1
+#% answer: -2
+#% guisection: Optional
+#%end
+
+#%rules
+#% required: group,batch_file,strds
+#% exclusive: group,batch_file,strds
+#% collective: group,output
+#% requires: strds,output
+#% requires: static,strds
+#% requires: where,strds
+#% requires: tolerance,preview
+#%end
+
 
 import grass.script as gs
-import numpy as np
 import math
 from grass.pygrass.gis.region import Region
 from grass.pygrass.modules.shortcuts import raster as r
@@ -78,6 +207,7 @@ from grass.pygrass.modules.shortcuts import raster as r
 gs.utils.set_path(modulename='r.learn.ml2', dirname='rlearnlib', path='..')
 
 from rlearnlib.raster import RasterStack
+from rlearnlib.utils import load_model
 
 
 def string_to_rules(string):
@@ -89,10 +219,398 @@ def string_to_rules(string):
     return tmp
 
 
+def model_columns(metadata, names):
+    """Indices of the rasters in the imagery group that are used by a model"""
+    features = metadata["features"]
+    group_features = metadata.get("group_features")
+
+    # focal features, virtual layers and distance fields are computed from the
+    # rasters or the region and follow them
+    n_derived = sum(
+        len(metadata.get(key) or []) for key in ("focal", "virtual", "distance")
+    )
+
+    if features is not None and n_derived > 0:
+        features = features[:-n_derived]
+
+    # read only the rasters that were retained by feature selection
+    if (
+        features is not None
+        and group_features is not None
+        and len(features) < len(group_features)
+        and len(names) == len(group_features)
+    ):
+        return list(metadata["feature_indices"])
+
+    if features is not None and len(features) != len(names):
+        gs.fatal(
+            "The imagery group contains {0} rasters but the model was trained "
+            "using {1}".format(len(names), len(features))
+        )
+
+    return list(range(len(names)))
+
+
+def build_ensemble(models, columns, used, voting, n_jobs):
+    """Combine several fitted models into a VotingEnsemble that predicts from
+    a single read of the rasters used by any of the models"""
+    from rlearnlib.ensemble import VotingEnsemble
+    from rlearnlib.parallel import allocate_cores, set_estimator_n_jobs
+
+    modes = set(metadata["mode"] for _, metadata in models)
+
+    if len(modes) > 1:
+        gs.fatal("Classification and regression models cannot be combined")
+
+    mode = modes.pop()
+
+    if voting == "auto":
+        voting = "soft" if mode == "classification" else "mean"
+
+    if mode == "classification" and voting not in ("soft", "hard"):
+        gs.fatal("voting={0} requires regression models".format(voting))
+
+    if mode == "regression" and voting not in ("mean", "median"):
+        gs.fatal("voting={0} requires classification models".format(voting))
+
+    estimators = [estimator for estimator, _ in models]
+
+    if voting == "soft" and not all(hasattr(e, "predict_proba") for e in estimators):
+        gs.fatal("Soft voting requires models that support class probabilities")
+
+    # column indices of each model within the rasters that are read
+    position = {index: i for i, index in enumerate(used)}
+    features = [[position[i] for i in cols] for cols in columns]
+
+    if all(cols == list(range(len(used))) for cols in features):
+        features = None
+
+    # evaluate the models in threads and split the remaining cores between them
+    cores = allocate_cores(n_jobs, n_outer=len(estimators))
+
+    for estimator in estimators:
+        set_estimator_n_jobs(estimator, cores.estimator)
+
+    estimator = VotingEnsemble(
+        estimators, voting=voting, features=features, n_jobs=cores.outer
+    )
+
+    classes = None
+    class_labels = None
+
+    if mode == "classification":
+        classes = estimator.classes_
+        class_labels = {}
+
+        for _, metadata in models:
+            class_labels.update(metadata["class_labels"] or {})
+
+        class_labels = class_labels or None
+
+    return estimator, classes, class_labels
+
+
+def read_batch(group, output, batch_file):
+    """List of the (group, output) pairs to predict"""
+    if batch_file:
+        pairs = []
+
+        with open(batch_file) as f:
+            for line in f:
+                line = line.strip()
+
+                if not line or line.startswith("#"):
+                    continue
+
+                fields = [i.strip() for i in line.split(",")]
+
+                if len(fields) != 2 or not all(fields):
+                    gs.fatal(
+                        "Each line of batch_file must contain an imagery group and "
+                        "an output name separated by a comma"
+                    )
+
+                pairs.append(fields)
+    else:
+        groups, outputs = group.split(","), output.split(",")
+
+        if len(groups) != len(outputs):
+            gs.fatal("The number of output names must match the number of groups")
+
+        pairs = list(zip(groups, outputs))
+
+    # remove @ from output in case overwriting result
+    pairs = [(g, o.split("@")[0]) for g, o in pairs]
+    outputs = [o for _, o in pairs]
+
+    if len(set(outputs)) < len(outputs):
+        gs.fatal("Each imagery group requires a different output name")
+
+    return pairs
+
+
+def model_derived(models):
+    """The focal features, virtual layers and distance fields that are used by the
+    models"""
+    from rlearnlib.focal import FocalFeature
+    from rlearnlib.virtual import VirtualLayer
+
+    focal = [metadata.get("focal") or [] for _, metadata in models]
+    virtual = [metadata.get("virtual") or [] for _, metadata in models]
+    distance = [metadata.get("distance") or [] for _, metadata in models]
+
+    if any(i != focal[0] for i in focal):
+        gs.fatal("Models with different focal features cannot be combined")
+
+    if any(i != virtual[0] for i in virtual):
+        gs.fatal("Models with different virtual layers cannot be combined")
+
+    if any(i != distance[0] for i in distance):
+        gs.fatal("Models with different distance fields cannot be combined")
+
+    return (
+        [FocalFeature(**i) for i in focal[0]],
+        [VirtualLayer(**i) for i in virtual[0]],
+        [(name, tuple(point)) for name, point in distance[0]],
+    )
+
+
+def build_cascade(
+    models, estimator, used, class_labels, cascade, names, threshold, n_jobs
+):
+    """Combine the estimator of the models with a slower model that classifies
+    the pixels where the estimator is uncertain"""
+    from rlearnlib.ensemble import CascadeClassifier
+    from rlearnlib.parallel import set_estimator_n_jobs
+
+    slow, metadata = cascade
+
+    if any(m["mode"] != "classification" for _, m in models + [cascade]):
+        gs.fatal("A cascade requires classification models")
+
+    if not hasattr(estimator, "predict_proba"):
+        gs.fatal("The first model of a cascade must support class probabilities")
+
+    # the models are applied one after the other using all of the cores
+    set_estimator_n_jobs(slow, n_jobs)
+
+    # column indices of each model within the rasters that are read
+    slow_used = model_columns(metadata, names)
+    cascade_used = sorted(set(used) | set(slow_used))
+    position = {index: i for i, index in enumerate(cascade_used)}
+    features = [[position[i] for i in cols] for cols in (used, slow_used)]
+
+    if all(cols == list(range(len(cascade_used))) for cols in features):
+        features = None
+
+    estimator = CascadeClassifier(
+        estimator, slow, threshold=threshold, features=features
+    )
+
+    class_labels = dict(class_labels or {})
+    class_labels.update(metadata["class_labels"] or {})
+
+    return estimator, cascade_used, estimator.classes_, class_labels or None
+
+
+def prepare_model(models, names, voting, n_jobs, cascade=None, threshold=0.9):
+    """The estimator and the indices of the rasters in the imagery group that
+    it uses, combining several models into an ensemble, and optionally with a
+    cascade model"""
+    from rlearnlib.parallel import set_estimator_n_jobs
+
+    columns = [model_columns(metadata, names) for _, metadata in models]
+    used = sorted(set().union(*columns))
+
+    if len(models) == 1:
+        estimator, metadata = models[0]
+        set_estimator_n_jobs(estimator, n_jobs)
+        classes = metadata["classes"]
+        class_labels = metadata["class_labels"]
+    else:
+        estimator, classes, class_labels = build_ensemble(
+            models, columns, used, voting, n_jobs
+        )
+
+    if cascade is not None:
+        estimator, used, classes, class_labels = build_cascade(
+            models, estimator, used, class_labels, cascade, names, threshold, n_jobs
+        )
+
+    return estimator, used, classes, class_labels
+
+
+def predict_group(
+    estimator,
+    rasters,
+    output,
+    output_format,
+    classes,
+    category_rules,
+    probability,
+    prob_only,
+    height,
+    overwrite,
+    resampling,
+    focal,
+    virtual,
+    distance,
+    memoize,
+    preview,
+    tolerance,
+):
+    """Predict the rasters of one imagery group"""
+    stack = RasterStack(rasters=rasters, resampling=resampling)
+    stack.focal = focal
+    stack.virtual = virtual
+    stack.distance = distance
+
+    if prob_only is False and preview > 0:
+        from rlearnlib.ensemble import MemoizedEstimator
+        from rlearnlib.progressive import predict_preview, predict_refined
+
+        if memoize is not None:
+            estimator = MemoizedEstimator(estimator, cache_size=memoize)
+            memoize = None
+
+        gs.message("Predicting preview raster {0}_preview...".format(output))
+        coarse, coarse_region = predict_preview(
+            stack,
+            estimator,
+            output + "_preview",
+            preview,
+            height=height,
+            overwrite=overwrite,
+            output_format=output_format,
+        )
+
+    if prob_only is False and hasattr(estimator, "predict_stages"):
+        gs.message("Predicting cascade classification raster {0}...".format(output))
+        stack.predict_stages(
+            estimator,
+            output,
+            output + "_stage",
+            height=height,
+            overwrite=overwrite,
+            output_format=output_format,
+        )
+        r.category(
+            map=output + "_stage",
+            rules=string_to_rules("1,first model\n2,cascade model\n"),
+            separator="comma",
+        )
+
+    elif prob_only is False and tolerance is not None:
+        gs.message("Refining classification/regression raster {0}...".format(output))
+        predicted = predict_refined(
+            stack,
+            estimator,
+            output,
+            coarse,
+            coarse_region,
+            tolerance,
+            height=height,
+            overwrite=overwrite,
+            output_format=output_format,
+        )
+        gs.message(
+            "{0:.1f}% of the pixels were predicted and the remainder were filled "
+            "from the preview".format(predicted * 100)
+        )
+
+    elif prob_only is False:
+        gs.message("Predicting classification/regression raster {0}...".format(output))
+        stack.predict(
+            estimator=estimator,
+            output=output,
+            height=height,
+            overwrite=overwrite,
+            output_format=output_format,
+            memoize=memoize,
+        )
+
+    if probability is True:
+        gs.message("Predicting class probabilities for {0}...".format(output))
+        stack.predict_proba(
+            estimator=estimator,
+            output=output,
+            class_labels=classes,
+            overwrite=overwrite,
+            height=height,
+            memoize=memoize,
+        )
+
+    # assign categories for classification map
+    if category_rules is not None and prob_only is False:
+        r.category(map=output, rules=category_rules, separator="comma")
+
+
+def predict_strds(
+    models, strds, static, where, output, voting, n_jobs, height, memoize
+):
+    """Predict each timestep of space-time raster datasets"""
+    from rlearnlib.temporal import TemporalRasterStack
+
+    tstack = TemporalRasterStack(
+        strds.split(","),
+        static=static.split(",") if static else None,
+        where=where,
+        resampling=options["resampling"],
+    )
+    names = tstack.names(0)
+
+    if any(model_derived(models)):
+        gs.fatal(
+            "Focal features, virtual layers and distance fields are not supported "
+            "for space-time raster datasets"
+        )
+
+    estimator, used, classes, class_labels = prepare_model(
+        models, names, voting, n_jobs
+    )
+
+    # read only the rasters that are used by the models
+    if len(used) < len(names):
+        tstack = tstack.subset(used)
+
+    outputs = tstack.output_names(output)
+    overwrite = gs.overwrite()
+
+    if flags["z"] is False:
+        gs.message(
+            "Predicting classification/regression rasters for {0} timesteps...".format(
+                tstack.n_timesteps
+            )
+        )
+        tstack.predict(
+            estimator, output, height=height, overwrite=overwrite, memoize=memoize
+        )
+
+    if flags["p"] is True:
+        gs.message("Predicting class probabilities...")
+        tstack.predict_proba(
+            estimator,
+            output,
+            class_labels=classes,
+            height=height,
+            overwrite=overwrite,
+            memoize=memoize,
+        )
+
+    # assign categories for classification maps
+    if class_labels and flags["z"] is False:
+        from rlearnlib.transformers import CategoryEncoder
+
+        rules = CategoryEncoder().fit(class_labels).category_rules(separator=",")
+        rules_file = string_to_rules(rules)
+
+        for name in outputs:
+            r.category(map=name, rules=rules_file, separator="comma")
+
+
 def main():
     try:
         import sklearn
-        import joblib
 
         if sklearn.__version__ < "0.20":
             gs.fatal("Package python3-scikit-learn 0.20 or newer is not installed")
@@ -100,27 +618,60 @@ def main():
     except ImportError:
         gs.fatal("Package python3-scikit-learn 0.20 or newer is not installed")
 
+    from rlearnlib.parallel import allocate_cores
+
     # parser options
     group = options["group"]
     output = options["output"]
+    batch_file = options["batch_file"]
+    batch_jobs = int(options["batch_jobs"])
     model_load = options["load_model"]
     probability = flags["p"]
     prob_only = flags["z"]
     chunksize = int(options["chunksize"])
-
-    # remove @ from output in case overwriting result
-    if "@" in output:
-        output = output.split("@")[0]
+    voting = options["voting"]
+    n_jobs = int(options["n_jobs"])
+    strds = options["strds"]
+    resampling = options["resampling"]
+    memoize = int(options["memo_size"]) if flags["u"] else None
+    preview = int(options["preview"])
+    tolerance = float(options["tolerance"]) if options["tolerance"] else None
+
+    if preview < 0 or preview == 1:
+        gs.fatal("The preview decimation factor must be 0 or greater than 1")
+
+    if preview > 0 and strds:
+        gs.fatal("Previews are not supported for space-time raster datasets")
+
+    if options["cascade_model"] and (strds or preview > 0 or memoize is not None):
+        gs.fatal(
+            "A cascade cannot be used with space-time raster datasets, previews or "
+            "the -u flag"
+        )
 
     # check probabilities=True if prob_only=True
     if prob_only is True and probability is False:
         gs.fatal("Need to set probabilities=True if prob_only=True")
 
-    # reload fitted model and training data
-    estimator, y, class_labels = joblib.load(model_load)
+    if strds:
+        if "," in output:
+            gs.fatal("A single output name is used as the prefix of each timestep")
+
+        pairs = [(None, output.split("@")[0])]
+    else:
+        pairs = read_batch(group, output, batch_file)
 
-    # define RasterStack
-    stack = RasterStack(group=group)
+    # split the cores between the groups that are predicted concurrently
+    batch_jobs = max(min(batch_jobs, len(pairs)), 1)
+    cores = allocate_cores(n_jobs, n_outer=batch_jobs)
+
+    # reload fitted models once, memory-mapping their arrays if they are
+    # uncompressed
+    models = [load_model(f) for f in model_load.split(",")]
+    cascade = None
+
+    if options["cascade_model"]:
+        cascade = load_model(options["cascade_model"])
 
     # perform raster prediction
     region = Region()
@@ -130,36 +681,106 @@ def main():
     if row_incr >= region.rows:
         row_incr = None
 
-    # prediction
-    if prob_only is False:
-        gs.message("Predicting classification/regression raster...")
-        stack.predict(
-            estimator=estimator,
-            output=output,
-            height=row_incr,
-            overwrite=gs.overwrite(),
+    if strds:
+        predict_strds(
+            models,
+            strds,
+            options["static"],
+            options["where"],
+            pairs[0][1],
+            voting,
+            cores.estimator,
+            row_incr,
+            memoize,
         )
-
-    if probability is True:
-        gs.message("Predicting class probabilities...")
-        stack.predict_proba(
-            estimator=estimator,
-            output=output,
-            class_labels=np.unique(y),
-            overwrite=gs.overwrite(),
-            height=row_incr,
+        return
+
+    focal, virtual, distance = model_derived(
+        models if cascade is None else models + [cascade]
+    )
+
+    # groups containing the same number of rasters share the model setup, and
+    # the output type is probed once for each combination of raster types
+    prepared = {}
+    probes = {}
+    tasks = []
+
+    for group_name, output_name in pairs:
+        stack = RasterStack(group=group_name, resampling=resampling)
+        names = stack.names
+
+        if len(names) not in prepared:
+            prepared[len(names)] = prepare_model(
+                models,
+                names,
+                voting,
+                cores.estimator,
+                cascade=cascade,
+                threshold=float(options["threshold"]),
+            )
+
+        estimator, used, classes, class_labels = prepared[len(names)]
+
+        # read only the rasters that are used by the models
+        if len(used) < len(names):
+            stack = RasterStack(
+                rasters=[names[i] for i in used], resampling=resampling
+            )
+
+        rasters = stack.names
+        stack.focal = focal
+        stack.virtual = virtual
+        stack.distance = distance
+        key = (len(names), tuple(stack.mtypes[name] for name in rasters))
+        output_format = None
+
+        if prob_only is False:
+            if key not in probes:
+                probes[key] = stack.probe_output(estimator)
+            output_format = probes[key]
+
+        category_rules = None
+
+        if class_labels:
+            from rlearnlib.transformers import CategoryEncoder
+
+            rules = CategoryEncoder().fit(class_labels).category_rules(separator=",")
+            category_rules = string_to_rules(rules)
+
+        tasks.append(
+            (
+                estimator,
+                rasters,
+                output_name,
+                output_format,
+                classes,
+                category_rules,
+                probability,
+                prob_only,
+                row_incr,
+                gs.overwrite(),
+                resampling,
+                focal,
+                virtual,
+                distance,
+                memoize,
+                preview,
+                tolerance,
+            )
         )
 
-    # assign categories for classification map
-    if class_labels and prob_only is False:
-        rules = []
-
-        for val, lab in class_labels.items():
-            rules.append(",".join([str(val), str(lab)]))
+    if batch_jobs == 1:
+        for task in tasks:
+            predict_group(*task)
+    else:
+        from joblib import Parallel, delayed
 
-        rules = "\n".join(rules)
-        rules_file = string_to_rules(rules)
-        r.category(map=output, rules=rules_file, separator="comma")
+        gs.message(
+            "Predicting {0} imagery groups using {1} concurrent processes...".format(
+                len(tasks), batch_jobs
+            )
+        )
+        Parallel(n_jobs=batch_jobs)(delayed(predict_group)(*task) for task in tasks)
 
 
 if __name__ == "__main__":
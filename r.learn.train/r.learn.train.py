@@ -231,6 +231,42 @@
 #% guisection: Cross validation
 #%end
 
+#%option string
+#% key: search
+#% label: Hyperparameter search method
+#% description: Method used to search the hyperparameter combinations when multiple values are supplied for any hyperparameter
+#% answer: grid
+#% options: grid,halving,hyperband,bayesian
+#% descriptions: grid;Exhaustive search of all combinations;halving;Successive halving of all combinations using an increasing number of samples or trees;hyperband;Hyperband brackets of successive halving over randomly-sampled combinations;bayesian;Sequential model-based optimization using a tree-structured Parzen estimator where numeric hyperparameters with two values are searched as ranges
+#% guisection: Cross validation
+#%end
+
+#%option
+#% key: n_iter
+#% type: integer
+#% label: Number of hyperparameter combinations to evaluate using the bayesian search
+#% description: Budget of the number of hyperparameter combinations that are evaluated by the bayesian search method
+#% answer: 20
+#% guisection: Cross validation
+#%end
+
+#%option G_OPT_F_OUTPUT
+#% key: checkpoint
+#% label: File to checkpoint the hyperparameter search scores
+#% description: Name of file in which the score of each hyperparameter combination on each cross-validation fold is stored as soon as it is computed. Rerunning with the same file skips the combinations that are already evaluated. Requires search=grid and multiple values of at least one hyperparameter
+#% required: no
+#% guisection: Cross validation
+#%end
+
+#%option
+#% key: halving_factor
+#% type: integer
+#% label: Proportion of candidates retained after each iteration of successive halving
+#% description: Only 1/halving_factor of the candidates are promoted to the next iteration, which uses halving_factor times more samples or trees
+#% answer: 3
+#% guisection: Cross validation
+#%end
+
 #%flag
 #% key: f
 #% label: Compute Feature importances
@@ -263,6 +299,33 @@
 #% guisection: Optional
 #%end
 
+#%option
+#% key: focal
+#% type: string
+#% required: no
+#% multiple: yes
+#% label: Focal features computed from rasters within the imagery group
+#% description: Neighbourhood features specified as raster:statistic:size, e.g. lsat7_2002_40:std:5. The statistic is one of mean, std, min, max, range or gradient and size is the odd width of the window in cells. The features are computed while the rasters are read and are stored with the model for prediction
+#% guisection: Optional
+#%end
+
+#%option
+#% key: virtual
+#% type: string
+#% required: no
+#% multiple: yes
+#% label: Virtual layers computed from rasters within the imagery group
+#% description: Layers specified as name = expression, e.g. ndvi = (lsat7_2002_40 - lsat7_2002_30) / (lsat7_2002_40 + lsat7_2002_30). Expressions use the names of the rasters without their mapset, arithmetic and comparison operators and the numpy functions abs, arctan, arctan2, clip, cos, exp, log, log10, maximum, minimum, power, sin, sqrt, tan and where. The layers are evaluated while the rasters are read and are stored with the model for prediction
+#% guisection: Optional
+#%end
+
+#%flag
+#% key: x
+#% label: Use distance fields as features
+#% description: Append the euclidean distances to the centres of the cells at the corners and at the centre of the region as features. The distances are calculated while the rasters are read and the points are stored with the model for prediction
+#% guisection: Optional
+#%end
+
 #%option G_OPT_F_OUTPUT
 #% key: fimp_file
 #% label: Save feature importances to csv
@@ -271,6 +334,15 @@
 #% guisection: Cross validation
 #%end
 
+#%option
+#% key: fimp_samples
+#% type: integer
+#% label: Number of samples used for the feature importances
+#% description: Maximum number of randomly drawn training samples used to compute the permutation feature importances. Zero uses all samples
+#% answer: 0
+#% guisection: Cross validation
+#%end
+
 #%option G_OPT_F_OUTPUT
 #% key: param_file
 #% label: Save hyperparameter search scores to csv
@@ -297,6 +369,70 @@
 #% guisection: Optional
 #%end
 
+#%option
+#% key: cache_size
+#% type: integer
+#% label: Maximum size of the preprocessing cache in MB
+#% description: Maximum size (MB) of the disk cache used to reuse the preprocessing results of each cross-validation fold across hyperparameter candidates. Zero disables caching
+#% answer: 1000
+#% guisection: Optional
+#%end
+
+#%option
+#% key: selection
+#% type: string
+#% label: Feature selection method
+#% description: Method used to remove redundant or uninformative rasters before training, so that only the retained rasters are read during prediction
+#% answer: none
+#% options: none,correlation,rfe,importance
+#% descriptions: none;No feature selection;correlation;Retain one raster from each cluster of rasters whose absolute correlation exceeds correlation_threshold;rfe;Recursive feature elimination with cross-validation using permutation importances;importance;Remove rasters with a permutation importance less than or equal to importance_threshold
+#% guisection: Feature selection
+#%end
+
+#%option
+#% key: correlation_threshold
+#% type: double
+#% label: Correlation threshold for clustering rasters
+#% description: Minimum absolute correlation between the rasters within a cluster when selection=correlation
+#% answer: 0.9
+#% guisection: Feature selection
+#%end
+
+#%option
+#% key: importance_threshold
+#% type: double
+#% label: Permutation importance threshold
+#% description: Rasters with a permutation importance less than or equal to this value are removed when selection=importance
+#% answer: 0.0
+#% guisection: Feature selection
+#%end
+
+#%option
+#% key: n_components
+#% type: integer
+#% label: Number of principal components
+#% description: Number of principal components of the non-categorical rasters to use as predictors. Zero disables the transformation
+#% answer: 0
+#% guisection: Optional
+#%end
+
+#%option
+#% key: pca_statistics
+#% type: string
+#% label: Pixels used to compute the principal components
+#% description: Compute the principal components from the training pixels, or from the covariance of all pixels of the imagery group within the computational region
+#% answer: sample
+#% options: sample,stack
+#% guisection: Optional
+#%end
+
+#%flag
+#% key: w
+#% label: Whiten the principal components
+#% description: Scale the principal components to unit variance
+#% guisection: Optional
+#%end
+
 #%flag
 #% key: s
 #% label: Standardization preprocessing
@@ -311,6 +447,20 @@
 #% guisection: Optional
 #%end
 
+#%flag
+#% key: d
+#% label: Compress duplicate training samples
+#% description: Collapse training samples with identical feature values, response and group into unique samples that are weighted by their count. Only used for estimators that support sample weights
+#% guisection: Optional
+#%end
+
+#%flag
+#% key: e
+#% label: Use the cross-validation fold models as the final model
+#% description: Save the models that were fitted on each cross-validation fold as a voting ensemble instead of refitting the model on all of the training data
+#% guisection: Cross validation
+#%end
+
 #%option G_OPT_F_OUTPUT
 #% key: save_training
 #% label: Save training data to csv
@@ -337,10 +487,13 @@
 import atexit
 import os
 import re
+import shutil
+import time
 import warnings
 from copy import deepcopy
 
 import grass.script as gs
+from grass.pygrass.gis.region import Region
 from grass.pygrass.raster import RasterRow
 import numpy as np
 
@@ -351,14 +504,27 @@ from rlearnlib.utils import (
     predefined_estimators,
     load_training_data,
     save_training_data,
+    compress_duplicates,
+    distance_field_points,
     option_to_list,
     scoring_metrics,
     check_class_weights,
+    TransformCache,
+    model_metadata,
+    save_model,
 )
 from rlearnlib.raster import RasterStack
+from rlearnlib.virtual import split_definitions
+from rlearnlib.parallel import (
+    allocate_cores,
+    effective_n_jobs,
+    set_estimator_n_jobs,
+    share_array,
+)
 
 
 tmp_rast = []
+tmp_dirs = []
 
 
 def cleanup():
@@ -366,6 +532,9 @@ def cleanup():
     for rast in tmp_rast:
         gs.run_command("g.remove", name=rast, type="raster", flags="f", quiet=True)
 
+    for folder in tmp_dirs:
+        shutil.rmtree(folder, ignore_errors=True)
+
 
 def warn(*args, **kwargs):
     """Hide warnings"""
@@ -437,6 +606,16 @@ def process_param_grid(hyperparams):
     return hyperparams, param_grid
 
 
+def derived_names(stack):
+    """Names of the focal features, virtual layers and distance fields that follow
+    the rasters of a RasterStack"""
+    return (
+        [f.name for f in stack.focal]
+        + [v.name for v in stack.virtual]
+        + [name for name, _ in stack.distance]
+    )
+
+
 def main():
     try:
         import sklearn
@@ -477,19 +656,36 @@ def main():
         "hidden_layer_sizes": options["hidden_units"],
     }
     cv = int(options["cv"])
+    search = options["search"]
+    halving_factor = int(options["halving_factor"])
+    n_iter = int(options["n_iter"])
+    checkpoint = options["checkpoint"]
     group_raster = options["group_raster"]
     importances = flags["f"]
     preds_file = options["preds_file"]
     classif_file = options["classif_file"]
     fimp_file = options["fimp_file"]
+    fimp_samples = int(options["fimp_samples"])
     param_file = options["param_file"]
     norm_data = flags["s"]
+    n_components = int(options["n_components"])
+    pca_statistics = options["pca_statistics"]
+    whiten = flags["w"]
     random_state = int(options["random_state"])
     load_training = options["load_training"]
     save_training = options["save_training"]
     n_jobs = int(options["n_jobs"])
+    cache_size = int(options["cache_size"])
     balance = flags["b"]
+    fold_ensemble = flags["e"]
+    compress = flags["d"]
+    selection = options["selection"]
+    correlation_threshold = float(options["correlation_threshold"])
+    importance_threshold = float(options["importance_threshold"])
     category_maps = option_to_list(options["category_maps"])
+    focal = option_to_list(options["focal"])
+    virtual = split_definitions(options["virtual"])
+    distance_fields = flags["x"]
 
     # define estimator -------------------------------------------------------------------------------------------------
     hyperparams, param_grid = process_param_grid(hyperparams)
@@ -504,6 +700,26 @@ def main():
     }
     scoring, search_scorer = scoring_metrics(mode)
 
+    # divide the cores between outer folds, search fits and estimator threads
+    n_search = 1
+
+    for values in param_grid.values():
+        n_search *= len(values)
+
+    if search == "bayesian":
+        n_search = n_iter
+
+    if any(param_grid) is True:
+        n_search *= 2
+
+    cores = allocate_cores(
+        n_jobs,
+        n_outer=cv if cv > 1 else 1,
+        n_search=n_search,
+        estimator_threads="n_jobs" in estimator_params,
+    )
+    set_estimator_n_jobs(estimator, cores.estimator)
+
     # checks of input options ------------------------------------------------------------------------------------------
     if (
         mode == "classification"
@@ -526,10 +742,26 @@ def main():
         if not os.path.exists(os.path.dirname(classif_file)):
             gs.fatal("Directory for output file {} does not exist".format(classif_file))
 
-    # feature importance file selected but no cross-validation scheme used
-    if importances:
-        if sklearn.__version__ < "0.22":
-            gs.fatal("Feature importances calculation requires scikit-learn version >= 0.22")
+    if search in ["halving", "hyperband"] and sklearn.__version__ < "0.24":
+        gs.fatal("Successive halving requires scikit-learn version >= 0.24")
+
+    if search == "bayesian" and sklearn.__version__ < "0.24":
+        gs.fatal("The bayesian search requires scikit-learn version >= 0.24")
+
+    if halving_factor < 2:
+        gs.fatal("The halving_factor has to be 2 or greater")
+
+    if n_iter < 1:
+        gs.fatal("The n_iter budget has to be 1 or greater")
+
+    if checkpoint and search != "grid":
+        gs.fatal("The checkpoint option is only available for search=grid")
+
+    if checkpoint and any(param_grid) is False:
+        gs.fatal(
+            "The checkpoint option requires multiple values for at least one "
+            "hyperparameter"
+        )
 
     if fimp_file:
         if importances is False:
@@ -537,6 +769,11 @@ def main():
         if not os.path.exists(os.path.dirname(fimp_file)):
             gs.fatal("Directory for output file {} does not exist".format(fimp_file))
 
+    if fold_ensemble is True and cv <= 1:
+        gs.fatal(
+            "Using the fold models as the final model requires cross-validation cv > 1"
+        )
+
     # predictions file selected but no cross-validation scheme used
     if preds_file:
         if cv <= 1:
@@ -552,7 +789,48 @@ def main():
     if category_maps is not None:
         stack.categorical = category_maps
 
+    if focal is not None or virtual is not None or distance_fields is True:
+        from rlearnlib.focal import FocalFeature
+        from rlearnlib.virtual import VirtualLayer
+
+        if selection != "none":
+            gs.fatal(
+                "Feature selection cannot be used with focal features, virtual layers "
+                "or distance fields"
+            )
+
+        if n_components > 0 and pca_statistics == "stack":
+            gs.fatal(
+                "pca_statistics=stack cannot be used with focal features, virtual "
+                "layers or distance fields"
+            )
+
+        try:
+            if focal is not None:
+                stack.focal = [FocalFeature.parse(i, stack.names) for i in focal]
+
+            if virtual is not None:
+                stack.virtual = [VirtualLayer.parse(i, stack.names) for i in virtual]
+        except ValueError as e:
+            gs.fatal(str(e))
+
+        if distance_fields is True:
+            points = distance_field_points(Region())
+            stack.distance = [("distance_to_" + k, p) for k, p in points.items()]
+
+        derived = derived_names(stack)
+        short_names = [i.split("@")[0].replace(".", "_") for i in stack.names]
+
+        if len(set(derived)) < len(derived) or set(derived) & set(short_names):
+            gs.fatal(
+                "The names of focal features, virtual layers and distance fields must "
+                "be unique and differ from the rasters in the imagery group"
+            )
+
     # extract training data --------------------------------------------------------------------------------------------
+    timings = {}
+    start = time.time()
+
     if load_training != "":
         X, y, cat, class_labels, group_id = load_training_data(load_training)
 
@@ -584,7 +862,7 @@ def main():
             X, y, cat = stack.extract_points(training_points, field)
             y = y.flatten()
 
-            if y.dtype in (np.object_, np.object):
+            if y.dtype == object:
                 from sklearn.preprocessing import LabelEncoder
                 le = LabelEncoder()
                 y = le.fit_transform(y)
@@ -592,10 +870,11 @@ def main():
             else:
                 class_labels = None
 
-        # take group id from last column and remove from predictors
+        # take group id from the column of the group raster, which precedes any
+        # focal features and virtual layers, and remove from predictors
         if group_raster != "":
-            group_id = X[:, -1]
-            X = np.delete(X, -1, axis=1)
+            group_id = X[:, stack.count - 1]
+            X = np.delete(X, stack.count - 1, axis=1)
             stack.drop(group_raster)
         else:
             group_id = None
@@ -618,12 +897,54 @@ def main():
 
         if save_training != "":
             save_training_data(
-                save_training, X, y, cat, class_labels, group_id, stack.names
+                save_training,
+                X,
+                y,
+                cat,
+                class_labels,
+                group_id,
+                stack.names + derived_names(stack),
             )
 
+    timings["extraction"] = time.time() - start
+
+    # collapse identical samples into unique samples weighted by their count
+    sample_weight = None
+
+    if compress is True:
+        from sklearn.utils.validation import has_fit_parameter
+
+        if has_fit_parameter(estimator, "sample_weight") is False:
+            gs.warning(
+                model_name + " does not support sample weights, duplicate training "
+                "samples are retained"
+            )
+        else:
+            n_samples = X.shape[0]
+            X, y, cat, group_id, sample_weight = compress_duplicates(
+                X, y, cat, group_id
+            )
+            gs.message(
+                "Compressed {0} training samples into {1} unique samples".format(
+                    n_samples, X.shape[0]
+                )
+            )
+
+    # share the training data with worker processes using a memory-map
+    if cores.outer * cores.search > 1 or importances is True:
+        tmp_dirs.append(gs.tempdir())
+        X = share_array(X, tmp_dirs[-1])
+
     # cross validation settings ----------------------------------------------------------------------------------------
     # inner resampling method (cv=2)
     from sklearn.model_selection import GridSearchCV, StratifiedKFold, GroupKFold, KFold
+    from rlearnlib.search import (
+        HyperbandSearchCV,
+        ResumableGridSearchCV,
+        WarmStartSearchCV,
+        halving_resource,
+        warm_start_key,
+    )
 
     if any(param_grid) is True:
         if group_id is None and mode == "classification":
@@ -645,17 +966,118 @@ def main():
             outer = GroupKFold(n_splits=cv)
 
     # modify estimators that take sample_weights -----------------------------------------------------------------------
-    if balance is True:
-        from sklearn.utils import compute_class_weight
+    if balance is True and sample_weight is None:
+        from sklearn.utils.class_weight import compute_sample_weight
+
+        class_weights = compute_sample_weight(class_weight="balanced", y=y)
+        fit_params = {"sample_weight": class_weights}
 
-        class_weights = compute_class_weight(class_weight="balanced", classes=(y), y=y)
+    elif balance is True:
+        # balance the classes using the number of samples that each unique
+        # sample represents
+        classes, inverse = np.unique(y, return_inverse=True)
+        totals = np.bincount(inverse, weights=sample_weight)
+        balanced = sample_weight.sum() / (classes.shape[0] * totals)
+        class_weights = sample_weight * balanced[inverse]
         fit_params = {"sample_weight": class_weights}
 
+    elif sample_weight is not None:
+        class_weights = None
+        fit_params = {"sample_weight": sample_weight}
+
     else:
         class_weights = None
         fit_params = {}
 
+    # feature selection ------------------------------------------------------------------------------------------------
+    group_features = stack.names
+
+    if selection != "none":
+        from rlearnlib.selection import (
+            symmetric_correlation,
+            select_uncorrelated,
+            select_important,
+            recursive_elimination,
+        )
+
+        if cv > 1:
+            select_cv = outer
+        elif group_id is None and mode == "classification":
+            select_cv = StratifiedKFold(n_splits=3, random_state=random_state)
+        elif group_id is None and mode == "regression":
+            select_cv = KFold(n_splits=3, random_state=random_state)
+        else:
+            select_cv = GroupKFold(n_splits=3)
+
+        # the supervised methods select the rasters using the data of the outer
+        # folds, so the cross-validation scores are not independent of them
+        if cv > 1 and selection in ["importance", "rfe"]:
+            gs.warning(
+                "The rasters are selected using the same training data as the "
+                "cross-validation, so the cross-validation scores are optimistically "
+                "biased. Use an independent validation dataset for an unbiased "
+                "estimate of the performance"
+            )
+
+        gs.message(os.linesep)
+        gs.message("Selecting features using the {0} method".format(selection))
+
+        if selection == "correlation":
+            corr = symmetric_correlation(stack.covar(correlation=True))
+            selected = select_uncorrelated(
+                corr, correlation_threshold, keep=stack.categorical
+            )
+
+        elif selection == "importance":
+            selected, _ = select_important(
+                estimator,
+                X,
+                y,
+                cv=select_cv,
+                scoring=search_scorer,
+                threshold=importance_threshold,
+                groups=group_id,
+                fit_params=fit_params,
+                n_jobs=max(effective_n_jobs(n_jobs) // cores.estimator, 1),
+                random_state=random_state,
+            )
+
+        else:
+            selected, _ = recursive_elimination(
+                estimator,
+                X,
+                y,
+                cv=select_cv,
+                scoring=search_scorer,
+                groups=group_id,
+                fit_params=fit_params,
+                n_jobs=max(effective_n_jobs(n_jobs) // cores.estimator, 1),
+                random_state=random_state,
+            )
+
+        # subset the training data and the imagery group to the retained rasters
+        layer_names = list(stack.loc.keys())
+        stack.drop([layer_names[i] for i in range(stack.count) if i not in selected])
+
+        if isinstance(X, np.memmap):
+            X = share_array(X[:, selected], tmp_dirs[-1], name="X_selected")
+        else:
+            X = X[:, selected]
+
+        if category_maps is not None:
+            category_maps = [i for i in category_maps if i in stack.names] or None
+            stack.categorical = category_maps or []
+
+        gs.message(
+            "Retained {0} of {1} rasters:".format(stack.count, len(group_features))
+        )
+
+        for name in stack.names:
+            gs.message(name)
+
     # preprocessing ----------------------------------------------------------------------------------------------------
+    n_features = stack.count + len(derived_names(stack))
+
     from sklearn.pipeline import Pipeline
     from sklearn.compose import ColumnTransformer
     from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -665,12 +1087,12 @@ def main():
         scaler = StandardScaler()
         trans = ColumnTransformer(
             remainder="passthrough",
-            transformers=[("scaling", scaler, np.arange(0, stack.count))],
+            transformers=[("scaling", scaler, np.arange(0, n_features))],
         )
 
     # one-hot encoding
     elif norm_data is False and category_maps is not None:
-        enc = OneHotEncoder(handle_unknown="ignore", sparse=False)
+        enc = OneHotEncoder(handle_unknown="ignore", sparse=False, dtype=np.float32)
         trans = ColumnTransformer(
             remainder="passthrough", transformers=[("onehot", enc, stack.categorical)]
         )
@@ -678,67 +1100,182 @@ def main():
     # standardization and one-hot encoding
     elif norm_data is True and category_maps is not None:
         scaler = StandardScaler()
-        enc = OneHotEncoder(handle_unknown="ignore", sparse=False)
+        enc = OneHotEncoder(handle_unknown="ignore", sparse=False, dtype=np.float32)
         trans = ColumnTransformer(
             remainder="passthrough",
             transformers=[
                 ("onehot", enc, stack.categorical),
                 ("scaling", scaler, np.setxor1d(
-                    range(stack.count), stack.categorical).astype('int')),
+                    range(n_features), stack.categorical).astype('int')),
             ],
         )
 
+    # principal components of the non-categorical rasters, which replace the scaling
+    # because the components are computed from standardized rasters if norm_data
+    if n_components > 0:
+        from rlearnlib.transformers import StackPCA
+
+        numeric = np.setxor1d(range(n_features), stack.categorical).astype("int")
+
+        if n_components > numeric.shape[0]:
+            gs.fatal(
+                "n_components cannot be greater than the number of non-categorical "
+                "rasters ({0})".format(numeric.shape[0])
+            )
+
+        pca = StackPCA(n_components=n_components, whiten=whiten, standardize=norm_data)
+
+        if pca_statistics == "stack":
+            gs.message("Computing the covariance matrix of the imagery group...")
+            n_pixels, mean, cov = stack.moments(index=numeric)
+            pca.set_params(mean=mean, covariance=cov)
+
+        transformers = [("pca", pca, numeric)]
+
+        if category_maps is not None:
+            enc = OneHotEncoder(handle_unknown="ignore", sparse=False, dtype=np.float32)
+            transformers.insert(0, ("onehot", enc, stack.categorical))
+
+        trans = ColumnTransformer(remainder="passthrough", transformers=transformers)
+
     # combine transformers
-    if norm_data is True or category_maps is not None:
-        estimator = Pipeline([("preprocessing", trans), ("estimator", estimator)])
+    if norm_data is True or category_maps is not None or n_components > 0:
+        # cache the preprocessing of each fold if the pipeline is fitted repeatedly
+        if cache_size > 0 and (any(param_grid) is True or cv > 1):
+            tmp_dirs.append(gs.tempdir())
+            memory = TransformCache(tmp_dirs[-1], bytes_limit=cache_size * 1024 ** 2)
+        else:
+            memory = None
+
+        estimator = Pipeline(
+            [("preprocessing", trans), ("estimator", estimator)], memory=memory
+        )
         param_grid = wrap_named_step(param_grid)
         fit_params = wrap_named_step(fit_params)
 
-    if any(param_grid) is True:
-        estimator = GridSearchCV(
+    if any(param_grid) is True and search == "grid":
+        if checkpoint != "":
+            # skip the evaluations that are already in the checkpoint file
+            estimator = ResumableGridSearchCV(
+                estimator=estimator,
+                param_grid=param_grid,
+                scoring=search_scorer,
+                checkpoint=checkpoint,
+                n_jobs=cores.search,
+                cv=inner,
+            )
+        elif warm_start_key(estimator, param_grid) is not None:
+            # grow ensembles incrementally across the n_estimators values
+            estimator = WarmStartSearchCV(
+                estimator=estimator,
+                param_grid=param_grid,
+                scoring=search_scorer,
+                n_jobs=cores.search,
+                cv=inner,
+            )
+        else:
+            estimator = GridSearchCV(
+                estimator=estimator,
+                param_grid=param_grid,
+                scoring=search_scorer,
+                n_jobs=cores.search,
+                cv=inner,
+            )
+
+    elif any(param_grid) is True and search == "halving":
+        from sklearn.experimental import enable_halving_search_cv
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        resource, max_resources = halving_resource(estimator, param_grid)
+        estimator = HalvingGridSearchCV(
             estimator=estimator,
             param_grid=param_grid,
+            factor=halving_factor,
+            resource=resource,
+            max_resources=max_resources,
+            min_resources="exhaust",
             scoring=search_scorer,
-            n_jobs=n_jobs,
+            n_jobs=cores.search,
             cv=inner,
+            random_state=random_state,
+        )
+
+    elif any(param_grid) is True and search == "hyperband":
+        resource, max_resources = halving_resource(estimator, param_grid)
+        estimator = HyperbandSearchCV(
+            estimator=estimator,
+            param_grid=param_grid,
+            factor=halving_factor,
+            resource=resource,
+            max_resources=max_resources,
+            scoring=search_scorer,
+            n_jobs=cores.search,
+            cv=inner,
+            random_state=random_state,
+        )
+
+    elif any(param_grid) is True and search == "bayesian":
+        from rlearnlib.bayesian import BayesianSearchCV, search_space
+
+        estimator = BayesianSearchCV(
+            estimator=estimator,
+            param_distributions=search_space(param_grid),
+            n_iter=n_iter,
+            batch_size=max(cores.search // inner.get_n_splits(), 1),
+            scoring=search_scorer,
+            n_jobs=cores.search,
+            cv=inner,
+            random_state=random_state,
         )
 
     # estimator training -----------------------------------------------------------------------------------------------
     gs.message(os.linesep)
-    gs.message(("Fitting model using " + model_name))
-    if balance is True and group_id is not None:
-        estimator.fit(X, y, groups=group_id, **fit_params)
-    elif balance is True and group_id is None:
-        estimator.fit(X, y, **fit_params)
-    else:
-        estimator.fit(X, y)
+    gs.message(
+        "Using {0} core(s) for outer folds, {1} for hyperparameter search fits "
+        "and {2} thread(s) per estimator".format(
+            cores.outer, cores.search, cores.estimator
+        )
+    )
+    start = time.time()
 
-    # message best hyperparameter setup and optionally save using pandas
-    if any(param_grid) is True:
-        gs.message(os.linesep)
-        gs.message("Best parameters:")
+    if fold_ensemble is False:
+        gs.message(("Fitting model using " + model_name))
 
-        optimal_pars = [
-            (k.replace("estimator__", "").replace("selection__", "") + " = " + str(v))
-            for (k, v) in estimator.best_params_.items()
-        ]
+        if fit_params and group_id is not None:
+            estimator.fit(X, y, groups=group_id, **fit_params)
+        elif fit_params and group_id is None:
+            estimator.fit(X, y, **fit_params)
+        else:
+            estimator.fit(X, y)
 
-        for i in optimal_pars:
-            gs.message(i)
+        if getattr(estimator, "n_resumed_", 0) > 0:
+            gs.message(
+                "Loaded {0} hyperparameter evaluations from the checkpoint".format(
+                    estimator.n_resumed_
+                )
+            )
 
-        if param_file != "":
-            param_df = pd.DataFrame(estimator.cv_results_)
-            param_df.to_csv(param_file)
+    timings["fit"] = time.time() - start
 
     # cross-validation -------------------------------------------------------------------------------------------------
+    start = time.time()
+
     if cv > 1:
-        from sklearn.metrics import classification_report
-        from sklearn import metrics
+        from rlearnlib.ensemble import VotingEnsemble
+        from rlearnlib.validation import (
+            cross_validate_folds,
+            confusion_matrices,
+            classification_scores,
+            classification_report,
+            regression_scores,
+        )
+
+        # count the training samples that each compressed sample represents
+        if mode == "classification":
+            _, inverse = np.unique(y, return_inverse=True)
+            class_counts = np.bincount(inverse, weights=sample_weight)
 
-        if (
-            mode == "classification"
-            and cv > np.histogram(y, bins=np.unique(y))[0].min()
-        ):
+        if mode == "classification" and cv > class_counts.min():
             gs.message(os.linesep)
             gs.fatal(
                 "Number of cv folds is greater than number of "
@@ -748,68 +1285,96 @@ def main():
         gs.message(os.linesep)
         gs.message("Cross validation global performance measures......:")
 
-        if (
-            mode == "classification"
-            and len(np.unique(y)) == 2
-            and all([0, 1] == np.unique(y))
-        ):
-            scoring["roc_auc"] = metrics.roc_auc_score
+        # fit each outer fold once and reuse the fold models for all outputs
+        result = cross_validate_folds(
+            estimator,
+            X,
+            y,
+            cv=outer,
+            groups=group_id,
+            fit_params=fit_params,
+            predict_proba=mode == "classification"
+            and hasattr(estimator, "predict_proba"),
+            return_estimators=fold_ensemble or importances,
+            n_jobs=cores.outer,
+        )
 
-        from sklearn.model_selection import cross_val_predict
+        if mode == "classification":
+            cm, classes = confusion_matrices(
+                y, result.predictions, result.folds, sample_weight=sample_weight
+            )
+            scores = classification_scores(cm)
+
+            if (
+                result.probabilities is not None
+                and len(np.unique(y)) == 2
+                and all([0, 1] == np.unique(y))
+            ):
+                from sklearn.metrics import roc_auc_score
+
+                scores["roc_auc"] = np.asarray(
+                    [
+                        roc_auc_score(
+                            y[result.folds == fold],
+                            result.probabilities[result.folds == fold, 1],
+                            sample_weight=None
+                            if sample_weight is None
+                            else sample_weight[result.folds == fold],
+                        )
+                        for fold in range(cm.shape[0])
+                    ]
+                )
+        else:
+            scores = regression_scores(
+                y, result.predictions, result.folds, sample_weight=sample_weight
+            )
 
-        preds = cross_val_predict(
-            estimator, X, y, group_id, cv=outer, n_jobs=n_jobs, fit_params=fit_params
+        preds = pd.DataFrame(
+            {
+                "y_pred": result.predictions,
+                "y_true": y,
+                "cat": cat,
+                "fold": result.folds,
+            },
+            columns=["y_pred", "y_true", "cat", "fold"],
         )
 
-        test_idx = [test for train, test in outer.split(X, y)]
-        n_fold = np.zeros((0,))
+        # number of training samples that each unique sample represents
+        if sample_weight is not None:
+            preds["count"] = sample_weight.astype(np.int64)
 
-        for fold in range(outer.get_n_splits()):
-            n_fold = np.hstack((n_fold, np.repeat(fold, test_idx[fold].shape[0])))
+        if result.probabilities is not None:
+            for i, label in enumerate(result.classes):
+                preds["prob_" + str(label)] = result.probabilities[:, i]
 
-        preds = {"y_pred": preds, "y_true": y, "cat": cat, "fold": n_fold}
-
-        preds = pd.DataFrame(data=preds, columns=["y_pred", "y_true", "cat", "fold"])
         gs.message(os.linesep)
         gs.message("Global cross validation scores...")
         gs.message(os.linesep)
         gs.message("Metric \t Mean \t Error")
 
-        for name, func in scoring.items():
-            score_mean = (
-                preds.groupby("fold")
-                .apply(lambda x: func(x["y_true"], x["y_pred"]))
-                .mean()
-            )
-
-            score_std = (
-                preds.groupby("fold")
-                .apply(lambda x: func(x["y_true"], x["y_pred"]))
-                .std()
-            )
-
+        for name, fold_scores in scores.items():
             gs.message(
-                name + "\t" + str(score_mean.round(3)) + "\t" + str(score_std.round(3))
+                name
+                + "\t"
+                + str(fold_scores.mean().round(3))
+                + "\t"
+                + str(fold_scores.std(ddof=1).round(3))
             )
 
         if mode == "classification":
             gs.message(os.linesep)
             gs.message("Cross validation class performance measures......:")
 
-            report_str = classification_report(
-                y_true=preds["y_true"],
-                y_pred=preds["y_pred"],
-                sample_weight=class_weights,
-                output_dict=False,
-            )
-
-            report = classification_report(
-                y_true=preds["y_true"],
-                y_pred=preds["y_pred"],
-                sample_weight=class_weights,
-                output_dict=True,
+            cm, classes = confusion_matrices(
+                y,
+                result.predictions,
+                np.zeros(y.shape[0], dtype=np.int64),
+                classes=classes,
+                sample_weight=class_weights
+                if class_weights is not None
+                else sample_weight,
             )
-            report = pd.DataFrame(report)
+            report, report_str = classification_report(cm[0], classes)
 
             gs.message(report_str)
 
@@ -819,35 +1384,92 @@ def main():
         # write cross-validation predictions to csv file
         if preds_file != "":
             preds.to_csv(preds_file, mode="w", index=False)
+            column_types = ['"Real"', '"Real"', '"integer"', '"integer"']
+
+            if "count" in preds.columns:
+                column_types.append('"integer"')
+
+            column_types += ['"Real"'] * (preds.shape[1] - len(column_types))
             text_file = open(preds_file + "t", "w")
-            text_file.write('"Real", "Real", "integer", "integer"')
+            text_file.write(", ".join(column_types))
             text_file.close()
 
+        # combine the fold models into the final model
+        if fold_ensemble is True:
+            members = [getattr(e, "best_estimator_", e) for e in result.estimators]
+            voting = "soft" if hasattr(members[0], "predict_proba") else "hard"
+            estimator = VotingEnsemble(members, voting=voting)
+    else:
+        result = None
+
+    timings["cross_validation"] = time.time() - start
+
+    # message best hyperparameter setup and optionally save using pandas
+    if any(param_grid) is True:
+        searches = result.estimators if fold_ensemble is True else [estimator]
+
+        for fold, search_cv in enumerate(searches):
+            gs.message(os.linesep)
+
+            if fold_ensemble is True:
+                gs.message("Best parameters for fold {0}:".format(fold))
+            else:
+                gs.message("Best parameters:")
+
+            optimal_pars = [
+                (
+                    k.replace("estimator__", "").replace("selection__", "")
+                    + " = "
+                    + str(v)
+                )
+                for (k, v) in search_cv.best_params_.items()
+            ]
+
+            for i in optimal_pars:
+                gs.message(i)
+
+        if param_file != "" and fold_ensemble is True:
+            param_df = pd.concat(
+                [pd.DataFrame(i.cv_results_) for i in searches],
+                keys=range(len(searches)),
+                names=["fold", None],
+            )
+            param_df.to_csv(param_file)
+
+        elif param_file != "":
+            param_df = pd.DataFrame(estimator.cv_results_)
+            param_df.to_csv(param_file)
+
     # feature importances ----------------------------------------------------------------------------------------------
+    start = time.time()
+
     if importances is True:
-        from sklearn.inspection import permutation_importance
+        from rlearnlib.importance import permutation_importance
+
+        feature_names = stack.names + derived_names(stack)
+        feature_names = [i.split("@")[0] for i in feature_names]
+
+        # score the fold models on their held-out data if cross-validation was used
+        if result is not None:
+            fimp_estimators = result.estimators
+            fimp_folds = result.folds
+        else:
+            fimp_estimators = estimator
+            fimp_folds = None
 
         fimp = permutation_importance(
-            estimator,
+            fimp_estimators,
             X,
             y,
             scoring=search_scorer,
+            folds=fimp_folds,
+            feature_groups={name: [i] for i, name in enumerate(feature_names)},
             n_repeats=5,
-            n_jobs=n_jobs,
+            max_samples=fimp_samples if fimp_samples > 0 else None,
+            n_jobs=max(effective_n_jobs(n_jobs) // cores.estimator, 1),
             random_state=random_state,
         )
 
-        feature_names = deepcopy(stack.names)
-        feature_names = [i.split("@")[0] for i in feature_names]
-
-        fimp = pd.DataFrame(
-            {
-                "feature": feature_names,
-                "importance": fimp["importances_mean"],
-                "std": fimp["importances_std"],
-            }
-        )
-
         gs.message(os.linesep)
         gs.message("Feature importances")
         gs.message("Feature" + "\t" + "Score")
@@ -860,10 +1482,34 @@ def main():
         if fimp_file != "":
             fimp.to_csv(fimp_file, index=False)
 
-    # save the fitted model
-    import joblib
+    timings["importances"] = time.time() - start
 
-    joblib.dump((estimator, y, class_labels), model_save)
+    # save the fitted model using all of the cores for prediction
+    final_estimator = getattr(estimator, "best_estimator_", estimator)
+
+    if fold_ensemble is True:
+        members = final_estimator.estimators
+    else:
+        members = [final_estimator]
+
+    for member in members:
+        set_estimator_n_jobs(member, n_jobs)
+
+        if "memory" in member.get_params():
+            member.set_params(memory=None)
+
+    metadata = model_metadata(
+        model_name,
+        mode,
+        y,
+        class_labels,
+        stack,
+        region=Region(),
+        timings=timings,
+        group_features=group_features,
+        dtype=X.dtype.name,
+    )
+    save_model(model_save, final_estimator, metadata)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The bayesian module contains a sequential model-based hyperparameter search
+and the dimensions of its search space. The search is built on the private
+BaseSearchCV class of scikit-learn, and is kept apart from the search module so
+that it is only imported when it is used."""
+
+import math
+import numbers
+
+import numpy as np
+from sklearn.model_selection._search import BaseSearchCV
+
+
+def _param_key(params):
+    """Hashable key of a dict of hyperparameters"""
+    return repr(sorted(params.items()))
+
+
+class Real(object):
+    """Continuous range of hyperparameter values
+
+    Parameters
+    ----------
+    low, high : float
+        Lower and upper bounds of the range.
+
+    log : bool (opt). Default is False
+        Whether to search the range on a logarithmic scale.
+    """
+
+    def __init__(self, low, high, log=False):
+        self.low = low
+        self.high = high
+        self.log = log
+
+    def _bounds(self):
+        if self.log is True:
+            return math.log(self.low), math.log(self.high)
+        return self.low, self.high
+
+    def from_unit(self, u):
+        """Convert a position on the unit interval into a value"""
+        low, high = self._bounds()
+        value = low + u * (high - low)
+
+        if self.log is True:
+            value = math.exp(value)
+
+        return float(min(max(value, self.low), self.high))
+
+    def to_unit(self, value):
+        """Convert a value into a position on the unit interval"""
+        low, high = self._bounds()
+
+        if self.log is True:
+            value = math.log(value)
+
+        if high == low:
+            return 0.5
+
+        return (value - low) / (high - low)
+
+    def __repr__(self):
+        return "{0}({1}, {2}, log={3})".format(
+            type(self).__name__, self.low, self.high, self.log
+        )
+
+
+class Integer(Real):
+    """Range of integer hyperparameter values"""
+
+    def from_unit(self, u):
+        value = Real.from_unit(self, u)
+        return int(min(max(round(value), self.low), self.high))
+
+
+class Categorical(object):
+    """Set of discrete hyperparameter choices
+
+    Parameters
+    ----------
+    values : list
+        Hyperparameter values to choose between.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def __repr__(self):
+        return "Categorical({0})".format(self.values)
+
+
+def search_space(param_grid, log_ratio=10):
+    """
+    Convert a parameter grid into a search space for model-based optimization
+
+    Any numeric hyperparameter that is supplied with exactly two values is
+    treated as a range between these values, and searched on a logarithmic
+    scale if both values are positive and the upper value is at least
+    `log_ratio` times the lower value. Ranges of integers are searched as
+    integers. All other hyperparameters are searched as a set of discrete
+    choices.
+
+    Parameters
+    ----------
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values.
+
+    log_ratio : float (opt). Default is 10
+        Ratio of the upper to lower value at which a logarithmic scale is used.
+
+    Returns
+    -------
+    dict
+        Dict of parameter names (keys) and Real, Integer or Categorical
+        dimensions.
+    """
+    space = {}
+
+    for key, values in param_grid.items():
+        numeric = all(
+            isinstance(v, numbers.Number) and not isinstance(v, bool) for v in values
+        )
+
+        if len(values) == 2 and numeric and values[0] != values[1]:
+            low, high = min(values), max(values)
+            log = low > 0 and high / low >= log_ratio
+
+            if all(isinstance(v, numbers.Integral) for v in values):
+                space[key] = Integer(low, high, log)
+            else:
+                space[key] = Real(float(low), float(high), log)
+
+        else:
+            space[key] = Categorical(values)
+
+    return space
+
+
+class BayesianSearchCV(BaseSearchCV):
+    """Sequential model-based hyperparameter optimization
+
+    The candidates are proposed using a tree-structured Parzen estimator
+    (TPE). After an initial batch of randomly-sampled candidates, the
+    evaluated candidates are split into the best `gamma` fraction and the
+    remainder, and a kernel density estimate of each hyperparameter is fitted
+    to each group. The next batch of candidates are chosen from samples of
+    the density of the best candidates, by maximizing the ratio between the
+    densities of the best and the remaining candidates. Each batch of
+    candidates is evaluated in parallel.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        The object to use to fit the data.
+
+    param_distributions : dict
+        Dict of parameter names (keys) and Real, Integer or Categorical
+        dimensions, or lists of discrete choices.
+
+    n_iter : int (opt). Default is 20
+        Total number of candidates to evaluate.
+
+    batch_size : int (opt)
+        Number of candidates to propose and evaluate in parallel. Defaults to
+        n_jobs.
+
+    n_initial : int (opt)
+        Number of randomly-sampled candidates evaluated before the model-based
+        proposals are used. Defaults to the larger of batch_size and n_iter / 4.
+
+    gamma : float (opt). Default is 0.25
+        Fraction of the evaluated candidates that are considered as the best.
+
+    scoring, n_jobs, refit, cv, verbose :
+        As for sklearn.model_selection.GridSearchCV.
+
+    random_state : int (opt)
+        Seed used to sample the candidates.
+    """
+
+    def __init__(
+        self,
+        estimator,
+        param_distributions,
+        n_iter=20,
+        batch_size=None,
+        n_initial=None,
+        gamma=0.25,
+        scoring=None,
+        n_jobs=None,
+        refit=True,
+        cv=None,
+        verbose=0,
+        random_state=None,
+    ):
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.batch_size = batch_size
+        self.n_initial = n_initial
+        self.gamma = gamma
+        self.random_state = random_state
+        super(BayesianSearchCV, self).__init__(
+            estimator=estimator,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=refit,
+            cv=cv,
+            verbose=verbose,
+        )
+
+    def _dimensions(self):
+        dims = []
+
+        for key, dim in self.param_distributions.items():
+            if not isinstance(dim, (Real, Categorical)):
+                dim = Categorical(dim)
+            dims.append((key, dim))
+
+        return dims
+
+    @staticmethod
+    def _to_params(dims, u):
+        """Convert a row of unit/index coordinates into a parameter dict"""
+        params = {}
+
+        for (key, dim), ui in zip(dims, u):
+            if isinstance(dim, Categorical):
+                params[key] = dim.values[int(ui)]
+            else:
+                params[key] = dim.from_unit(ui)
+
+        return params
+
+    @staticmethod
+    def _sample_random(dims, n, rng):
+        u = np.empty((n, len(dims)))
+
+        for j, (key, dim) in enumerate(dims):
+            if isinstance(dim, Categorical):
+                u[:, j] = rng.randint(len(dim.values), size=n)
+            else:
+                u[:, j] = rng.uniform(size=n)
+
+        return u
+
+    @staticmethod
+    def _bandwidth(points):
+        if points.shape[0] < 2:
+            return 0.25
+        bw = 1.06 * points.std() * points.shape[0] ** -0.2
+        return float(np.clip(bw, 0.05, 0.5))
+
+    def _log_density(self, x, points, dim):
+        """Log density of a Parzen estimator of the points evaluated at x"""
+        n = points.shape[0]
+
+        if isinstance(dim, Categorical):
+            k = len(dim.values)
+            counts = np.bincount(points.astype(int), minlength=k)
+            return np.log((counts[x.astype(int)] + 1.0) / (n + k))
+
+        # mixture of gaussian kernels and a uniform prior on the unit interval
+        bw = self._bandwidth(points)
+        z = (x[:, np.newaxis] - points[np.newaxis, :]) / bw
+        kernels = np.exp(-0.5 * z ** 2) / (bw * math.sqrt(2 * math.pi))
+        return np.log((kernels.sum(axis=1) + 1.0) / (n + 1))
+
+    def _sample_good(self, dims, good, n, rng):
+        u = np.empty((n, len(dims)))
+
+        for j, (key, dim) in enumerate(dims):
+            points = good[:, j]
+
+            if isinstance(dim, Categorical):
+                k = len(dim.values)
+                p = np.bincount(points.astype(int), minlength=k) + 1.0
+                u[:, j] = rng.choice(k, size=n, p=p / p.sum())
+            else:
+                bw = self._bandwidth(points)
+                centres = points[rng.randint(points.shape[0], size=n)]
+                samples = rng.normal(centres, bw)
+                prior = rng.uniform(size=n) < 1.0 / (points.shape[0] + 1)
+                samples[prior] = rng.uniform(size=prior.sum())
+                u[:, j] = np.clip(samples, 0.0, 1.0)
+
+        return u
+
+    def _propose(self, dims, observed, scores, n, rng, seen):
+        """Propose n new candidates from the evaluated candidates"""
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+        order = np.argsort(-scores, kind="mergesort")
+        n_good = max(int(math.ceil(self.gamma * observed.shape[0])), 1)
+        good, bad = observed[order[:n_good]], observed[order[n_good:]]
+
+        if bad.shape[0] == 0:
+            bad = observed
+
+        pool = self._sample_good(dims, good, 24 * n, rng)
+        ratio = np.zeros(pool.shape[0])
+
+        for j, (key, dim) in enumerate(dims):
+            ratio += self._log_density(pool[:, j], good[:, j], dim)
+            ratio -= self._log_density(pool[:, j], bad[:, j], dim)
+
+        candidates = []
+
+        for i in np.argsort(-ratio, kind="mergesort"):
+            params = self._to_params(dims, pool[i])
+
+            if _param_key(params) not in seen:
+                seen.add(_param_key(params))
+                candidates.append(params)
+
+            if len(candidates) == n:
+                break
+
+        return candidates
+
+    def _run_search(self, evaluate_candidates):
+        from sklearn.utils import check_random_state
+
+        from .parallel import effective_n_jobs
+
+        rng = check_random_state(self.random_state)
+        dims = self._dimensions()
+
+        batch_size = self.batch_size
+
+        if batch_size is None:
+            batch_size = effective_n_jobs(self.n_jobs)
+
+        n_initial = self.n_initial
+
+        if n_initial is None:
+            n_initial = max(batch_size, self.n_iter // 4)
+
+        n_initial = min(n_initial, self.n_iter)
+
+        seen = set()
+        observed = []
+
+        # initial random design
+        candidates = []
+
+        for u in self._sample_random(dims, 20 * n_initial, rng):
+            params = self._to_params(dims, u)
+
+            if _param_key(params) not in seen:
+                seen.add(_param_key(params))
+                candidates.append(params)
+                observed.append(self._to_unit(dims, params))
+
+            if len(candidates) == n_initial:
+                break
+
+        results = evaluate_candidates(candidates)
+        n_evaluated = len(candidates)
+
+        # model-based proposals
+        while n_evaluated < self.n_iter:
+            n = min(batch_size, self.n_iter - n_evaluated)
+            candidates = self._propose(
+                dims,
+                np.asarray(observed),
+                np.asarray(results["mean_test_score"], dtype=float),
+                n,
+                rng,
+                seen,
+            )
+
+            if len(candidates) == 0:
+                break
+
+            observed.extend(self._to_unit(dims, params) for params in candidates)
+            results = evaluate_candidates(candidates)
+            n_evaluated += len(candidates)
+
+    @staticmethod
+    def _to_unit(dims, params):
+        u = []
+
+        for key, dim in dims:
+            if isinstance(dim, Categorical):
+                u.append(dim.values.index(params[key]))
+            else:
+                u.append(dim.to_unit(params[key]))
+
+        return u
@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The ensemble module contains meta-estimators that combine the predictions
+of several previously fitted models, such as the models that were fitted on
+each fold of a cross-validation, or separately trained models that are applied
+together during raster prediction, a cascade that only applies an expensive
+model to the samples that a cheaper model is uncertain about, and a
+meta-estimator that avoids repeating the predictions of identical samples."""
+
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.base import BaseEstimator, is_classifier
+
+
+class VotingEnsemble(BaseEstimator):
+    """
+    Combine the predictions of a list of fitted estimators
+
+    Unlike sklearn.ensemble.VotingClassifier, the estimators are not refitted,
+    which allows the models that were fitted during cross-validation to be
+    reused as the final model.
+
+    Parameters
+    ----------
+    estimators : list
+        List of fitted scikit-learn estimators. All of the estimators must be
+        either classifiers or regressors.
+
+    voting : str (opt). Default is 'soft'
+        For classification, 'soft' predicts the class with the largest
+        average probability, and 'hard' predicts the majority class of the
+        individual predictions. For regression, 'median' uses the median of
+        the individual predictions and any other setting uses their mean.
+
+    features : list (opt)
+        List containing the column indices of X that are passed to each
+        estimator, or None to pass all of the columns. This allows models that
+        were trained on different subsets of the same rasters to be combined.
+
+    n_jobs : int (opt)
+        Number of estimators to evaluate in parallel using threads.
+    """
+
+    def __init__(self, estimators, voting="soft", features=None, n_jobs=None):
+        self.estimators = estimators
+        self.voting = voting
+        self.features = features
+        self.n_jobs = n_jobs
+
+    @property
+    def _estimator_type(self):
+        return "classifier" if is_classifier(self.estimators[0]) else "regressor"
+
+    def __sklearn_tags__(self):
+        return self.estimators[0].__sklearn_tags__()
+
+    @property
+    def classes_(self):
+        """Union of the classes of all of the estimators"""
+        return np.unique(np.concatenate([e.classes_ for e in self.estimators]))
+
+    def fit(self, X, y=None, **fit_params):
+        """The estimators are already fitted, so fitting is a no-op"""
+        return self
+
+    def _member_outputs(self, X, method):
+        """Call a prediction method of every estimator on its columns of X"""
+        from joblib import Parallel, delayed
+
+        features = self.features
+
+        if features is None:
+            features = [None] * len(self.estimators)
+
+        def call(estimator, cols):
+            data = X if cols is None else X[:, cols]
+            return getattr(estimator, method)(data)
+
+        if len(self.estimators) == 1 or self.n_jobs in (None, 1):
+            return [call(e, c) for e, c in zip(self.estimators, features)]
+
+        return Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(call)(e, c) for e, c in zip(self.estimators, features)
+        )
+
+    def predict_proba(self, X):
+        """
+        Average the class probabilities of the estimators
+
+        The probabilities of estimators that were fitted on a subset of the
+        classes are aligned to the union of the classes before averaging.
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            2d array of class probabilities with the dimensions of
+            (n_samples, n_classes).
+        """
+        classes = self.classes_
+        proba = np.zeros((X.shape[0], classes.shape[0]), dtype=np.float64)
+
+        outputs = self._member_outputs(X, "predict_proba")
+
+        for estimator, prob in zip(self.estimators, outputs):
+            cols = np.searchsorted(classes, estimator.classes_)
+            proba[:, cols] += prob
+
+        return proba / len(self.estimators)
+
+    def predict(self, X):
+        """
+        Predict using the combined estimators
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            1d array of predictions.
+        """
+        if not is_classifier(self.estimators[0]):
+            pred = self._member_outputs(X, "predict")
+
+            if self.voting == "median":
+                return np.median(pred, axis=0)
+
+            return np.mean(pred, axis=0)
+
+        classes = self.classes_
+
+        if self.voting == "soft":
+            return classes[np.argmax(self.predict_proba(X), axis=1)]
+
+        votes = np.zeros((X.shape[0], classes.shape[0]), dtype=np.int64)
+        rows = np.arange(X.shape[0])
+
+        for pred in self._member_outputs(X, "predict"):
+            votes[rows, np.searchsorted(classes, pred)] += 1
+
+        return classes[np.argmax(votes, axis=1)]
+
+
+class CascadeClassifier(BaseEstimator):
+    """
+    Classify using a fast model and refer the uncertain samples to a slow model
+
+    The fast classifier decides the class of the samples where its maximum
+    class probability reaches the threshold, and the remaining samples are
+    classified by the slow classifier. Neither classifier is refitted.
+
+    Parameters
+    ----------
+    fast : estimator object implementing 'predict_proba'
+        Fitted classifier that is applied to every sample.
+
+    slow : estimator object implementing 'predict'
+        Fitted classifier that is applied to the uncertain samples.
+
+    threshold : float (opt). Default is 0.9
+        Maximum class probability of the fast classifier below which a sample
+        is referred to the slow classifier.
+
+    features : list (opt)
+        List containing the column indices of X that are passed to the fast
+        and the slow classifier, or None to pass all of the columns to both.
+    """
+
+    def __init__(self, fast, slow, threshold=0.9, features=None):
+        self.fast = fast
+        self.slow = slow
+        self.threshold = threshold
+        self.features = features
+
+    @property
+    def _estimator_type(self):
+        return "classifier"
+
+    def __sklearn_tags__(self):
+        return self.fast.__sklearn_tags__()
+
+    @property
+    def classes_(self):
+        """Union of the classes of both classifiers"""
+        return np.unique(np.concatenate([self.fast.classes_, self.slow.classes_]))
+
+    def fit(self, X, y=None, **fit_params):
+        """The classifiers are already fitted, so fitting is a no-op"""
+        return self
+
+    def _columns(self, X, stage):
+        """Columns of X that are used by the fast (0) or slow (1) classifier"""
+        if self.features is None or self.features[stage] is None:
+            return X
+
+        return X[:, self.features[stage]]
+
+    def _fast_proba(self, X):
+        """Class probabilities of the fast classifier and the samples that are
+        referred to the slow classifier"""
+        proba = self.fast.predict_proba(self._columns(X, 0))
+        uncertain = proba.max(axis=1) < self.threshold
+
+        return proba, uncertain
+
+    def predict_stages(self, X):
+        """
+        Predict the classes and the classifier that decided each sample
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        pred : ndarray
+            1d array of predictions.
+
+        stage : ndarray
+            1d array containing 1 for the samples decided by the fast
+            classifier and 2 for the samples decided by the slow classifier.
+        """
+        proba, uncertain = self._fast_proba(X)
+        pred = self.fast.classes_[np.argmax(proba, axis=1)]
+
+        if uncertain.any():
+            slow = self.slow.predict(self._columns(X[uncertain], 1))
+            pred = pred.astype(np.result_type(pred.dtype, slow.dtype))
+            pred[uncertain] = slow
+
+        return pred, np.where(uncertain, 2, 1).astype(np.int32)
+
+    def predict(self, X):
+        """
+        Predict the classes using the cascade
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            1d array of predictions.
+        """
+        return self.predict_stages(X)[0]
+
+    def predict_proba(self, X):
+        """
+        Class probabilities of the classifier that decided each sample
+
+        The probabilities are aligned to the union of the classes of both
+        classifiers. The uncertain samples use the probabilities of the slow
+        classifier, or a probability of one for its predicted class if it
+        does not support probabilities.
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            2d array of class probabilities with the dimensions of
+            (n_samples, n_classes).
+        """
+        classes = self.classes_
+        proba = np.zeros((X.shape[0], classes.shape[0]), dtype=np.float64)
+
+        fast, uncertain = self._fast_proba(X)
+        proba[:, np.searchsorted(classes, self.fast.classes_)] = fast
+
+        if uncertain.any():
+            data = self._columns(X[uncertain], 1)
+            rows = np.flatnonzero(uncertain)
+            proba[rows] = 0.0
+
+            if hasattr(self.slow, "predict_proba"):
+                cols = np.searchsorted(classes, self.slow.classes_)
+                proba[np.ix_(rows, cols)] = self.slow.predict_proba(data)
+            else:
+                proba[rows, np.searchsorted(classes, self.slow.predict(data))] = 1.0
+
+        return proba
+
+
+class MemoizedEstimator(BaseEstimator):
+    """
+    Predict only the unique rows of the data using a fitted estimator
+
+    Rasters of integer or categorical values, such as soil classes or land
+    use codes, contain far fewer unique combinations of values than pixels.
+    The rows of each array that is predicted are deduplicated, the estimator
+    is applied to the unique rows, and the results are scattered back to all
+    of the rows. Optionally, the results of the unique rows are retained in a
+    least-recently-used cache, so that the values that are repeated in
+    subsequent arrays, such as the windows of a raster, are not predicted
+    again.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'predict'
+        The fitted estimator.
+
+    cache_size : int (opt). Default is 0
+        Maximum number of unique rows whose results are cached across calls,
+        or 0 to only deduplicate the rows within each call.
+    """
+
+    def __init__(self, estimator, cache_size=0):
+        self.estimator = estimator
+        self.cache_size = cache_size
+
+    @property
+    def _estimator_type(self):
+        return "classifier" if is_classifier(self.estimator) else "regressor"
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_caches", None)
+        return state
+
+    def fit(self, X, y=None, **fit_params):
+        """The estimator is already fitted, so fitting is a no-op"""
+        return self
+
+    def _cached(self, method):
+        """The cache of the results of a prediction method"""
+        if not hasattr(self, "_caches"):
+            self._caches = {}
+
+        return self._caches.setdefault(method, OrderedDict())
+
+    def _unique_outputs(self, X, method):
+        """Call a prediction method on the unique rows of X"""
+        X = np.ascontiguousarray(X)
+        keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        keys, index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+        if self.cache_size <= 0:
+            result = getattr(self.estimator, method)(X[index])
+            return result[inverse]
+
+        cache = self._cached(method)
+        keys = [k.tobytes() for k in keys]
+        missing = [i for i, k in enumerate(keys) if k not in cache]
+
+        if missing:
+            predicted = getattr(self.estimator, method)(X[index[missing]])
+
+            for i, value in zip(missing, predicted):
+                cache[keys[i]] = value
+
+        result = []
+
+        for k in keys:
+            cache.move_to_end(k)
+            result.append(cache[k])
+
+        # remove the least recently used results
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        return np.asarray(result)[inverse]
+
+    def predict(self, X):
+        """
+        Predict the unique rows of the data
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            Predictions of the estimator for all of the rows.
+        """
+        return self._unique_outputs(X, "predict")
+
+    def predict_proba(self, X):
+        """
+        Predict the class probabilities of the unique rows of the data
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of data with the dimensions of (n_samples, n_features).
+
+        Returns
+        -------
+        ndarray
+            2d array of class probabilities with the dimensions of
+            (n_samples, n_classes).
+        """
+        return self._unique_outputs(X, "predict_proba")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The focal module contains neighbourhood features that are derived from the
+rasters of a RasterStack while the rasters are read, so that texture and
+gradient features do not need to be computed and stored as separate rasters.
+Each window of rows is read with a halo of extra rows so that the values along
+the edges of the window are identical to those of a full raster."""
+
+import numpy as np
+from grass.pygrass.gis.region import Region
+from grass.pygrass.raster import RasterRow
+
+
+STATISTICS = ("mean", "std", "min", "max", "range", "gradient")
+
+
+def read_rows(name, start, stop, region):
+    """
+    Read a range of rows of a raster, which may extend beyond the region
+
+    Parameters
+    ----------
+    name : str
+        Name of the GRASS GIS raster.
+
+    start, stop : int
+        First and last (exclusive) row to read. Rows outside of the region are
+        filled with nan.
+
+    region : grass.pygrass.gis.region.Region
+        Computational region.
+
+    Returns
+    -------
+    ndarray
+        2d array with the dimensions of (stop - start, cols).
+    """
+    data = np.full((stop - start, region.cols), np.nan)
+
+    with RasterRow(name) as src:
+        for row in range(max(start, 0), min(stop, region.rows)):
+            data[row - start, :] = src[row]
+
+        if src.mtype == "CELL":
+            data[data == -2147483648] = np.nan
+
+    return data
+
+
+def _window_sums(arr, size):
+    """Sum of each size x size window of a 2d array using a summed area table"""
+    table = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1))
+    table[1:, 1:] = arr.cumsum(axis=0).cumsum(axis=1)
+
+    return (
+        table[size:, size:]
+        - table[:-size, size:]
+        - table[size:, :-size]
+        + table[:-size, :-size]
+    )
+
+
+def _window_extreme(arr, size, func, fill):
+    """Minimum or maximum of each size x size window, ignoring nan"""
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    filled = np.where(np.isnan(arr), fill, arr)
+    result = func(sliding_window_view(filled, size, axis=0), axis=-1)
+    result = func(sliding_window_view(result, size, axis=1), axis=-1)
+
+    return np.where(result == fill, np.nan, result)
+
+
+class FocalFeature(object):
+    def __init__(self, index, statistic="mean", size=3, name=None):
+        """A neighbourhood statistic of a raster within a RasterStack
+
+        Parameters
+        ----------
+        index : int
+            Index of the source raster within the RasterStack. Using the index
+            rather than the name of the raster allows the same feature to be
+            computed for other imagery groups with the same structure.
+
+        statistic : str (opt). Default is 'mean'
+            One of 'mean', 'std', 'min', 'max', 'range' or 'gradient'. The
+            gradient is the magnitude of the change in value per map unit,
+            measured between the cells on opposite sides of the window.
+
+        size : int (opt). Default is 3
+            Width of the square window in cells, which must be an odd number.
+
+        name : str (opt)
+            Name of the feature.
+        """
+        if statistic not in STATISTICS:
+            raise ValueError(
+                "statistic must be one of {0}".format(", ".join(STATISTICS))
+            )
+
+        if size < 3 or size % 2 == 0:
+            raise ValueError("size must be an odd number of 3 or more")
+
+        self.index = int(index)
+        self.statistic = statistic
+        self.size = int(size)
+        self.name = name if name else "{0}_{1}{2}".format(index, statistic, size)
+
+    def __repr__(self):
+        return "FocalFeature({0}, {1}, {2})".format(
+            self.index, self.statistic, self.size
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, FocalFeature) and vars(self) == vars(other)
+
+    @classmethod
+    def parse(cls, spec, names):
+        """
+        Create a FocalFeature from a 'raster:statistic:size' string
+
+        Parameters
+        ----------
+        spec : str
+            Name of a raster within the stack, the statistic and the window
+            size separated by colons.
+
+        names : list
+            Names of the rasters in the stack, with or without their mapset.
+
+        Returns
+        -------
+        FocalFeature
+        """
+        fields = spec.split(":")
+
+        if len(fields) != 3:
+            raise ValueError(
+                "Focal features are specified as raster:statistic:size, not "
+                "{0}".format(spec)
+            )
+
+        raster, statistic, size = fields
+        short_names = [i.split("@")[0] for i in names]
+
+        if raster in names:
+            index = names.index(raster)
+        elif raster.split("@")[0] in short_names:
+            index = short_names.index(raster.split("@")[0])
+        else:
+            raise ValueError("Raster {0} is not in the imagery group".format(raster))
+
+        name = "{0}_{1}{2}".format(
+            short_names[index].replace(".", "_"), statistic, size
+        )
+
+        return cls(index, statistic, int(size), name)
+
+    @property
+    def halo(self):
+        """Number of rows or columns that are needed on each side of a cell"""
+        return self.size // 2
+
+    def compute(self, arr, ewres=1.0, nsres=1.0):
+        """
+        Compute the statistic for an array that includes the halo rows
+
+        Parameters
+        ----------
+        arr : ndarray
+            2d array of raster values with `halo` extra rows above and below
+            the rows of the result, and nan representing nodata.
+
+        ewres, nsres : float (opt)
+            Resolution of the cells, which is used by the gradient.
+
+        Returns
+        -------
+        ndarray
+            2d array with the dimensions of (arr.shape[0] - 2 * halo,
+            arr.shape[1]).
+        """
+        h, size = self.halo, self.size
+        arr = np.pad(arr, ((0, 0), (h, h)), constant_values=np.nan)
+
+        if self.statistic == "gradient":
+            dx = (arr[h:-h, 2 * h:] - arr[h:-h, : -2 * h]) / (2 * h * ewres)
+            dy = (arr[: -2 * h, h:-h] - arr[2 * h:, h:-h]) / (2 * h * nsres)
+            return np.sqrt(dx ** 2 + dy ** 2)
+
+        if self.statistic in ("min", "max", "range"):
+            low = _window_extreme(arr, size, np.min, np.inf)
+            high = _window_extreme(arr, size, np.max, -np.inf)
+            return {"min": low, "max": high, "range": high - low}[self.statistic]
+
+        # mean and standard deviation from the sums of each window, which are
+        # centred to reduce the loss of precision
+        valid = ~np.isnan(arr)
+        shift = np.nanmean(arr) if valid.any() else 0.0
+        values = np.where(valid, arr - shift, 0.0)
+
+        count = _window_sums(valid.astype(np.float64), size)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = _window_sums(values, size) / count
+
+            if self.statistic == "mean":
+                return mean + shift
+
+            var = _window_sums(values ** 2, size) / count - mean ** 2
+
+        return np.sqrt(np.clip(var, 0, None))
+
+    def read(self, name, rows, region=None):
+        """
+        Compute the statistic for a window of rows of the region
+
+        Parameters
+        ----------
+        name : str
+            Name of the source raster.
+
+        rows : tuple
+            Start and end row of the window.
+
+        region : grass.pygrass.gis.region.Region (opt)
+            Computational region. Defaults to the current region.
+
+        Returns
+        -------
+        ndarray
+            2d array of the statistic for the rows of the window.
+        """
+        if region is None:
+            region = Region()
+
+        start, stop = rows
+        arr = read_rows(name, start - self.halo, stop + self.halo, region)
+
+        return self.compute(arr, region.ewres, region.nsres)
+
+
+def sample_focal(features, names, x, y, region=None, height=256):
+    """
+    Values of focal features at a set of coordinates
+
+    Only the windows of rows that contain samples are read.
+
+    Parameters
+    ----------
+    features : list
+        List of FocalFeature objects.
+
+    names : list
+        Names of the rasters of the stack that the features refer to.
+
+    x, y : ndarray
+        1d arrays of the coordinates of the samples.
+
+    region : grass.pygrass.gis.region.Region (opt)
+        Computational region. Defaults to the current region.
+
+    height : int (opt). Default is 256
+        Number of rows in each window.
+
+    Returns
+    -------
+    ndarray
+        2d array with the dimensions of (n_samples, n_features) with nan for
+        samples outside of the region.
+    """
+    if region is None:
+        region = Region()
+
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    rows = np.floor((region.north - y) / region.nsres).astype(np.int64)
+    cols = np.floor((x - region.west) / region.ewres).astype(np.int64)
+    inside = (rows >= 0) & (rows < region.rows) & (cols >= 0) & (cols < region.cols)
+
+    values = np.full((x.shape[0], len(features)), np.nan)
+
+    for start in range(0, region.rows, height):
+        stop = min(start + height, region.rows)
+        idx = np.flatnonzero(inside & (rows >= start) & (rows < stop))
+
+        if idx.shape[0] == 0:
+            continue
+
+        for j, feature in enumerate(features):
+            block = feature.read(names[feature.index], (start, stop), region)
+            values[idx, j] = block[rows[idx] - start, cols[idx]]
+
+    return values
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The importance module contains a permutation feature importance method that
+can be computed on a subsample of the training data, on the held-out data of
+cross-validation folds, and that permutes groups of columns together."""
+
+import numbers
+
+import numpy as np
+
+
+def _subsample(n_samples, max_samples, rng):
+    """Return the sorted indices of a random subsample of rows"""
+    if max_samples is None:
+        return np.arange(n_samples)
+
+    if isinstance(max_samples, numbers.Integral):
+        size = max_samples
+    else:
+        size = int(round(max_samples * n_samples))
+
+    if size <= 0 or size >= n_samples:
+        return np.arange(n_samples)
+
+    return np.sort(rng.choice(n_samples, size=size, replace=False))
+
+
+def _permutation_scores(estimators, X, y, partitions, groups, scorer, n_repeats, seeds):
+    """Score each estimator on its partition of the data after permuting each
+    of a chunk of groups of columns
+
+    The partition of each estimator is copied once for the whole chunk, and
+    the columns of each group are permuted in place and restored afterwards.
+
+    Returns an array with the dimensions of (n_groups, n_estimators,
+    n_repeats).
+    """
+    rngs = [np.random.RandomState(seed) for seed in seeds]
+    scores = np.zeros((len(groups), len(estimators), n_repeats))
+
+    for i, (estimator, idx) in enumerate(zip(estimators, partitions)):
+        X_part = np.array(X[idx])
+        y_part = y[idx]
+
+        for j, (cols, rng) in enumerate(zip(groups, rngs)):
+            original = X_part[:, cols].copy()
+
+            for repeat in range(n_repeats):
+                X_part[:, cols] = original[rng.permutation(idx.shape[0])]
+                scores[j, i, repeat] = scorer(estimator, X_part, y_part)
+
+            X_part[:, cols] = original
+
+    return scores
+
+
+def permutation_importance(
+    estimators,
+    X,
+    y,
+    scoring,
+    folds=None,
+    feature_groups=None,
+    n_repeats=5,
+    max_samples=None,
+    n_jobs=None,
+    random_state=None,
+):
+    """
+    Permutation feature importance
+
+    The importance of a feature is the decrease in the score of a fitted
+    estimator when the values of the feature are randomly shuffled. When the
+    estimators of a cross-validation are supplied together with the fold index
+    of each sample, each estimator is scored on the held-out data of its own
+    fold, and the decreases are averaged across the folds.
+
+    Parameters
+    ----------
+    estimators : estimator object, or list of estimators
+        A fitted estimator, or the estimators that were fitted on each fold.
+
+    X : ndarray
+        2d array of data with the dimensions of (n_samples, n_features). A
+        memory-mapped array is shared with the worker processes without
+        copying.
+
+    y : ndarray
+        1d array of the response variable.
+
+    scoring : callable
+        Scorer with the signature scorer(estimator, X, y).
+
+    folds : ndarray (opt)
+        1d array of the fold index of each sample, which is used to select
+        the held-out data of each estimator.
+
+    feature_groups : dict (opt)
+        Dict of feature names (keys) and the lists of column indices that are
+        permuted together. Defaults to one group per column.
+
+    n_repeats : int (opt). Default is 5
+        Number of times to permute each feature.
+
+    max_samples : int or float (opt)
+        Number of rows, or proportion of rows, that are randomly drawn from X
+        to compute the importances. Defaults to all rows.
+
+    n_jobs : int (opt)
+        Number of workers that the features are divided between. Each worker
+        copies the data of each estimator once and permutes its features in
+        place.
+
+    random_state : int (opt)
+        Seed for the subsampling and permutations.
+
+    Returns
+    -------
+    importances : pandas.DataFrame
+        DataFrame with the 'feature', 'importance' and 'std' columns.
+    """
+    import pandas as pd
+    from joblib import Parallel, delayed
+
+    from .parallel import effective_n_jobs
+
+    if not isinstance(estimators, (list, tuple)):
+        estimators = [estimators]
+
+    if folds is None:
+        folds = np.zeros(X.shape[0], dtype=np.int64)
+
+    if feature_groups is None:
+        feature_groups = {str(i): [i] for i in range(X.shape[1])}
+
+    rng = np.random.RandomState(random_state)
+    rows = _subsample(X.shape[0], max_samples, rng)
+    partitions = [rows[folds[rows] == i] for i in range(len(estimators))]
+
+    baseline = np.asarray(
+        [
+            scoring(estimator, X[idx], y[idx])
+            for estimator, idx in zip(estimators, partitions)
+        ]
+    )
+
+    seeds = rng.randint(np.iinfo(np.int32).max, size=len(feature_groups))
+    groups = list(feature_groups.values())
+
+    # divide the features into one chunk per worker
+    n_chunks = max(min(effective_n_jobs(n_jobs), len(groups)), 1)
+    chunks = np.array_split(np.arange(len(groups)), n_chunks)
+
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_permutation_scores)(
+            estimators,
+            X,
+            y,
+            partitions,
+            [groups[j] for j in chunk],
+            scoring,
+            n_repeats,
+            seeds[chunk],
+        )
+        for chunk in chunks
+    )
+    scores = np.concatenate(scores, axis=0)
+
+    # decrease in score averaged across the folds for each repeat
+    weights = np.asarray([idx.shape[0] for idx in partitions], dtype=np.float64)
+    decrease = np.asarray(
+        [
+            np.average(baseline[:, np.newaxis] - s, axis=0, weights=weights)
+            for s in scores
+        ]
+    )
+
+    return pd.DataFrame(
+        {
+            "feature": list(feature_groups.keys()),
+            "importance": decrease.mean(axis=1),
+            "std": decrease.std(axis=1),
+        }
+    )
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The parallel module contains helpers to divide a budget of processing cores
+between the nested levels of parallelism used during model training, and to
+share training data with worker processes using memory-mapping."""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+
+CoreAllocation = namedtuple("CoreAllocation", ["outer", "search", "estimator"])
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Convert a scikit-learn style n_jobs setting into a number of cores
+
+    Parameters
+    ----------
+    n_jobs : int
+        Number of processing cores. Negative values are counted back from the
+        number of available cores, e.g. -1 uses all cores and -2 uses all cores
+        except one.
+
+    Returns
+    -------
+    int
+        Number of processing cores, at least 1.
+    """
+    n_cores = os.cpu_count() or 1
+
+    if n_jobs is None or n_jobs == 0:
+        return 1
+
+    if n_jobs < 0:
+        return max(n_cores + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def allocate_cores(n_jobs, n_outer=1, n_search=1, estimator_threads=True):
+    """
+    Split a single budget of processing cores between outer cross-validation
+    folds, hyperparameter search fits and estimator threads
+
+    The cores are assigned to the outermost level first because it is the
+    most coarse-grained, and any remaining cores are divided between the
+    inner levels, so that the total number of workers never exceeds the
+    budget.
+
+    Parameters
+    ----------
+    n_jobs : int
+        Number of processing cores, using scikit-learn conventions.
+
+    n_outer : int (opt). Default is 1
+        Number of outer cross-validation folds.
+
+    n_search : int (opt). Default is 1
+        Number of fits performed by the hyperparameter search for each outer
+        fold, i.e. the number of candidates multiplied by the number of inner
+        folds.
+
+    estimator_threads : bool (opt). Default is True
+        Whether the estimator supports multithreading using its own n_jobs
+        parameter.
+
+    Returns
+    -------
+    CoreAllocation
+        Named tuple of the number of cores for the `outer`, `search` and
+        `estimator` levels.
+    """
+    budget = effective_n_jobs(n_jobs)
+
+    outer = max(min(n_outer, budget), 1)
+    remaining = budget // outer
+
+    search = max(min(n_search, remaining), 1)
+    remaining = remaining // search
+
+    estimator = max(remaining, 1) if estimator_threads is True else 1
+
+    return CoreAllocation(outer, search, estimator)
+
+
+def set_estimator_n_jobs(estimator, n_jobs):
+    """
+    Set the number of threads used by an estimator, or by the steps of a
+    Pipeline that contain an n_jobs parameter
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator or Pipeline.
+
+    n_jobs : int
+        Number of threads to use.
+
+    Returns
+    -------
+    bool
+        Whether the estimator has any n_jobs parameters.
+    """
+    keys = [
+        k for k in estimator.get_params()
+        if k == "n_jobs" or k.endswith("__n_jobs")
+    ]
+
+    if keys:
+        estimator.set_params(**{k: n_jobs for k in keys})
+
+    return len(keys) > 0
+
+
+def share_array(arr, folder, name="X"):
+    """
+    Dump an array to disk and reload it as a read-only memory-map
+
+    Memory-mapped arrays are passed to joblib worker processes by reference
+    instead of being pickled, so that all of the workers share a single copy
+    of the data through the page cache.
+
+    Parameters
+    ----------
+    arr : ndarray
+        Numpy array to share.
+
+    folder : str
+        Path to a directory to store the array.
+
+    name : str (opt). Default is 'X'
+        Name to use for the file containing the array.
+
+    Returns
+    -------
+    numpy.memmap
+    """
+    import joblib
+
+    filename = os.path.join(folder, name + ".mmap")
+    joblib.dump(np.ascontiguousarray(arr), filename)
+
+    return joblib.load(filename, mmap_mode="r")
@@ -2,15 +2,9 @@ import math
 import tempfile
 from subprocess import PIPE
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
 import numpy as np
-import pandas as pd
 from grass.pygrass.modules.shortcuts import raster as gr
 from grass.script.utils import parse_key_val
-from matplotlib.colors import BoundaryNorm, ListedColormap
-from mpl_toolkits.axes_grid1 import make_axes_locatable
 
 
 def normalize(X):
@@ -36,6 +30,9 @@ def convert_grass_color(raster):
     norm : matplotlib.colors.Normalize
         The raster value breaks used in mapping the cmap to the colours.
     """
+    import pandas as pd
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+
     # export color rules
     rules_file = tempfile.NamedTemporaryFile().name
     gr.colors_out(map=raster, rules=rules_file)
@@ -141,6 +138,11 @@ class PlottingMixin(object):
             matplotlib.axes._subplots.AxesSubplot if Raster object contains only a
             single layer.
         """
+        import matplotlib as mpl
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as mticker
+        from mpl_toolkits.axes_grid1 import make_axes_locatable
+
         # some checks
         if reg is None:
             raise AttributeError("argument `reg` requires a region object.")
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The progressive module predicts a RasterStack at a decimated resolution to
+provide a rapid preview of the result, and then refines the prediction at the
+full resolution of the region. During the refinement, the pixels within
+homogeneous areas of the preview can be filled from the preview instead of
+being predicted again."""
+
+import math
+
+import grass.script as gs
+import numpy as np
+from grass.pygrass.gis.region import Region
+from grass.pygrass.raster import RasterRow
+from grass.pygrass.raster.buffer import Buffer
+
+from .focal import _window_extreme
+
+
+def coarse_region(region, factor):
+    """
+    Region with the same extent as another region and a resolution that is
+    coarser by a factor
+
+    Parameters
+    ----------
+    region : grass.pygrass.gis.region.Region
+        Computational region.
+
+    factor : int
+        Decimation factor. The number of rows and columns is divided by the
+        factor and rounded up, and the resolution is adjusted to the extent.
+
+    Returns
+    -------
+    grass.pygrass.gis.region.Region
+    """
+    coarse = Region()
+    coarse.north, coarse.south = region.north, region.south
+    coarse.east, coarse.west = region.east, region.west
+    coarse.rows = max(int(math.ceil(region.rows / factor)), 1)
+    coarse.cols = max(int(math.ceil(region.cols / factor)), 1)
+    coarse.adjust(rows=True, cols=True)
+
+    return coarse
+
+
+def _set_region(region):
+    """Set the current region and the window that rasters are read and written
+    with"""
+    region.set_current()
+    region.set_raster_region()
+
+
+def predict_preview(
+    stack, estimator, output, factor, height=None, overwrite=False, output_format=None
+):
+    """
+    Predict a RasterStack at a decimated resolution
+
+    The rasters are read using a region with a resolution that is coarser by
+    the factor, so that only every k-th row and column is predicted. The
+    region is restored afterwards. Focal features are computed at the coarse
+    resolution, so the preview is only an approximation for stacks that
+    contain them.
+
+    Parameters
+    ----------
+    stack : RasterStack
+        The stack to predict.
+
+    estimator : estimator object implementing 'fit'
+        The fitted estimator.
+
+    output : str
+        Name of the preview raster, which is stored at the coarse resolution.
+
+    factor : int
+        Decimation factor of the rows and columns.
+
+    height : int (opt)
+        Number of coarse raster rows to pass to estimator at one time.
+
+    overwrite : bool (opt). Default is False
+        Option to overwrite an existing raster.
+
+    output_format : tuple (opt)
+        The result of RasterStack.probe_output for the estimator.
+
+    Returns
+    -------
+    coarse : ndarray
+        2d array of the preview with nan representing nodata.
+
+    region : grass.pygrass.gis.region.Region
+        Region of the preview.
+    """
+    region = Region()
+    coarse = coarse_region(region, factor)
+
+    if output_format is None:
+        output_format = stack.probe_output(estimator)
+
+    _set_region(coarse)
+
+    try:
+        stack.predict(
+            estimator,
+            output,
+            height=height,
+            overwrite=overwrite,
+            output_format=output_format,
+        )
+
+        with RasterRow(output) as src:
+            preview = np.asarray(src).astype(np.float64)
+
+            if src.mtype == "CELL":
+                preview[preview == -2147483648] = np.nan
+    finally:
+        _set_region(region)
+
+    return preview, coarse
+
+
+def homogeneous_cells(preview, tolerance):
+    """
+    Cells of a preview whose value differs from the values of their eight
+    neighbours by no more than a tolerance
+
+    Parameters
+    ----------
+    preview : ndarray
+        2d array of the preview with nan representing nodata.
+
+    tolerance : float
+        Maximum range of the values within each 3 x 3 neighbourhood. A
+        tolerance of 0 requires the same class in the whole neighbourhood.
+
+    Returns
+    -------
+    ndarray
+        2d boolean array. Nodata cells are never homogeneous.
+    """
+    padded = np.pad(preview, 1, mode="edge")
+    low = _window_extreme(padded, 3, np.min, np.inf)
+    high = _window_extreme(padded, 3, np.max, -np.inf)
+
+    with np.errstate(invalid="ignore"):
+        return np.isfinite(preview) & (high - low <= tolerance)
+
+
+def preview_index(n, n_preview):
+    """
+    Index of the preview cell that contains the centre of each of the rows or
+    columns of a region
+
+    Parameters
+    ----------
+    n : int
+        Number of rows or columns of the region.
+
+    n_preview : int
+        Number of rows or columns of the preview, which has the same extent.
+
+    Returns
+    -------
+    ndarray
+        1d array of the preview row or column of each of the n rows or columns.
+    """
+    index = (np.arange(n) + 0.5) * n_preview / n
+
+    return np.minimum(index.astype(np.int64), n_preview - 1)
+
+
+def predict_refined(
+    stack,
+    estimator,
+    output,
+    preview,
+    preview_region,
+    tolerance,
+    height=None,
+    overwrite=False,
+    output_format=None,
+):
+    """
+    Predict a RasterStack at full resolution, filling the pixels within
+    homogeneous areas of a preview from the preview
+
+    The rasters are still read for every window of rows so that the nodata
+    pixels of the result are the same as those of a full prediction, but the
+    estimator is only applied to the pixels within heterogeneous areas.
+
+    Parameters
+    ----------
+    stack : RasterStack
+        The stack to predict.
+
+    estimator : estimator object implementing 'fit'
+        The fitted estimator.
+
+    output : str
+        Name of the output raster.
+
+    preview : ndarray
+        2d array of the preview with nan representing nodata, such as returned
+        by predict_preview.
+
+    preview_region : grass.pygrass.gis.region.Region
+        Region of the preview.
+
+    tolerance : float
+        Maximum range of the preview values within the neighbourhood of a
+        preview cell for its pixels to be filled from the preview.
+
+    height : int (opt)
+        Number of raster rows to pass to estimator at one time. If not
+        specified then the entire region is read at once.
+
+    overwrite : bool (opt). Default is False
+        Option to overwrite an existing raster.
+
+    output_format : tuple (opt)
+        The result of RasterStack.probe_output for the estimator.
+
+    Returns
+    -------
+    float
+        Proportion of the valid pixels that were predicted by the estimator.
+    """
+    reg = Region()
+
+    if height is None:
+        height = reg.rows
+
+    if output_format is None:
+        output_format = stack.probe_output(estimator)
+
+    mtype, nodata, n_outputs = output_format
+
+    if n_outputs > 1:
+        gs.fatal("Progressive prediction does not support multi-output estimators")
+
+    homogeneous = homogeneous_cells(preview, tolerance)
+
+    # preview cell of each row and column of the region
+    preview_rows = preview_index(reg.rows, preview_region.rows)
+    preview_cols = preview_index(reg.cols, preview_region.cols)
+
+    n_valid, n_predicted = 0, 0
+    windows = list(stack.row_windows(height=height))
+
+    with RasterRow(output, mode="w", mtype=mtype, overwrite=overwrite) as dst:
+        for wi, rows in enumerate(windows):
+            gs.percent(wi, len(windows), 1)
+
+            img = stack.read(rows=rows)
+            n_features, n_rows, n_cols = img.shape
+
+            flat_pixels = img.transpose(1, 2, 0).reshape((n_rows * n_cols, n_features))
+            valid = ~np.ma.getmaskarray(flat_pixels).any(axis=1)
+            flat_pixels = np.ma.filled(flat_pixels, -99999)
+
+            cells = np.ix_(preview_rows[rows[0] : rows[1]], preview_cols)
+            filled = homogeneous[cells].ravel() & valid
+            predict = valid & ~filled
+
+            result = np.full(n_rows * n_cols, nodata, dtype=np.float64)
+            result[filled] = preview[cells].ravel()[filled]
+
+            if predict.any():
+                result[predict] = estimator.predict(flat_pixels[predict])
+
+            n_valid += valid.sum()
+            n_predicted += predict.sum()
+
+            result = result.reshape((n_rows, n_cols))
+
+            for i in range(n_rows):
+                newrow = Buffer((reg.cols,), mtype=mtype)
+                newrow[:] = result[i, :]
+                dst.put_row(newrow)
+
+    return n_predicted / n_valid if n_valid > 0 else 0.0
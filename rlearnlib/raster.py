@@ -5,7 +5,6 @@ from subprocess import PIPE
 
 import grass.script as gs
 import numpy as np
-import pandas as pd
 from grass.pygrass.gis.region import Region
 from grass.pygrass.modules.shortcuts import imagery as im
 from grass.pygrass.modules.shortcuts import raster as r
@@ -17,12 +16,11 @@ from grass.pygrass.utils import get_mapset_raster
 from grass.pygrass.vector import VectorTopo
 from .indexing import _LocIndexer, _ILocIndexer
 from .stats import StatisticsMixin
-from .transformers import CategoryEncoder
 from .plotting import PlottingMixin
 
 
 class RasterStack(StatisticsMixin, PlottingMixin):
-    def __init__(self, rasters=None, group=None):
+    def __init__(self, rasters=None, group=None, resampling="nearest"):
         """A RasterStack enables a collection of raster layers to be bundled
         into a single RasterStack object
         
@@ -37,6 +35,14 @@ class RasterStack(StatisticsMixin, PlottingMixin):
             Create a RasterStack from rasters contained in a GRASS GIS imagery
             group. This parameter is mutually exclusive with the `rasters`
             parameter.
+
+        resampling : str (opt). Default is 'nearest'
+            Method used to resample rasters that are coarser than the
+            computational region. 'nearest' uses the nearest neighbour
+            resampling of the GRASS GIS library, and 'bilinear' reads the
+            coarse rasters at their native resolution and interpolates them in
+            memory. Categorical and integer rasters always use nearest
+            neighbour resampling.
         
         Attributes
         ----------
@@ -51,6 +57,21 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         
         count : int
             Number of RasterRow objects within the RasterStack.
+
+        focal : list
+            List of rlearnlib.focal.FocalFeature objects that are computed from
+            the rasters in the stack and appended to the rasters when the
+            entire stack is read, or when training data is extracted.
+
+        virtual : list
+            List of rlearnlib.virtual.VirtualLayer objects that are evaluated
+            from the rasters in the stack and appended after any focal features
+            in the same way.
+
+        distance : list
+            List of (name, (x, y)) tuples of the points that euclidean distance
+            fields are calculated to, which are appended after any virtual
+            layers in the same way.
         """
 
         self.loc = _LocIndexer(self)
@@ -61,6 +82,12 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         self.count = 0
         self._categorical_idx = []
         self._cell_nodata = -2147483648
+        self.resampling = resampling
+        self._readers = {}
+        self._readers_key = None
+        self.focal = []
+        self.virtual = []
+        self.distance = []
 
         # some checks
         if rasters and group:
@@ -85,6 +112,45 @@ class RasterStack(StatisticsMixin, PlottingMixin):
 
         self.layers = rasters  # call property
 
+    @classmethod
+    def from_strds(
+        cls, strds, timestep=0, static=None, where=None, resampling="nearest"
+    ):
+        """Create a RasterStack from the maps of one timestep of GRASS GIS
+        space-time raster datasets
+
+        Parameters
+        ----------
+        strds : str, list
+            Name or list of names of space-time raster datasets that contain
+            the same number of maps.
+
+        timestep : int (opt). Default is 0
+            Index of the timestep within the datasets in temporal order.
+
+        static : str, list (opt)
+            Name or list of names of rasters that are appended to the maps of
+            the timestep.
+
+        where : str (opt)
+            SQL WHERE conditions used to select the maps of the datasets.
+
+        resampling : str (opt). Default is 'nearest'
+            Method used to resample rasters that are coarser than the
+            computational region.
+
+        Returns
+        -------
+        RasterStack
+        """
+        from .temporal import TemporalRasterStack
+
+        stack = TemporalRasterStack(
+            strds, static=static, where=where, resampling=resampling
+        )
+
+        return stack.timestep(timestep)
+
     def __getitem__(self, label):
         """Subset the RasterStack object using a label or list of labels
         
@@ -172,6 +238,7 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         self.iloc = _ILocIndexer(self, self.loc)
         self.count = len(mapnames)
         self.mtypes = {}
+        self._readers = {}
 
         # split raster name from mapset name
         raster_names = [i.split("@")[0] for i in mapnames]
@@ -301,7 +368,47 @@ class RasterStack(StatisticsMixin, PlottingMixin):
 
             return new_raster
     
-    def read(self, index=None, row=None, rows=None):
+    def _resampled_readers(self, index, region):
+        """ResampledReader objects of the layers that are coarser than the
+        region, which are reused between windows to cache the native rows"""
+        if self.resampling == "nearest":
+            return {}
+
+        from .resample import ResampledReader, _region_key
+
+        key = _region_key(region)
+
+        if key != self._readers_key:
+            self._readers = {}
+            self._readers_key = key
+
+        readers = {}
+
+        for idx in index:
+            idx = int(idx)
+
+            if idx in self._categorical_idx:
+                continue
+
+            if idx not in self._readers:
+                name = self.iloc[idx].fullname()
+
+                # integer rasters are treated as categories
+                if self.mtypes[name] != "CELL" and ResampledReader.is_coarser(
+                    name, region
+                ):
+                    self._readers[idx] = ResampledReader(
+                        name, self.resampling, region
+                    )
+                else:
+                    self._readers[idx] = None
+
+            if self._readers[idx] is not None:
+                readers[idx] = self._readers[idx]
+
+        return readers
+
+    def read(self, index=None, row=None, rows=None, dtype=np.float32):
         """Read data from RasterStack as a masked 3D numpy array
         
         Notes
@@ -316,6 +423,10 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         If no additional arguments are supplied, then all of the maps within the RasterStack are
         read into a 3d numpy array (obeying the GRASS region settings)
 
+        If the RasterStack contains focal features, virtual layers or distance fields
+        and the index parameter is not used, then these are computed for the rows that
+        are read and appended to the rasters
+
         Parameters
         ----------
         index : int (opt)
@@ -330,6 +441,12 @@ class RasterStack(StatisticsMixin, PlottingMixin):
             Tuple of integers representing the start and end numbers of rows to
             read as a single block of rows.
 
+        dtype : numpy.dtype (opt). Default is np.float32
+            Data type of the array. Single precision matches the precision of
+            the training data and the internal representation of the
+            scikit-learn tree-based estimators, so that the windows are passed
+            to the estimators without being copied.
+
         Returns
         -------
         
@@ -341,10 +458,17 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         reg.set_raster_region()
 
         # create numpy array to receive data
+        index_all = index is None
+
         if index is None:
             index = np.arange(0, self.count)
         if isinstance(index, int):
             index = range(index, index+1)
+
+        # coarse rasters are read using their own input window, which is reset
+        # to the region afterwards
+        readers = self._resampled_readers(index, reg)
+
         if rows:
             row_start, row_stop = rows
             width = reg.cols
@@ -360,10 +484,15 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         else:
             shape = (len(index), reg.rows, reg.cols)
 
-        data = np.zeros(shape)
+        data = np.zeros(shape, dtype=dtype)
 
         # read from each RasterRow object
         for n, idx in enumerate(index):
+            if int(idx) in readers:
+                window = (row_start, row_stop) if row or rows else (0, reg.rows)
+                data[n, :, :] = readers[int(idx)].read(window)
+                continue
+
             with RasterRow(self.iloc[int(idx)].fullname()) as src:
                 if row or rows:
                     for i, row in enumerate(rowincrs):
@@ -379,6 +508,37 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         #         else:
         #             data[band, :, :] = np.asarray(f)
 
+        # append the focal features, which are computed using a halo of rows
+        if self.focal and index_all:
+            if not (row or rows):
+                row_start, row_stop = 0, reg.rows
+
+            names = self.names
+            focal = [
+                f.read(names[f.index], (row_start, row_stop), reg) for f in self.focal
+            ]
+            data = np.concatenate((data, np.asarray(focal, dtype=dtype)), axis=0)
+
+        # append the virtual layers, which are evaluated from the rasters
+        if self.virtual and index_all:
+            rasters = data[: self.count].astype(np.float64)
+            rasters = np.where(rasters == self._cell_nodata, np.nan, rasters)
+            virtual = [v.evaluate(rasters) for v in self.virtual]
+            data = np.concatenate((data, np.asarray(virtual, dtype=dtype)), axis=0)
+
+        # append the distance fields, which are calculated from the region
+        if self.distance and index_all:
+            from .utils import distance_field_window
+
+            if not (row or rows):
+                row_start, row_stop = 0, reg.rows
+
+            distance = [
+                distance_field_window(reg, p, (row_start, row_stop))
+                for _, p in self.distance
+            ]
+            data = np.concatenate((data, np.asarray(distance, dtype=dtype)), axis=0)
+
         # mask array
         data = np.ma.masked_equal(data, self._cell_nodata)
         data = np.ma.masked_invalid(data)
@@ -531,7 +691,54 @@ class RasterStack(StatisticsMixin, PlottingMixin):
 
         return result
 
-    def predict(self, estimator, output, height=None, overwrite=False):
+    def probe_output(self, estimator):
+        """Predict the first row of the stack to determine the type of the
+        prediction raster
+
+        The result can be passed to the `predict` method to avoid repeating
+        the test prediction when several stacks with the same structure are
+        predicted using the same estimator.
+
+        Parameters
+        ----------
+        estimator : estimator object implementing 'fit'
+            The fitted estimator.
+
+        Returns
+        -------
+        tuple
+            Tuple of the GRASS data type, nodata value and number of outputs
+            of the prediction.
+        """
+        test_window = next(self.row_windows(height=1))
+        img = self.read(rows=test_window)
+        result = self._pred_fun(img, estimator)
+
+        try:
+            np.finfo(result.dtype)
+            mtype = "FCELL"
+            nodata = np.nan
+        except:
+            mtype = "CELL"
+            nodata = -2147483648
+
+        # determine whether multi-target
+        if result.shape[0] > 1:
+            n_outputs = result.shape[result.ndim - 1]
+        else:
+            n_outputs = 1
+
+        return mtype, nodata, n_outputs
+
+    def predict(
+        self,
+        estimator,
+        output,
+        height=None,
+        overwrite=False,
+        output_format=None,
+        memoize=None,
+    ):
         """Prediction method for RasterStack class
 
         Parameters
@@ -548,6 +755,18 @@ class RasterStack(StatisticsMixin, PlottingMixin):
             
         overwrite : bool (opt). Default is False
             Option to overwrite an existing raster.
+
+        output_format : tuple (opt)
+            The result of the `probe_output` method for the estimator. If not
+            specified then a test prediction is used to determine the type of
+            the prediction raster.
+
+        memoize : int (opt)
+            Whether to only predict the unique pixel values of each window of
+            rows. If specified, this is the maximum number of unique pixel
+            values whose predictions are cached across windows, or 0 to only
+            deduplicate the pixels within each window. See
+            rlearnlib.ensemble.MemoizedEstimator.
         
         Returns
         -------
@@ -557,25 +776,16 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         reg = Region()
         func = self._pred_fun
 
-        # determine dtype
-        test_window = list(self.row_windows(height=1))[0]
-        img = self.read(rows=test_window)
-        result = func(img, estimator)
+        if memoize is not None:
+            from .ensemble import MemoizedEstimator
 
-        try:
-            np.finfo(result.dtype)
-            mtype = "FCELL"
-            nodata = np.nan
-        except:
-            mtype = "CELL"
-            nodata = -2147483648
+            estimator = MemoizedEstimator(estimator, cache_size=memoize)
 
-        # determine whether multi-target
-        if result.shape[0] > 1:
-            n_outputs = result.shape[result.ndim - 1]
-        else:
-            n_outputs = 1
+        # determine dtype
+        if output_format is None:
+            output_format = self.probe_output(estimator)
 
+        mtype, nodata, n_outputs = output_format
         indexes = np.arange(0, n_outputs)
 
         # chose prediction function
@@ -624,7 +834,103 @@ class RasterStack(StatisticsMixin, PlottingMixin):
 
         return result_stack
 
-    def predict_proba(self, estimator, output, class_labels=None, height=None, overwrite=False):
+    def predict_stages(
+        self,
+        estimator,
+        output,
+        stage_output,
+        height=None,
+        overwrite=False,
+        output_format=None,
+    ):
+        """Prediction method for a cascade of classifiers, which also records
+        the stage of the cascade that decided each pixel
+
+        Parameters
+        ----------
+        estimator : estimator object implementing 'predict_stages'
+            The fitted cascade, such as rlearnlib.ensemble.CascadeClassifier.
+
+        output : str
+            Output name for prediction raster.
+
+        stage_output : str
+            Output name for the integer raster of the stage of each pixel.
+
+        height : int (opt).
+            Number of raster rows to pass to estimator at one time. If not
+            specified then the entire raster is read into memory.
+
+        overwrite : bool (opt). Default is False
+            Option to overwrite existing rasters.
+
+        output_format : tuple (opt)
+            The result of the `probe_output` method for the estimator.
+
+        Returns
+        -------
+        RasterStack
+            RasterStack of the prediction and the stage rasters.
+        """
+        reg = Region()
+
+        if height is None:
+            height = reg.rows
+
+        if output_format is None:
+            output_format = self.probe_output(estimator)
+
+        mtype, nodata, n_outputs = output_format
+        windows = list(self.row_windows(height=height))
+
+        with RasterRow(output, mode="w", mtype=mtype, overwrite=overwrite) as dst:
+            with RasterRow(
+                stage_output, mode="w", mtype="CELL", overwrite=overwrite
+            ) as stage_dst:
+                for wi, rows in enumerate(windows):
+                    gs.percent(wi, len(windows), 1)
+
+                    img = self.read(rows=rows)
+                    n_features, n_rows, n_cols = img.shape
+                    n_samples = n_rows * n_cols
+
+                    flat_pixels = img.transpose(1, 2, 0)
+                    flat_pixels = flat_pixels.reshape((n_samples, n_features))
+                    valid = ~np.ma.getmaskarray(flat_pixels).any(axis=1)
+                    flat_pixels = np.ma.filled(flat_pixels, -99999)
+
+                    # only the valid pixels are passed to the cascade
+                    result = np.full(n_samples, nodata, dtype=np.float64)
+                    stage = np.full(n_samples, self._cell_nodata, dtype=np.int64)
+
+                    if valid.any():
+                        result[valid], stage[valid] = estimator.predict_stages(
+                            flat_pixels[valid]
+                        )
+
+                    result = result.reshape((n_rows, n_cols))
+                    stage = stage.reshape((n_rows, n_cols))
+
+                    for i in range(n_rows):
+                        newrow = Buffer((reg.cols,), mtype=mtype)
+                        newrow[:] = result[i, :]
+                        dst.put_row(newrow)
+
+                        newrow = Buffer((reg.cols,), mtype="CELL")
+                        newrow[:] = stage[i, :]
+                        stage_dst.put_row(newrow)
+
+        return RasterStack([output, stage_output])
+
+    def predict_proba(
+        self,
+        estimator,
+        output,
+        class_labels=None,
+        height=None,
+        overwrite=False,
+        memoize=None,
+    ):
         """Prediction method for RasterStack class
 
         Parameters
@@ -646,6 +952,11 @@ class RasterStack(StatisticsMixin, PlottingMixin):
             
         overwrite : bool (opt). Default is False
             Option to overwrite an existing raster(s)
+
+        memoize : int (opt)
+            Whether to only predict the unique pixel values of each window of
+            rows, and the number of predictions to cache across windows. See
+            the `predict` method.
         
         Returns
         -------
@@ -654,9 +965,14 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         reg = Region()
         func = self._prob_fun
 
+        if memoize is not None:
+            from .ensemble import MemoizedEstimator
+
+            estimator = MemoizedEstimator(estimator, cache_size=memoize)
+
         # use class labels if supplied else output preds as 0,1,2...n
         if class_labels is None:
-            test_window = list(self.row_windows(height=1))[0]
+            test_window = next(self.row_windows(height=1))
             img = self.read(rows=test_window)
             result = func(img, estimator)
             class_labels = range(result.shape[0])
@@ -768,6 +1084,18 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         as_df : bool (opt). Default is False
             Whether to return the extracted RasterStack pixels as a Pandas
             DataFrame.
+
+        Returns
+        -------
+        X : ndarray
+            2d float32 array of the extracted raster values with the
+            dimensions ordered by (n_samples, n_features).
+
+        y : ndarray
+            1d array of the labelled pixel values.
+
+        cat : ndarray
+            1d array of the index of each sample.
         """
         # some checks
         if RasterRow(rast_name).exist() is False:
@@ -793,13 +1121,40 @@ class RasterStack(StatisticsMixin, PlottingMixin):
 
         data = data.strip().split(os.linesep)
         data = [i.split("|") for i in data]
-        data = np.asarray(data).astype("float32")
+        data = np.asarray(data).astype(np.float64)
 
         # remove x,y columns from array indexes 1 and 2
+        coords = data[:, 0:2]
         data = data[:, 2:]
 
         y = data[:, 0]
-        X = data[:, 1:]
+        X = data[:, 1:].astype(np.float32)
+
+        # append the focal features at the pixel locations
+        if self.focal:
+            from .focal import sample_focal
+
+            focal = sample_focal(self.focal, self.names, coords[:, 0], coords[:, 1])
+            X = np.column_stack((X, focal.astype(X.dtype)))
+
+        # append the virtual layers, which are evaluated from the extracted values
+        if self.virtual:
+            rasters = X[:, : self.count].T.astype(np.float64)
+            virtual = np.column_stack([v.evaluate(rasters) for v in self.virtual])
+            X = np.column_stack((X, virtual.astype(X.dtype)))
+
+        # append the distance fields at the pixel locations
+        if self.distance:
+            from .utils import distance_field_sample
+
+            reg = Region()
+            distance = np.column_stack(
+                [
+                    distance_field_sample(reg, p, coords[:, 0], coords[:, 1])
+                    for _, p in self.distance
+                ]
+            )
+            X = np.column_stack((X, distance.astype(X.dtype)))
 
         if (y % 1).all() == 0:
             y = y.astype("int")
@@ -807,14 +1162,24 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         cat = np.arange(0, y.shape[0])
 
         if labels and use_cats is True:
+            from .transformers import CategoryEncoder
+
             enc = CategoryEncoder()
             enc.fit(labels)
             y = enc.transform(y)            
 
         if as_df is True:
+            import pandas as pd
+
+            derived = (
+                [f.name for f in self.focal]
+                + [v.name for v in self.virtual]
+                + [name for name, _ in self.distance]
+            )
+
             df = pd.DataFrame(
                 data=np.column_stack((cat, y, X)),
-                columns=["cat"] + [rast_name] + self.names,
+                columns=["cat"] + [rast_name] + self.names + derived,
             )
 
             return df
@@ -842,8 +1207,8 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         Returns
         -------
         X : ndarray
-            2d array containing the extracted raster values with the dimensions
-            ordered by (n_samples, n_features).
+            2d float32 array containing the extracted raster values with the
+            dimensions ordered by (n_samples, n_features).
             
         y : ndarray
             1d or 2d array of labels with the dimensions ordered by 
@@ -852,6 +1217,8 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         df : pandas.DataFrame
             Extracted raster values as Pandas DataFrame if as_df = True.
         """
+        import pandas as pd
+
         # some checks
         if VectorTopo(vect_name).exist() is False:
             gs.fatal("The supplied vector map does not exist")
@@ -921,12 +1288,48 @@ class RasterStack(StatisticsMixin, PlottingMixin):
                 X[name] = X[name].astype(dtype)
                 Xs.append(X)
 
+            # append the focal features at the point locations
+            if self.focal:
+                from .focal import sample_focal
+
+                geoms = [(p.cat, p.x, p.y) for p in points.viter("points")]
+                geoms = np.asarray(geoms, dtype=np.float64).reshape(-1, 3)
+                focal = sample_focal(self.focal, self.names, geoms[:, 1], geoms[:, 2])
+
+                X = pd.DataFrame(focal, columns=[f.name for f in self.focal])
+                X[key_col] = geoms[:, 0].astype(np.int64)
+                Xs.append(X)
+
+            # append the distance fields at the point locations
+            if self.distance:
+                from .utils import distance_field_sample
+
+                reg = Region()
+                geoms = [(p.cat, p.x, p.y) for p in points.viter("points")]
+                geoms = np.asarray(geoms, dtype=np.float64).reshape(-1, 3)
+
+                X = pd.DataFrame(
+                    {
+                        name: distance_field_sample(reg, p, geoms[:, 1], geoms[:, 2])
+                        for name, p in self.distance
+                    }
+                )
+                X[key_col] = geoms[:, 0].astype(np.int64)
+                Xs.append(X)
+
         for X in Xs:
             df = df.merge(X, on=key_col)
 
         # set any grass integer nodata values to NaN
         df = df.replace(self._cell_nodata, np.nan)
 
+        # append the virtual layers, which are evaluated from the extracted values
+        if self.virtual:
+            rasters = df.loc[:, list(self.loc.keys())].astype(np.float64).values.T
+
+            for layer in self.virtual:
+                df[layer.name] = layer.evaluate(rasters)
+
         # remove rows with missing response data
         df = df.dropna(subset=fields)
 
@@ -939,7 +1342,13 @@ class RasterStack(StatisticsMixin, PlottingMixin):
             if len(fields) == 1:
                 fields = fields[0]
 
-            X = df.loc[:, df.columns.isin(self.loc.keys())].values
+            features = (
+                list(self.loc.keys())
+                + [f.name for f in self.focal]
+                + [v.name for v in self.virtual]
+                + [name for name, _ in self.distance]
+            )
+            X = df.loc[:, features].to_numpy(dtype=np.float32, na_value=np.nan)
             y = np.asarray(df.loc[:, fields].values)
             cat = np.asarray(df.loc[:, key_col].values)
 
@@ -954,6 +1363,7 @@ class RasterStack(StatisticsMixin, PlottingMixin):
         -------
         pandas.DataFrame
         """
+        import pandas as pd
 
         reg = Region()
         arr = self.read()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The resample module reads rasters that are coarser than the computational
+region at their native resolution, and resamples them to the region in memory,
+so that coarse predictors do not need to be resampled and stored at the
+resolution of the finer predictors."""
+
+import math
+
+import grass.script as gs
+import numpy as np
+from grass.pygrass.gis.region import Region
+
+
+def _region_key(region):
+    """Tuple that identifies the extent and resolution of a region"""
+    return (
+        region.north,
+        region.south,
+        region.east,
+        region.west,
+        region.nsres,
+        region.ewres,
+    )
+
+
+def native_region(info, region):
+    """
+    Region on the native grid of a raster that covers the computational region
+
+    The extent of the computational region is expanded outwards to the cell
+    boundaries of the raster, plus one cell on each side so that the
+    neighbours that are used for bilinear interpolation are available along
+    the edges.
+
+    Parameters
+    ----------
+    info : dict
+        Dict containing the 'north', 'west', 'nsres' and 'ewres' of the raster,
+        such as returned by grass.script.raster_info.
+
+    region : grass.pygrass.gis.region.Region
+        Computational region.
+
+    Returns
+    -------
+    grass.pygrass.gis.region.Region
+    """
+    nsres, ewres = float(info["nsres"]), float(info["ewres"])
+    north, west = float(info["north"]), float(info["west"])
+
+    native = Region()
+    native.nsres = nsres
+    native.ewres = ewres
+    native.north = north - (math.floor((north - region.north) / nsres) - 1) * nsres
+    native.south = north - (math.ceil((north - region.south) / nsres) + 1) * nsres
+    native.west = west + (math.floor((region.west - west) / ewres) - 1) * ewres
+    native.east = west + (math.ceil((region.east - west) / ewres) + 1) * ewres
+    native.adjust()
+
+    return native
+
+
+def _sample_positions(start, res, native_start, native_res, n, size, method, sign):
+    """Native cell indices and weights of the cells of the region along one
+    axis"""
+    centres = start + sign * (np.arange(n) + 0.5) * res
+    position = sign * (centres - native_start) / native_res - 0.5
+
+    if method == "nearest":
+        lower = np.clip(np.floor(position + 0.5).astype(np.int64), 0, size - 1)
+        return lower, lower, np.zeros(n)
+
+    lower = np.floor(position).astype(np.int64)
+    weight = position - lower
+    upper = np.clip(lower + 1, 0, size - 1)
+    lower = np.clip(lower, 0, size - 1)
+
+    return lower, upper, weight
+
+
+def _lerp(a, b, weight):
+    """Linear interpolation that ignores a nodata neighbour with zero weight"""
+    return np.where(weight == 0, a, a + (b - a) * weight)
+
+
+class ResampledReader(object):
+    def __init__(self, name, method="bilinear", region=None):
+        """Reads the rows of a raster that is coarser than the computational
+        region at its native resolution, and interpolates them to the region
+
+        The native rows are cached, so that the rows that are shared by
+        adjacent windows of the region are only read once. Rows above the
+        current window are removed from the cache because windows are read
+        from the top of the region downwards.
+
+        Parameters
+        ----------
+        name : str
+            Name of the GRASS GIS raster.
+
+        method : str (opt). Default is 'bilinear'
+            Interpolation method, either 'nearest' or 'bilinear'.
+
+        region : grass.pygrass.gis.region.Region (opt)
+            Computational region. Defaults to the current region.
+        """
+        if method not in ("nearest", "bilinear"):
+            raise ValueError("method must be 'nearest' or 'bilinear'")
+
+        if region is None:
+            region = Region()
+
+        self.name = name
+        self.method = method
+        self.region = region
+        self.key = _region_key(region)
+
+        info = gs.raster_info(name)
+        self.native = native_region(info, region)
+        self._cache = {}
+
+        self._rows = _sample_positions(
+            region.north,
+            region.nsres,
+            self.native.north,
+            self.native.nsres,
+            region.rows,
+            self.native.rows,
+            method,
+            -1,
+        )
+        self._cols = _sample_positions(
+            region.west,
+            region.ewres,
+            self.native.west,
+            self.native.ewres,
+            region.cols,
+            self.native.cols,
+            method,
+            1,
+        )
+
+    @staticmethod
+    def is_coarser(name, region=None):
+        """Whether a raster has a coarser resolution than the region"""
+        if region is None:
+            region = Region()
+
+        info = gs.raster_info(name)
+
+        return (
+            float(info["nsres"]) > region.nsres or float(info["ewres"]) > region.ewres
+        )
+
+    def _read_native(self, rows):
+        """Read rows of the raster using its native resolution
+
+        Only the input window is set to the native grid, because the output
+        window cannot be changed while the rasters of a prediction are open for
+        writing. The rows are read using the raster library directly, because
+        RasterRow requires the input and output windows to be the same. The
+        region is restored afterwards so that the windows are no longer split.
+        """
+        import ctypes
+
+        import grass.lib.raster as libraster
+
+        libraster.Rast_set_input_window(self.native.byref())
+
+        try:
+            fd = libraster.Rast_open_old(self.name, "")
+
+            try:
+                values = np.empty(libraster.Rast_input_window_cols(), dtype=np.float64)
+                pointer = values.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+
+                for row in rows:
+                    # nodata cells are read as nan
+                    libraster.Rast_get_d_row(fd, pointer, int(row))
+                    self._cache[row] = values.copy()
+            finally:
+                libraster.Rast_close(fd)
+        finally:
+            self.region.set_raster_region()
+
+    def read(self, rows):
+        """
+        Read a window of rows of the region
+
+        Parameters
+        ----------
+        rows : tuple
+            Start and end row of the window within the region.
+
+        Returns
+        -------
+        ndarray
+            2d array of the resampled values, with nan representing nodata.
+        """
+        start, stop = rows
+        lower, upper, weight = (i[start:stop] for i in self._rows)
+        needed = np.union1d(lower, upper)
+
+        # remove cached rows above the window and read the missing rows
+        for row in [i for i in self._cache if i < needed[0]]:
+            del self._cache[row]
+
+        missing = [i for i in needed if i not in self._cache]
+
+        if missing:
+            self._read_native(missing)
+
+        col_lower, col_upper, col_weight = self._cols
+
+        top = np.asarray([self._cache[i] for i in lower])
+        bottom = np.asarray([self._cache[i] for i in upper])
+
+        if self.method == "nearest":
+            return top[:, col_lower]
+
+        weight = weight[:, np.newaxis]
+        left = _lerp(top[:, col_lower], bottom[:, col_lower], weight)
+        right = _lerp(top[:, col_upper], bottom[:, col_upper], weight)
+
+        return _lerp(left, right, col_weight)
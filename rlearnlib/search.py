@@ -0,0 +1,860 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The search module contains hyperparameter search strategies that can be
+used in place of an exhaustive grid search. The search classes follow the
+scikit-learn conventions and expose the `cv_results_`, `best_params_`,
+`best_score_` and `best_estimator_` attributes after fitting."""
+
+import itertools
+import math
+
+import numpy as np
+from sklearn.base import BaseEstimator, clone
+
+from .validation import _fit_params_subset
+
+
+def halving_resource(estimator, param_grid):
+    """
+    Select the resource that is increased during successive halving
+
+    Ensemble estimators are evaluated using a small number of trees if the
+    number of estimators is not itself being tuned, otherwise the candidates
+    are evaluated using a small number of samples.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator or Pipeline.
+
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values to search.
+
+    Returns
+    -------
+    resource : str
+        Name of the resource, either 'n_samples' or the name of the
+        n_estimators parameter of the estimator.
+
+    max_resources : int or 'auto'
+        Maximum amount of resource that a candidate is allowed to use.
+    """
+    params = estimator.get_params()
+
+    for key in ["n_estimators", "estimator__n_estimators"]:
+        if key in params and key not in param_grid:
+            return key, params[key]
+
+    return "n_samples", "auto"
+
+
+class HyperbandSearchCV(BaseEstimator):
+    """Hyperband search over a grid of hyperparameters
+
+    Hyperband runs several brackets of successive halving. Each bracket trades
+    the number of randomly-sampled candidates against the minimum amount of
+    resource that each candidate is evaluated with, from many candidates with
+    a small budget to few candidates with the full budget. The best candidate
+    over all brackets is refitted using the full budget.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        The object to use to fit the data.
+
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values to search.
+
+    scoring : str, callable (opt)
+        Scikit-learn scorer used to evaluate the candidates.
+
+    cv : int, cross-validation generator (opt)
+        Cross-validation splitting strategy.
+
+    factor : int (opt). Default is 3
+        Proportion of candidates that are selected for each subsequent
+        iteration of successive halving.
+
+    resource : str (opt). Default is 'n_samples'
+        Resource that increases with each iteration, either 'n_samples' or
+        the name of a parameter of the estimator that accepts integers.
+
+    max_resources : int or 'auto' (opt). Default is 'auto'
+        Maximum amount of resource that a candidate is allowed to use.
+
+    n_jobs : int (opt)
+        Number of jobs to run in parallel.
+
+    random_state : int (opt)
+        Seed used to sample the candidates.
+    """
+
+    def __init__(
+        self,
+        estimator,
+        param_grid,
+        scoring=None,
+        cv=None,
+        factor=3,
+        resource="n_samples",
+        max_resources="auto",
+        n_jobs=None,
+        random_state=None,
+    ):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.factor = factor
+        self.resource = resource
+        self.max_resources = max_resources
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _brackets(self, n_candidates, max_resources, min_resources):
+        """Returns a list of (n_candidates, min_resources) for each bracket"""
+        # largest s for which factor ** s does not exceed the number of candidates
+        s_max = 0
+
+        while self.factor ** (s_max + 1) <= n_candidates:
+            s_max += 1
+
+        while s_max > 0 and max_resources // self.factor ** s_max < min_resources:
+            s_max -= 1
+
+        brackets = []
+
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.factor ** s))
+            brackets.append((min(n, n_candidates), max_resources // self.factor ** s))
+
+        return brackets
+
+    def _full_budget_score(self, params, X, y, groups, cv, max_resources, fit_params):
+        """Mean cross-validation score of a candidate using the full budget"""
+        from joblib import Parallel, delayed
+        from sklearn.metrics import check_scoring
+
+        estimator = clone(self.estimator).set_params(**params)
+
+        if self.resource != "n_samples":
+            estimator.set_params(**{self.resource: max_resources})
+
+        scorer = check_scoring(estimator, scoring=self.scoring)
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(
+                clone(estimator), X, y, train, test, scorer, fit_params
+            )
+            for (train, test) in cv.split(X, y, groups)
+        )
+
+        return float(np.mean([score for score, fit_time, score_time in scores]))
+
+    def fit(self, X, y=None, groups=None, **fit_params):
+        import pandas as pd
+        from sklearn.experimental import enable_halving_search_cv  # noqa
+        from sklearn.model_selection import HalvingRandomSearchCV, ParameterGrid
+        from sklearn.model_selection import check_cv
+        from sklearn.base import is_classifier
+
+        rng = np.random.RandomState(self.random_state)
+        n_candidates = len(ParameterGrid(self.param_grid))
+        cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+
+        if self.resource == "n_samples":
+            max_resources = self.max_resources
+
+            if max_resources == "auto":
+                max_resources = X.shape[0]
+
+            min_resources = cv.get_n_splits() * 2
+
+            if is_classifier(self.estimator):
+                min_resources *= np.unique(y).shape[0]
+        else:
+            max_resources = self.max_resources
+            min_resources = 1
+
+        results = []
+        best, best_score = None, None
+
+        brackets = self._brackets(n_candidates, max_resources, min_resources)
+
+        for i, (n, r) in enumerate(brackets):
+            search = HalvingRandomSearchCV(
+                estimator=self.estimator,
+                param_distributions=self.param_grid,
+                n_candidates=n,
+                factor=self.factor,
+                resource=self.resource,
+                min_resources=max(r, min_resources),
+                max_resources=max_resources,
+                scoring=self.scoring,
+                cv=cv,
+                refit=False,
+                n_jobs=self.n_jobs,
+                random_state=rng.randint(np.iinfo(np.int32).max),
+            )
+            search.fit(X, y, groups=groups, **fit_params)
+
+            df = pd.DataFrame(search.cv_results_)
+            df["bracket"] = i
+            results.append(df)
+
+            # the final round of a bracket can stop before the full budget, so
+            # the winner of the bracket is scored again using the full budget
+            score = search.best_score_
+
+            if search.n_resources_[-1] < max_resources:
+                score = self._full_budget_score(
+                    search.best_params_, X, y, groups, cv, max_resources, fit_params
+                )
+
+            if best is None or score > best_score:
+                best, best_score = search, score
+
+        self.cv_results_ = pd.concat(results, ignore_index=True).to_dict("list")
+        self.best_params_ = dict(best.best_params_)
+
+        # the best candidate is refitted using the full budget
+        if self.resource != "n_samples":
+            self.best_params_[self.resource] = max_resources
+
+        self.best_score_ = best_score
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+
+        if hasattr(self.best_estimator_, "classes_"):
+            self.classes_ = self.best_estimator_.classes_
+
+        return self
+
+    @property
+    def _estimator_type(self):
+        # only used by scikit-learn < 1.6, which does not provide the tags
+        return getattr(self.estimator, "_estimator_type", None)
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
+
+    def score(self, X, y=None):
+        return self.best_estimator_.score(X, y)
+
+
+def warm_start_key(estimator, param_grid):
+    """
+    Return the name of the n_estimators parameter if it can be searched using
+    warm-starting
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator or Pipeline.
+
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values to search.
+
+    Returns
+    -------
+    str or None
+        Name of the n_estimators parameter, or None if the estimator does not
+        support warm-starting or n_estimators is not being tuned.
+    """
+    params = estimator.get_params()
+
+    for key in ["n_estimators", "estimator__n_estimators"]:
+        warm_key = key.replace("n_estimators", "warm_start")
+
+        if key in param_grid and len(param_grid[key]) > 1 and warm_key in params:
+            return key
+
+    return None
+
+
+def _if_output(name):
+    """Make a method of a _StagedPrediction available only if its precomputed
+    output is provided, in the same manner as sklearn's available_if, which is
+    not present before scikit-learn 1.0"""
+
+    def decorator(method):
+        def available(self):
+            if getattr(self, name) is None:
+                raise AttributeError(
+                    "{0} is not available for {1}".format(
+                        method.__name__, type(self.estimator).__name__
+                    )
+                )
+            return method.__get__(self, type(self))
+
+        return property(available, doc=method.__doc__)
+
+    return decorator
+
+
+class _StagedPrediction(BaseEstimator):
+    """Estimator-like object that returns the precomputed outputs of a stage so
+    that a scikit-learn scorer can be applied to the staged predictions of a
+    boosting model
+
+    The predict_proba and decision_function methods are only available if the
+    corresponding staged outputs are provided, so that scorers select the same
+    response method as they would for the fitted estimator.
+    """
+
+    def __init__(self, estimator, prediction, proba=None, decision=None):
+        self.estimator = estimator
+        self.prediction = prediction
+        self.proba = proba
+        self.decision = decision
+
+    @property
+    def _estimator_type(self):
+        return getattr(self.estimator, "_estimator_type", None)
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def predict(self, X):
+        return self.prediction
+
+    @_if_output("proba")
+    def predict_proba(self, X):
+        return self.proba
+
+    @_if_output("decision")
+    def decision_function(self, X):
+        return self.decision
+
+
+def _warm_start_path(estimator, key, n_values, X, y, train, test, scorer, fit_params):
+    """Fit an estimator on a single fold using an increasing number of
+    estimators, and score the estimator at each value
+
+    Boosting models are fitted once using the largest number of estimators
+    and their staged predictions, probabilities and decision functions are
+    scored. Other ensembles are grown incrementally using warm-starting.
+
+    Returns
+    -------
+    list
+        List of (test_score, fit_time, score_time) tuples for each of the
+        n_values.
+    """
+    from time import time
+
+    fit_params = _fit_params_subset(fit_params, X.shape[0], train)
+    X_train, y_train, X_test, y_test = X[train], y[train], X[test], y[test]
+    final = estimator.steps[-1][1] if hasattr(estimator, "steps") else estimator
+    results = []
+
+    if hasattr(final, "staged_predict"):
+        start = time()
+        estimator.set_params(**{key: max(n_values)})
+        estimator.fit(X_train, y_train, **fit_params)
+        fit_time = time() - start
+
+        start = time()
+        Xt = X_test
+
+        if hasattr(estimator, "steps"):
+            for name, step in estimator.steps[:-1]:
+                Xt = step.transform(Xt)
+
+        staged = [final.staged_predict(Xt)]
+
+        for method in ["staged_predict_proba", "staged_decision_function"]:
+            if hasattr(final, method):
+                staged.append(getattr(final, method)(Xt))
+            else:
+                staged.append(itertools.repeat(None))
+
+        for i, outputs in enumerate(zip(*staged)):
+            if i + 1 in n_values:
+                score = scorer(_StagedPrediction(final, *outputs), Xt, y_test)
+                score_time = (time() - start) / len(n_values)
+                results.append((score, fit_time * (i + 1) / max(n_values), score_time))
+
+        return results
+
+    warm_key = key.replace("n_estimators", "warm_start")
+    estimator.set_params(**{warm_key: True})
+    fit_time = 0
+
+    for n in n_values:
+        start = time()
+        estimator.set_params(**{key: n})
+        estimator.fit(X_train, y_train, **fit_params)
+        fit_time += time() - start
+
+        start = time()
+        score = scorer(estimator, X_test, y_test)
+        results.append((score, fit_time, time() - start))
+
+    return results
+
+
+def _cv_results(candidates, test_scores, fit_times, score_times):
+    """
+    Build a cv_results_ dict in the same format as GridSearchCV
+
+    Parameters
+    ----------
+    candidates : list
+        List of dicts of hyperparameters.
+
+    test_scores, fit_times, score_times : ndarray
+        2d arrays with the dimensions of (n_candidates, n_splits).
+
+    Returns
+    -------
+    dict
+    """
+    from scipy.stats import rankdata
+
+    results = {
+        "mean_fit_time": np.nanmean(fit_times, axis=1),
+        "std_fit_time": np.nanstd(fit_times, axis=1),
+        "mean_score_time": np.nanmean(score_times, axis=1),
+        "std_score_time": np.nanstd(score_times, axis=1),
+    }
+
+    names = sorted(set(k for params in candidates for k in params))
+
+    for name in names:
+        results["param_" + name] = [params.get(name) for params in candidates]
+
+    results["params"] = candidates
+
+    for i in range(test_scores.shape[1]):
+        results["split{0}_test_score".format(i)] = test_scores[:, i]
+
+    mean_scores = test_scores.mean(axis=1)
+    results["mean_test_score"] = mean_scores
+    results["std_test_score"] = test_scores.std(axis=1)
+    results["rank_test_score"] = rankdata(
+        -np.where(np.isnan(mean_scores), -np.inf, mean_scores), method="min"
+    ).astype(np.int32)
+
+    return results
+
+
+class WarmStartSearchCV(BaseEstimator):
+    """Grid search that reuses the fitted trees across the values of
+    n_estimators
+
+    The n_estimators values are sorted and, within each fold and for each
+    combination of the other hyperparameters, the ensemble is grown
+    incrementally using warm-starting and scored at each value of
+    n_estimators. Boosting models are instead fitted once using the largest
+    value and their staged predictions are scored, which provides the whole
+    learning curve for the cost of the largest model.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Ensemble estimator, or a Pipeline with an ensemble as the final step.
+
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values to search.
+
+    scoring : callable
+        Scikit-learn scorer used to evaluate the candidates.
+
+    cv : int, cross-validation generator (opt)
+        Cross-validation splitting strategy.
+
+    n_jobs : int (opt)
+        Number of jobs to run in parallel.
+    """
+
+    def __init__(self, estimator, param_grid, scoring, cv=None, n_jobs=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    def _candidates(self):
+        from sklearn.model_selection import ParameterGrid
+
+        key = warm_start_key(self.estimator, self.param_grid)
+        n_values = sorted(set(self.param_grid[key]))
+        others = {k: v for (k, v) in self.param_grid.items() if k != key}
+
+        candidates = []
+
+        for params in ParameterGrid(others):
+            for n in n_values:
+                candidates.append(dict(params, **{key: n}))
+
+        return key, n_values, list(ParameterGrid(others)), candidates
+
+    def fit(self, X, y=None, groups=None, **fit_params):
+        from joblib import Parallel, delayed
+        from sklearn.model_selection import check_cv
+        from sklearn.base import is_classifier
+
+        cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        splits = list(cv.split(X, y, groups))
+        key, n_values, others, candidates = self._candidates()
+
+        paths = Parallel(n_jobs=self.n_jobs)(
+            delayed(_warm_start_path)(
+                clone(self.estimator).set_params(**params),
+                key,
+                n_values,
+                X,
+                y,
+                train,
+                test,
+                self.scoring,
+                fit_params,
+            )
+            for params in others
+            for (train, test) in splits
+        )
+
+        # arrange results into (candidate, split) arrays
+        results = np.asarray(paths, dtype=float)
+        results = results.reshape((len(others), len(splits), len(n_values), 3))
+        results = results.transpose(0, 2, 1, 3)
+        results = results.reshape((len(candidates), len(splits), 3))
+
+        self.cv_results_ = _cv_results(
+            candidates, results[:, :, 0], results[:, :, 1], results[:, :, 2]
+        )
+        self.best_index_ = int(np.argmin(self.cv_results_["rank_test_score"]))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = self.cv_results_["mean_test_score"][self.best_index_]
+        self.n_splits_ = len(splits)
+
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+
+        if hasattr(self.best_estimator_, "classes_"):
+            self.classes_ = self.best_estimator_.classes_
+
+        return self
+
+    @property
+    def _estimator_type(self):
+        # only used by scikit-learn < 1.6, which does not provide the tags
+        return getattr(self.estimator, "_estimator_type", None)
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
+
+    def score(self, X, y=None):
+        return self.best_estimator_.score(X, y)
+
+
+class CheckpointStore(object):
+    """Append-only store of the scores of hyperparameter candidates
+
+    Each evaluation of a candidate on a cross-validation split is written as
+    a single line of JSON as soon as it completes, keyed by a hash of the
+    training data, a hash of the estimator, scorer and fit parameters, a hash
+    of the split and the hyperparameters. Lines are
+    appended using a single write so that the store can be shared by several
+    worker processes, and any incomplete line that is left by an interrupted
+    process is ignored when the store is loaded.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file used to store the scores.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def key(params):
+        """Hyperparameters as a JSON string that is independent of the order
+        of the parameters"""
+        import json
+
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def load(self):
+        """
+        Load the completed evaluations
+
+        Any incomplete line that was left by an interrupted process is
+        terminated so that it does not corrupt the next result.
+
+        Returns
+        -------
+        dict
+            Dict of (data, setup, split, params) keys and (test_score,
+            fit_time, score_time) tuples.
+        """
+        import json
+        import os
+
+        results = {}
+
+        if not os.path.exists(self.path):
+            return results
+
+        line = "\n"
+
+        with open(self.path, "r") as src:
+            for line in src:
+                try:
+                    rec = json.loads(line)
+                    key = (rec["data"], rec["setup"], rec["split"], rec["params"])
+                    results[key] = (rec["score"], rec["fit_time"], rec["score_time"])
+                except (ValueError, KeyError):
+                    continue
+
+        # terminate an incomplete line so that new results start on a new line
+        if not line.endswith("\n"):
+            with open(self.path, "a") as dst:
+                dst.write("\n")
+
+        return results
+
+    def append(self, data, setup, split, params, score, fit_time, score_time):
+        """Append the result of an evaluation to the store"""
+        import json
+
+        rec = {
+            "data": data,
+            "setup": setup,
+            "split": split,
+            "params": params,
+            "score": float(score),
+            "fit_time": fit_time,
+            "score_time": score_time,
+        }
+
+        with open(self.path, "a") as dst:
+            dst.write(json.dumps(rec) + "\n")
+
+
+def _simplify_params(value):
+    """Replace the estimators within a parameter value by the name of their
+    class, because their own parameters are included in the deep parameters"""
+    if hasattr(value, "get_params"):
+        return type(value).__module__ + "." + type(value).__qualname__
+
+    if isinstance(value, (list, tuple)):
+        return [_simplify_params(i) for i in value]
+
+    if isinstance(value, dict):
+        return {k: _simplify_params(v) for k, v in value.items()}
+
+    return value
+
+
+def _setup_key(estimator, param_grid, scorer, fit_params):
+    """
+    Hash of the estimator, scorer and fit parameters of a search
+
+    The parameters that are searched, and the parameters that do not change
+    the scores such as the number of jobs and the cache of a Pipeline, are
+    excluded so that they do not invalidate the checkpoint.
+
+    Returns
+    -------
+    str
+    """
+    import joblib
+
+    ignored = ["memory", "n_jobs", "verbose"]
+    params = clone(estimator).get_params(deep=True)
+    params = {
+        k: _simplify_params(v)
+        for k, v in params.items()
+        if k not in param_grid and k.split("__")[-1] not in ignored
+    }
+
+    if hasattr(scorer, "__qualname__"):
+        scorer = scorer.__module__ + "." + scorer.__qualname__
+    else:
+        scorer = repr(scorer)
+
+    return joblib.hash((type(estimator), params, scorer, joblib.hash(fit_params)))
+
+
+def _fit_and_score(estimator, X, y, train, test, scorer, fit_params):
+    """Fit and score an estimator on a single split
+
+    Returns
+    -------
+    tuple
+        (test_score, fit_time, score_time)
+    """
+    from time import time
+
+    fit_params = _fit_params_subset(fit_params, X.shape[0], train)
+
+    start = time()
+    estimator.fit(X[train], y[train], **fit_params)
+    fit_time = time() - start
+
+    start = time()
+    score = scorer(estimator, X[test], y[test])
+    score_time = time() - start
+
+    return score, fit_time, score_time
+
+
+def _fit_and_checkpoint(estimator, X, y, train, test, scorer, fit_params, store, key):
+    """Fit and score an estimator on a single split, and write the result to
+    the checkpoint store"""
+    score, fit_time, score_time = _fit_and_score(
+        estimator, X, y, train, test, scorer, fit_params
+    )
+    store.append(*key, score=score, fit_time=fit_time, score_time=score_time)
+
+    return score, fit_time, score_time
+
+
+class ResumableGridSearchCV(BaseEstimator):
+    """Grid search that checkpoints the score of each candidate on each split
+
+    The evaluations that are already present in the checkpoint store for the
+    same training data, estimator, scorer, fit parameters, splits and
+    hyperparameters are loaded instead of being refitted, so that an
+    interrupted search is resumed, and adding values to the parameter grid
+    only fits the new candidates.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator or Pipeline.
+
+    param_grid : dict
+        Dict of parameter names (keys) and lists of values to search.
+
+    scoring : callable
+        Scikit-learn scorer used to evaluate the candidates.
+
+    checkpoint : str
+        Path to the file used to store the scores.
+
+    cv : int, cross-validation generator (opt)
+        Cross-validation splitting strategy.
+
+    n_jobs : int (opt)
+        Number of jobs to run in parallel.
+    """
+
+    def __init__(
+        self, estimator, param_grid, scoring, checkpoint, cv=None, n_jobs=None
+    ):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.scoring = scoring
+        self.checkpoint = checkpoint
+        self.cv = cv
+        self.n_jobs = n_jobs
+
+    def fit(self, X, y=None, groups=None, **fit_params):
+        import joblib
+        from joblib import Parallel, delayed
+        from sklearn.model_selection import ParameterGrid, check_cv
+        from sklearn.base import is_classifier
+
+        cv = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        splits = list(cv.split(X, y, groups))
+        candidates = list(ParameterGrid(self.param_grid))
+
+        store = CheckpointStore(self.checkpoint)
+        data_key = joblib.hash((np.asarray(X), np.asarray(y), groups))
+        setup_key = _setup_key(
+            self.estimator, self.param_grid, self.scoring, fit_params
+        )
+        split_keys = [joblib.hash((train, test)) for (train, test) in splits]
+        param_keys = [store.key(params) for params in candidates]
+        keys = [
+            [(data_key, setup_key, split_key, param_key) for split_key in split_keys]
+            for param_key in param_keys
+        ]
+
+        completed = store.load()
+        pending = [
+            (i, j)
+            for i in range(len(candidates))
+            for j in range(len(splits))
+            if keys[i][j] not in completed
+        ]
+
+        evaluated = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_checkpoint)(
+                clone(self.estimator).set_params(**candidates[i]),
+                X,
+                y,
+                splits[j][0],
+                splits[j][1],
+                self.scoring,
+                fit_params,
+                store,
+                keys[i][j],
+            )
+            for (i, j) in pending
+        )
+
+        for (i, j), result in zip(pending, evaluated):
+            completed[keys[i][j]] = result
+
+        results = np.asarray(
+            [
+                [completed[keys[i][j]] for j in range(len(splits))]
+                for i in range(len(candidates))
+            ],
+            dtype=float,
+        )
+
+        self.n_resumed_ = len(candidates) * len(splits) - len(pending)
+        self.cv_results_ = _cv_results(
+            candidates, results[:, :, 0], results[:, :, 1], results[:, :, 2]
+        )
+        self.best_index_ = int(np.argmin(self.cv_results_["rank_test_score"]))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = self.cv_results_["mean_test_score"][self.best_index_]
+        self.n_splits_ = len(splits)
+
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_)
+        self.best_estimator_.fit(X, y, **fit_params)
+
+        if hasattr(self.best_estimator_, "classes_"):
+            self.classes_ = self.best_estimator_.classes_
+
+        return self
+
+    @property
+    def _estimator_type(self):
+        # only used by scikit-learn < 1.6, which does not provide the tags
+        return getattr(self.estimator, "_estimator_type", None)
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+    def predict_proba(self, X):
+        return self.best_estimator_.predict_proba(X)
+
+    def score(self, X, y=None):
+        return self.best_estimator_.score(X, y)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The selection module contains methods to remove redundant or uninformative
+raster layers before training, so that fewer layers have to be read and passed
+to the model during prediction."""
+
+import numpy as np
+
+
+def symmetric_correlation(corr):
+    """
+    Convert the lower triangle correlation matrix returned by
+    RasterStack.covar into a full symmetric matrix
+
+    Parameters
+    ----------
+    corr : ndarray
+        2d correlation matrix with the diagonal and upper triangle set to nan.
+
+    Returns
+    -------
+    ndarray
+    """
+    corr = np.nan_to_num(np.tril(corr, -1).astype(np.float64))
+    corr = corr + corr.T
+    np.fill_diagonal(corr, 1.0)
+
+    return corr
+
+
+def correlation_clusters(corr, threshold=0.9):
+    """
+    Cluster features using the absolute correlation between them
+
+    Complete linkage is used so that every pair of features within a cluster
+    has an absolute correlation of at least the threshold.
+
+    Parameters
+    ----------
+    corr : ndarray
+        2d symmetric correlation matrix.
+
+    threshold : float (opt). Default is 0.9
+        Minimum absolute correlation between the features within a cluster.
+
+    Returns
+    -------
+    ndarray
+        1d array of the cluster label of each feature.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+    from scipy.spatial.distance import squareform
+
+    if corr.shape[0] < 2:
+        return np.ones(corr.shape[0], dtype=int)
+
+    dist = np.clip(1 - np.abs(corr), 0, None)
+    dist = (dist + dist.T) / 2
+    np.fill_diagonal(dist, 0)
+
+    tree = linkage(squareform(dist, checks=False), method="complete")
+
+    return fcluster(tree, t=1 - threshold, criterion="distance")
+
+
+def select_uncorrelated(corr, threshold=0.9, keep=None):
+    """
+    Retain one feature from each cluster of correlated features
+
+    The retained feature of each cluster is the one with the largest total
+    absolute correlation with the other members of the cluster.
+
+    Parameters
+    ----------
+    corr : ndarray
+        2d symmetric correlation matrix.
+
+    threshold : float (opt). Default is 0.9
+        Minimum absolute correlation between the features within a cluster.
+
+    keep : list (opt)
+        Indices of features that are always retained and are not clustered,
+        such as categorical rasters.
+
+    Returns
+    -------
+    ndarray
+        Sorted indices of the retained features.
+    """
+    keep = [] if keep is None else list(keep)
+    candidates = np.setdiff1d(np.arange(corr.shape[0]), keep)
+
+    sub = np.abs(corr[np.ix_(candidates, candidates)])
+    clusters = correlation_clusters(sub, threshold)
+    selected = list(keep)
+
+    for label in np.unique(clusters):
+        members = np.flatnonzero(clusters == label)
+        total = sub[np.ix_(members, members)].sum(axis=1)
+        selected.append(candidates[members[np.argmax(total)]])
+
+    return np.sort(np.asarray(selected, dtype=int))
+
+
+def _held_out_score(result, X, y, scoring):
+    """Mean score of the fold models on their held-out data"""
+    return np.mean(
+        [
+            scoring(estimator, X[result.folds == i], y[result.folds == i])
+            for i, estimator in enumerate(result.estimators)
+        ]
+    )
+
+
+def select_important(
+    estimator,
+    X,
+    y,
+    cv,
+    scoring,
+    threshold=0.0,
+    groups=None,
+    fit_params=None,
+    n_jobs=None,
+    random_state=None,
+):
+    """
+    Retain the features with a permutation importance above a threshold
+
+    The importances are computed using the held-out data of each fold of a
+    cross-validation.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator.
+
+    X, y : ndarray
+        Training data and response variable.
+
+    cv : cross-validation generator
+        Cross-validation splitting strategy.
+
+    scoring : callable
+        Scorer with the signature scorer(estimator, X, y).
+
+    threshold : float (opt). Default is 0.0
+        Features with an importance less than or equal to the threshold are
+        removed. The most important feature is always retained.
+
+    groups : ndarray (opt)
+        1d array of group labels used while splitting the data into folds.
+
+    fit_params : dict (opt)
+        Parameters to pass to the fit method of the estimator.
+
+    n_jobs : int (opt)
+        Number of jobs to run in parallel.
+
+    random_state : int (opt)
+        Seed for the permutations.
+
+    Returns
+    -------
+    selected : ndarray
+        Sorted indices of the retained features.
+
+    importances : pandas.DataFrame
+        Permutation importances of all of the features.
+    """
+    from .importance import permutation_importance
+    from .validation import cross_validate_folds
+
+    result = cross_validate_folds(
+        estimator,
+        X,
+        y,
+        cv,
+        groups=groups,
+        fit_params=fit_params,
+        return_estimators=True,
+        n_jobs=n_jobs,
+    )
+    importances = permutation_importance(
+        result.estimators,
+        X,
+        y,
+        scoring,
+        folds=result.folds,
+        n_jobs=n_jobs,
+        random_state=random_state,
+    )
+
+    values = importances["importance"].values
+    selected = np.flatnonzero(values > threshold)
+
+    if selected.shape[0] == 0:
+        selected = np.asarray([np.argmax(values)])
+
+    return selected, importances
+
+
+def recursive_elimination(
+    estimator,
+    X,
+    y,
+    cv,
+    scoring,
+    step=0.2,
+    min_features=1,
+    groups=None,
+    fit_params=None,
+    n_jobs=None,
+    random_state=None,
+):
+    """
+    Recursive feature elimination with cross-validation
+
+    At each iteration the estimator is cross-validated using the remaining
+    features, and the least important features, according to the permutation
+    importances on the held-out data of each fold, are removed. The subset of
+    features with the best cross-validation score is returned, with ties
+    resolved in favour of fewer features. Unlike sklearn.feature_selection.RFECV,
+    any estimator can be used because the importances do not depend on the
+    coefficients of the model.
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        Scikit-learn estimator.
+
+    X, y : ndarray
+        Training data and response variable.
+
+    cv : cross-validation generator
+        Cross-validation splitting strategy.
+
+    scoring : callable
+        Scorer with the signature scorer(estimator, X, y).
+
+    step : float (opt). Default is 0.2
+        Proportion of the remaining features that are removed at each
+        iteration. At least one feature is removed.
+
+    min_features : int (opt). Default is 1
+        Minimum number of features to retain.
+
+    groups : ndarray (opt)
+        1d array of group labels used while splitting the data into folds.
+
+    fit_params : dict (opt)
+        Parameters to pass to the fit method of the estimator.
+
+    n_jobs : int (opt)
+        Number of jobs to run in parallel.
+
+    random_state : int (opt)
+        Seed for the permutations.
+
+    Returns
+    -------
+    selected : ndarray
+        Sorted indices of the retained features.
+
+    scores : list
+        List of (n_features, score) tuples for each iteration.
+    """
+    from .importance import permutation_importance
+    from .validation import cross_validate_folds
+
+    features = np.arange(X.shape[1])
+    best_features, best_score = features, -np.inf
+    scores = []
+
+    while True:
+        X_subset = np.asarray(X[:, features])
+        result = cross_validate_folds(
+            estimator,
+            X_subset,
+            y,
+            cv,
+            groups=groups,
+            fit_params=fit_params,
+            return_estimators=True,
+            n_jobs=n_jobs,
+        )
+        score = _held_out_score(result, X_subset, y, scoring)
+        scores.append((features.shape[0], score))
+
+        if score >= best_score:
+            best_features, best_score = features, score
+
+        if features.shape[0] <= min_features:
+            break
+
+        importances = permutation_importance(
+            result.estimators,
+            X_subset,
+            y,
+            scoring,
+            folds=result.folds,
+            n_jobs=n_jobs,
+            random_state=random_state,
+        )
+
+        n_drop = max(int(step * features.shape[0]), 1)
+        n_drop = min(n_drop, features.shape[0] - min_features)
+        order = np.argsort(importances["importance"].values, kind="stable")
+        features = np.sort(features[order[n_drop:]])
+
+    return best_features, scores
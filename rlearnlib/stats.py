@@ -114,3 +114,65 @@ class StatisticsMixin(object):
         regr = parse_key_val(regr, sep="=")
 
         return regr
+
+    def moments(self, index=None, height=25):
+        """
+        Mean and covariance matrix of the layers within the RasterStack,
+        computed in a single streaming pass over windows of rows
+
+        Only the pixels that are valid in all of the layers are used. The
+        values are shifted by the mean of the first window before they are
+        accumulated to reduce the loss of precision.
+
+        Parameters
+        ----------
+        index : list (opt)
+            Index positions of the layers to use. Defaults to all layers.
+
+        height : int (opt). Default is 25
+            Height of each window in number of rows.
+
+        Returns
+        -------
+        count : int
+            Number of valid pixels.
+
+        mean : ndarray
+            1d array of the mean of each layer.
+
+        cov : ndarray
+            2d covariance matrix of the layers.
+        """
+        if index is None:
+            index = np.arange(0, self.count)
+
+        n_layers = len(index)
+        count = 0
+        shift = None
+        total = np.zeros(n_layers)
+        cross = np.zeros((n_layers, n_layers))
+
+        for window in self.row_windows(height=height):
+            img = self.read(index=index, rows=window)
+            img = img.reshape((n_layers, img.shape[1] * img.shape[2]))
+            valid = ~np.ma.getmaskarray(img).any(axis=0)
+            data = img.data[:, valid].T.astype(np.float64)
+
+            if data.shape[0] == 0:
+                continue
+
+            if shift is None:
+                shift = data.mean(axis=0)
+
+            data = data - shift
+            count += data.shape[0]
+            total += data.sum(axis=0)
+            cross += data.T @ data
+
+        if count < 2:
+            raise ValueError("Less than two pixels are valid in all of the layers")
+
+        mean = total / count
+        cov = (cross - count * np.outer(mean, mean)) / (count - 1)
+
+        return count, shift + mean, cov
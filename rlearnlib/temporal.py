@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The temporal module contains a stack of GRASS GIS space-time raster datasets
+and static rasters, which provides a different set of feature rasters for each
+timestep of a time series."""
+
+import grass.script as gs
+import numpy as np
+from grass.pygrass.gis.region import Region
+from grass.pygrass.raster import RasterRow
+from grass.pygrass.raster.buffer import Buffer
+
+from .raster import RasterStack
+
+
+def strds_maps(strds, where=None):
+    """
+    Names of the rasters that are registered in a space-time raster dataset
+
+    Parameters
+    ----------
+    strds : str
+        Name of the space-time raster dataset.
+
+    where : str (opt)
+        SQL WHERE conditions used to select the rasters, e.g.
+        "start_time > '2010-01-01'".
+
+    Returns
+    -------
+    list
+        Names of the rasters, including their mapset, in temporal order.
+    """
+    kwargs = {"where": where} if where else {}
+
+    maps = gs.read_command(
+        "t.rast.list",
+        input=strds,
+        columns="id",
+        order="start_time",
+        flags="u",
+        quiet=True,
+        **kwargs
+    )
+
+    return [i.strip() for i in maps.splitlines() if i.strip()]
+
+
+class TemporalRasterStack(object):
+    def __init__(self, strds, static=None, where=None, resampling="nearest"):
+        """A TemporalRasterStack represents the features of a time series as a
+        template of space-time raster datasets and static rasters
+
+        The rasters of each timestep are the maps at the same temporal
+        position within each space-time raster dataset, followed by the static
+        rasters, such as a DEM or soil map, that are shared by every timestep.
+        A model that is applied to the stack must therefore have been trained
+        using the features in the same order.
+
+        Parameters
+        ----------
+        strds : str, list
+            Name or list of names of GRASS GIS space-time raster datasets. Each
+            dataset must contain the same number of maps.
+
+        static : str, list (opt)
+            Name or list of names of rasters that are used by every timestep.
+
+        where : str (opt)
+            SQL WHERE conditions used to select the maps of the space-time
+            raster datasets.
+
+        resampling : str (opt). Default is 'nearest'
+            Method used to resample rasters that are coarser than the
+            computational region, either 'nearest' or 'bilinear'. See
+            RasterStack.
+
+        Attributes
+        ----------
+        template : list
+            Layers of the stack in feature order. Static layers are raster
+            names, and temporal layers are the lists of raster names of each
+            timestep.
+
+        count : int
+            Number of features.
+
+        n_timesteps : int
+            Number of timesteps.
+        """
+        if isinstance(strds, str):
+            strds = [strds]
+
+        if static is None:
+            static = []
+        elif isinstance(static, str):
+            static = [static]
+
+        maps = [strds_maps(i, where) for i in strds]
+        n_maps = set(len(i) for i in maps)
+
+        if len(n_maps) > 1:
+            gs.fatal(
+                "The space-time raster datasets {0} do not contain the same number "
+                "of maps".format(", ".join(strds))
+            )
+
+        if 0 in n_maps:
+            gs.fatal("No maps were selected from the space-time raster datasets")
+
+        self.resampling = resampling
+        self._set_template(maps + list(static))
+
+    def _set_template(self, template):
+        self.template = template
+        self.count = len(template)
+
+        lengths = [len(i) for i in template if not isinstance(i, str)]
+        self.n_timesteps = lengths[0] if lengths else 1
+
+    @property
+    def _dynamic(self):
+        """Indices of the temporal layers"""
+        return [
+            i for i, layer in enumerate(self.template) if not isinstance(layer, str)
+        ]
+
+    @property
+    def _static(self):
+        """Indices of the static layers"""
+        return [i for i, layer in enumerate(self.template) if isinstance(layer, str)]
+
+    def names(self, timestep=0):
+        """Names of the rasters of a timestep in feature order"""
+        return [
+            layer if isinstance(layer, str) else layer[timestep]
+            for layer in self.template
+        ]
+
+    def timestep(self, timestep):
+        """
+        RasterStack of the rasters of a single timestep
+
+        Parameters
+        ----------
+        timestep : int
+            Index of the timestep.
+
+        Returns
+        -------
+        RasterStack
+        """
+        return RasterStack(rasters=self.names(timestep), resampling=self.resampling)
+
+    def subset(self, indices):
+        """
+        New TemporalRasterStack containing a subset of the features
+
+        Parameters
+        ----------
+        indices : list
+            Indices of the features to retain, in feature order.
+
+        Returns
+        -------
+        TemporalRasterStack
+        """
+        new = TemporalRasterStack.__new__(TemporalRasterStack)
+        new.resampling = self.resampling
+        new._set_template([self.template[i] for i in indices])
+
+        return new
+
+    def output_names(self, output):
+        """Names of the output raster of each timestep, numbered from 1"""
+        width = len(str(self.n_timesteps))
+
+        return [
+            "{0}_{1}".format(output, str(t + 1).zfill(width))
+            for t in range(self.n_timesteps)
+        ]
+
+    def _predict_timesteps(
+        self, estimator, func, indexes, outputs, mtype, nodata, height, overwrite
+    ):
+        """Predict every timestep from a single read of the static layers for
+        each window of rows"""
+        reg = Region()
+        dynamic, static = self._dynamic, self._static
+
+        # static rasters are read once per window and shared by all timesteps
+        static_stack = None
+
+        if static:
+            static_stack = RasterStack(
+                rasters=[self.template[i] for i in static], resampling=self.resampling
+            )
+
+        dynamic_stacks = []
+
+        if dynamic:
+            dynamic_stacks = [
+                RasterStack(
+                    rasters=[self.template[i][t] for i in dynamic],
+                    resampling=self.resampling,
+                )
+                for t in range(self.n_timesteps)
+            ]
+
+        # order that restores the feature order after concatenating the
+        # temporal and static layers
+        order = np.argsort(dynamic + static)
+
+        dst = []
+
+        for names in outputs:
+            dst.append([RasterRow(name) for name in names])
+
+            for d in dst[-1]:
+                d.open("w", mtype=mtype, overwrite=overwrite)
+
+        try:
+            first = static_stack if static_stack is not None else dynamic_stacks[0]
+            windows = list(first.row_windows(height=height))
+
+            for wi, rows in enumerate(windows):
+                gs.percent(wi, len(windows), 1)
+
+                static_data = None
+
+                if static_stack is not None:
+                    static_data = static_stack.read(rows=rows)
+
+                for t in range(self.n_timesteps):
+                    blocks = []
+
+                    if dynamic_stacks:
+                        blocks.append(dynamic_stacks[t].read(rows=rows))
+
+                    if static_data is not None:
+                        blocks.append(static_data)
+
+                    img = np.ma.concatenate(blocks, axis=0)[order]
+                    result = np.ma.filled(func(img, estimator), nodata)
+
+                    for i, arr_index in enumerate(indexes):
+                        for row in range(result.shape[1]):
+                            newrow = Buffer((reg.cols,), mtype=mtype)
+                            newrow[:] = result[arr_index, row, :]
+                            dst[t][i].put_row(newrow)
+        finally:
+            for names in dst:
+                for d in names:
+                    d.close()
+
+        return [RasterStack(names) for names in outputs]
+
+    def predict(self, estimator, output, height=None, overwrite=False, memoize=None):
+        """
+        Predict each timestep of the stack
+
+        Parameters
+        ----------
+        estimator : estimator object implementing 'fit'
+            The fitted estimator.
+
+        output : str
+            Prefix of the output rasters, which are named `output_1`,
+            `output_2` etc. for each timestep.
+
+        height : int (opt)
+            Number of raster rows to pass to estimator at one time. If not
+            specified then the entire region is read at once.
+
+        overwrite : bool (opt). Default is False
+            Option to overwrite existing rasters.
+
+        memoize : int (opt)
+            Whether to only predict the unique pixel values of each window of
+            rows, and the number of predictions to cache across the windows
+            and timesteps. See RasterStack.predict.
+
+        Returns
+        -------
+        list
+            List of a RasterStack of the prediction of each timestep.
+        """
+        if height is None:
+            height = Region().rows
+
+        if memoize is not None:
+            from .ensemble import MemoizedEstimator
+
+            estimator = MemoizedEstimator(estimator, cache_size=memoize)
+
+        mtype, nodata, n_outputs = self.timestep(0).probe_output(estimator)
+
+        if n_outputs > 1:
+            gs.fatal("Multi-output estimators are not supported for time series")
+
+        outputs = [[name] for name in self.output_names(output)]
+
+        return self._predict_timesteps(
+            estimator,
+            RasterStack._pred_fun,
+            [0],
+            outputs,
+            mtype,
+            nodata,
+            height,
+            overwrite,
+        )
+
+    def predict_proba(
+        self,
+        estimator,
+        output,
+        class_labels=None,
+        height=None,
+        overwrite=False,
+        memoize=None,
+    ):
+        """
+        Predict the class probabilities of each timestep of the stack
+
+        Parameters
+        ----------
+        estimator : estimator object implementing 'fit'
+            The fitted estimator.
+
+        output : str
+            Prefix of the output rasters, which are named `output_1_label`,
+            `output_2_label` etc. for each timestep and class.
+
+        class_labels : ndarray (opt)
+            1d array of the class labels that are used to name the outputs.
+            Only the positive class is output for a binary classification.
+
+        height : int (opt)
+            Number of raster rows to pass to estimator at one time. If not
+            specified then the entire region is read at once.
+
+        overwrite : bool (opt). Default is False
+            Option to overwrite existing rasters.
+
+        memoize : int (opt)
+            Whether to only predict the unique pixel values of each window of
+            rows, and the number of predictions to cache across the windows
+            and timesteps. See RasterStack.predict.
+
+        Returns
+        -------
+        list
+            List of a RasterStack of the probabilities of each timestep.
+        """
+        if height is None:
+            height = Region().rows
+
+        if memoize is not None:
+            from .ensemble import MemoizedEstimator
+
+            estimator = MemoizedEstimator(estimator, cache_size=memoize)
+
+        # use class labels if supplied else output preds as 0,1,2...n
+        if class_labels is None:
+            stack = self.timestep(0)
+            img = stack.read(rows=next(stack.row_windows(height=1)))
+            result = RasterStack._prob_fun(img, estimator)
+            class_labels = range(result.shape[0])
+
+        # only output positive class if result is binary
+        if len(class_labels) == 2:
+            class_labels, indexes = [max(class_labels)], [1]
+        else:
+            indexes = np.arange(0, len(class_labels), 1)
+
+        outputs = [
+            [name + "_" + str(label) for label in class_labels]
+            for name in self.output_names(output)
+        ]
+
+        return self._predict_timesteps(
+            estimator,
+            RasterStack._prob_fun,
+            indexes,
+            outputs,
+            "FCELL",
+            np.nan,
+            height,
+            overwrite,
+        )
@@ -1,29 +1,244 @@
-import importlib
+try:
+    from collections.abc import Mapping
+
+except ImportError:
+    from collections import Mapping
 
 import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
+
+
+class CategoryEncoder(BaseEstimator, TransformerMixin):
+    """Transformer to encode GRASS GIS category labels into integer labels
+
+    The category values and labels are stored as sorted numpy arrays so that
+    the encoding is performed using vectorized lookups. Integer category
+    values that span a bounded range use a dense lookup table, otherwise the
+    values are located using a binary search.
 
+    Attributes
+    ----------
+    codes_ : ndarray
+        Sorted category values, set by fit.
 
-class ImportSklearnModule():
-    """Lazy import of 'sklearn' module"""
-    sklearn_base = importlib.import_module('sklearn.base')
+    categories_ : ndarray
+        Unique category labels in the order that they first appear, set by
+        fit.
+    """
 
+    # maximum number of elements in the dense lookup table
+    max_table_size = 1000000
 
-class CategoryEncoder(ImportSklearnModule.sklearn_base.BaseEstimator,
-                      ImportSklearnModule.sklearn_base.TransformerMixin):
-    """Transformer to encode GRASS GIS category labels into integer labels"""
     def __init__(self):
-        self._encoding = None
-        self._inverse = None
+        pass
 
     def fit(self, X, y = None):
-        self._encoding = {value: label for (label, value, mtype) in X}
-        self._inverse = {label: value for (label, value, mtype) in X}
+        """Fit the encoder to a set of GRASS GIS categories
+
+        Parameters
+        ----------
+        X : list, dict
+            List of (label, value, mtype) tuples such as the categories
+            returned from grass.pygrass.raster.RasterRow.cats, or a dict of
+            category values (keys) and labels (values).
+        """
+        import pandas as pd
+
+        if isinstance(X, Mapping):
+            pairs = [(label, value) for (value, label) in X.items()]
+        else:
+            pairs = [(label, value) for (label, value, mtype) in X]
+
+        values = np.asarray([value for (label, value) in pairs])
+        labels = np.empty(len(pairs), dtype=object)
+        labels[:] = [label for (label, value) in pairs]
+
+        # sort the category values, the last label for a duplicated value wins
+        codes, idx = np.unique(values[::-1], return_index=True)
+        labels = labels[::-1][idx]
+
+        self.codes_ = codes
+        self._label_idx, self.categories_ = pd.factorize(labels)
+        self.categories_ = np.asarray(self.categories_, dtype=object)
+
+        self._inverse = np.empty(len(self.categories_), dtype=codes.dtype)
+        self._inverse[self._label_idx] = codes
+
+        # dense lookup table for bounded integer category values
+        self._table = None
+        self._offset = None
+
+        if codes.shape[0] > 0 and codes.dtype.kind in "iu":
+            span = int(codes.max()) - int(codes.min()) + 1
+
+            if span <= self.max_table_size:
+                self._offset = int(codes.min())
+                self._table = np.full(span, -1, dtype=np.int64)
+                self._table[codes - self._offset] = self._label_idx
+
         return self
 
+    def _positions(self, X):
+        """Return the index of each category value in X within the labels"""
+        check_is_fitted(self)
+        X = np.asarray(X)
+
+        if self._table is not None and X.dtype.kind in "iuf":
+            idx = X.astype(np.int64) - self._offset
+            valid = (
+                (idx >= 0) & (idx < self._table.shape[0]) & (idx == X - self._offset)
+            )
+            pos = np.full(X.shape, -1, dtype=np.int64)
+            pos[valid] = self._table[idx[valid]]
+
+        elif self.codes_.shape[0] > 0:
+            pos = np.searchsorted(self.codes_, X)
+            pos = np.minimum(pos, self.codes_.shape[0] - 1)
+            pos = np.where(self.codes_[pos] == X, self._label_idx[pos], -1)
+
+        else:
+            pos = np.full(X.shape, -1, dtype=np.int64)
+
+        if (pos == -1).any():
+            missing = np.unique(X[pos == -1])
+            raise ValueError(
+                "Values {0} are not present in the categories".format(missing.tolist())
+            )
+
+        return pos
+
     def transform(self, X, y = None):
-        """Takes integer values and returns the category label"""
-        return np.asarray([self._encoding[x] for x in X]).astype(np.object)
+        """Takes integer values and returns the category labels as a
+        pandas.Categorical"""
+        import pandas as pd
+
+        return pd.Categorical.from_codes(
+            self._positions(X), categories=self.categories_
+        )
 
     def inverse_transform(self, X, y = None):
-        """Takes a category label and returns the category index"""
-        return np.asarray([self._inverse[x] for x in X]).astype(np.object)
+        """Takes category labels and returns the category values"""
+        import pandas as pd
+
+        check_is_fitted(self)
+        codes = pd.Index(self.categories_).get_indexer(np.asarray(X, dtype=object))
+
+        if (codes == -1).any():
+            raise ValueError("Labels are not present in the categories")
+
+        return self._inverse[codes]
+
+    def category_rules(self, separator=","):
+        """Returns the categories as a rules string for r.category"""
+        check_is_fitted(self)
+
+        return "\n".join(
+            separator.join([str(value), str(label)])
+            for value, label in zip(self.codes_, self.categories_[self._label_idx])
+        )
+
+
+class StackPCA(BaseEstimator, TransformerMixin):
+    """Principal components transformation of raster layers
+
+    The components can be computed from the mean and covariance matrix of all
+    of the pixels in a RasterStack, such as those returned by
+    RasterStack.moments, or otherwise from the training data that is passed
+    to `fit`. Because the transformation is a step of the model pipeline, it
+    is applied to each window of data during prediction and no component
+    rasters are written.
+
+    Parameters
+    ----------
+    n_components : int (opt)
+        Number of components to retain. Defaults to all components.
+
+    whiten : bool (opt). Default is False
+        Whether to scale the components to unit variance.
+
+    standardize : bool (opt). Default is False
+        Whether to scale the layers to unit variance before the
+        transformation, i.e. to use the correlation matrix.
+
+    mean : ndarray (opt)
+        1d array of the mean of each layer.
+
+    covariance : ndarray (opt)
+        2d covariance matrix of the layers. If supplied together with `mean`,
+        the training data are not used to fit the transformation.
+    """
+
+    def __init__(
+        self,
+        n_components=None,
+        whiten=False,
+        standardize=False,
+        mean=None,
+        covariance=None,
+    ):
+        self.n_components = n_components
+        self.whiten = whiten
+        self.standardize = standardize
+        self.mean = mean
+        self.covariance = covariance
+
+    def fit(self, X, y=None):
+        """Compute the principal components
+
+        Parameters
+        ----------
+        X : ndarray
+            2d array of training data with the dimensions of
+            (n_samples, n_features). Ignored if the mean and covariance
+            were supplied.
+        """
+        if self.mean is not None and self.covariance is not None:
+            mean = np.asarray(self.mean, dtype=np.float64)
+            cov = np.asarray(self.covariance, dtype=np.float64)
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            mean = X.mean(axis=0)
+            cov = np.atleast_2d(np.cov(X, rowvar=False))
+
+        scale = np.sqrt(np.diag(cov)) if self.standardize is True else None
+
+        if scale is not None:
+            scale[scale == 0] = 1.0
+            cov = cov / np.outer(scale, scale)
+
+        values, vectors = np.linalg.eigh(cov)
+        order = np.argsort(values)[::-1]
+        values, vectors = np.clip(values[order], 0, None), vectors[:, order]
+
+        # deterministic signs, with the largest loading of each component positive
+        largest = np.argmax(np.abs(vectors), axis=0)
+        vectors = vectors * np.sign(vectors[largest, range(len(values))])
+
+        n = len(values) if self.n_components is None else self.n_components
+
+        self.mean_ = mean
+        self.scale_ = scale
+        self.components_ = vectors[:, :n].T
+        self.explained_variance_ = values[:n]
+        self.explained_variance_ratio_ = values[:n] / values.sum()
+
+        return self
+
+    def transform(self, X, y=None):
+        """Project the data onto the principal components, which are returned
+        in single precision if the data is single precision"""
+        X = np.asarray(X)
+        dtype = np.result_type(X.dtype, np.float32)
+        X = X.astype(np.float64) - self.mean_
+
+        if self.scale_ is not None:
+            X = X / self.scale_
+
+        Xt = X @ self.components_.T
+
+        if self.whiten is True:
+            variance = self.explained_variance_
+            Xt /= np.sqrt(np.where(variance > 0, variance, 1))
+
+        return Xt.astype(dtype, copy=False)
@@ -14,10 +14,10 @@ import sqlite3
 import tempfile
 from grass.pygrass.modules.shortcuts import database as db
 from grass.pygrass.modules.shortcuts import vector as gvect
-from grass.pygrass.modules.shortcuts import raster as grast
 from grass.pygrass.modules.shortcuts import general as g
+from grass.pygrass.raster import RasterRow
+from grass.pygrass.raster.buffer import Buffer
 from grass.pygrass.vector import VectorTopo
-from grass.pygrass.vector.geometry import Point
 
 
 def option_to_list(x, dtype=None):
@@ -57,207 +57,248 @@ def option_to_list(x, dtype=None):
     return x
 
 
-def predefined_estimators(estimator, random_state, n_jobs, p):
-    """
-    Provides the classifiers and parameters using by the module
-
-    Parameters
-    -----------
-    estimator : str
-        Name of scikit learn estimator.
+def _forest(p, random_state, n_jobs, **kwargs):
+    """Parameters shared by the random forest and extra trees estimators"""
+    return dict(
+        n_estimators=p["n_estimators"],
+        max_features=p["max_features"],
+        min_samples_leaf=p["min_samples_leaf"],
+        random_state=random_state,
+        n_jobs=n_jobs,
+        oob_score=True,
+        **kwargs
+    )
 
-    random_state : Any number
-        Seed to use in randomized components.
-    
-    n_jobs : int
-        Number of processing cores to use.
-    
-    p : dict
-        Classifier setttings (keys) and values.
 
-    Returns
-    -------
-    clf : object
-        Scikit-learn classifier object
+def _boosting(p, random_state, n_jobs):
+    """Parameters shared by the gradient boosting estimators"""
+    return dict(
+        learning_rate=p["learning_rate"],
+        n_estimators=p["n_estimators"],
+        max_depth=p["max_depth"],
+        min_samples_leaf=p["min_samples_leaf"],
+        subsample=p["subsample"],
+        max_features=p["max_features"],
+        random_state=random_state,
+    )
 
-    mode : str
-        Flag to indicate whether classifier performs classification or regression.
-    """
-    try:
-        from sklearn.experimental import enable_hist_gradient_boosting
-    except ImportError:
-        pass
 
-    from sklearn.linear_model import (
-        LogisticRegression,
-        LinearRegression,
-        SGDRegressor,
-        SGDClassifier,
-    )
-    from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
-    from sklearn.discriminant_analysis import QuadraticDiscriminantAnalysis
-    from sklearn.naive_bayes import GaussianNB
-    from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
-    from sklearn.ensemble import (
-        RandomForestClassifier,
-        RandomForestRegressor,
-        ExtraTreesClassifier,
-        ExtraTreesRegressor,
-    )
-    from sklearn.ensemble import GradientBoostingClassifier, GradientBoostingRegressor
-    from sklearn.svm import SVC, SVR
-    from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
-    from sklearn.neural_network import MLPClassifier, MLPRegressor
-
-    estimators = {
-        "SVC": SVC(C=p["C"], probability=True, random_state=random_state),
-        "SVR": SVR(C=p["C"], epsilon=p["epsilon"]),
-        "LogisticRegression": LogisticRegression(
+# registry of estimator names and (module, class, mode, parameter factory) so
+# that only the module of the selected estimator is imported
+ESTIMATORS = {
+    "SVC": (
+        "sklearn.svm",
+        "SVC",
+        "classification",
+        lambda p, rs, nj: dict(C=p["C"], probability=True, random_state=rs),
+    ),
+    "SVR": (
+        "sklearn.svm",
+        "SVR",
+        "regression",
+        lambda p, rs, nj: dict(C=p["C"], epsilon=p["epsilon"]),
+    ),
+    "LogisticRegression": (
+        "sklearn.linear_model",
+        "LogisticRegression",
+        "classification",
+        lambda p, rs, nj: dict(
             C=p["C"],
             solver="liblinear",
-            random_state=random_state,
+            random_state=rs,
             multi_class="auto",
             n_jobs=1,
             fit_intercept=True,
         ),
-        "LinearRegression": LinearRegression(n_jobs=n_jobs, fit_intercept=True),
-        "SGDClassifier": SGDClassifier(
+    ),
+    "LinearRegression": (
+        "sklearn.linear_model",
+        "LinearRegression",
+        "regression",
+        lambda p, rs, nj: dict(n_jobs=nj, fit_intercept=True),
+    ),
+    "SGDClassifier": (
+        "sklearn.linear_model",
+        "SGDClassifier",
+        "classification",
+        lambda p, rs, nj: dict(
             penalty=p["penalty"],
             alpha=p["alpha"],
             l1_ratio=p["l1_ratio"],
-            n_jobs=n_jobs,
-            random_state=random_state,
+            n_jobs=nj,
+            random_state=rs,
         ),
-        "SGDRegressor": SGDRegressor(
+    ),
+    "SGDRegressor": (
+        "sklearn.linear_model",
+        "SGDRegressor",
+        "regression",
+        lambda p, rs, nj: dict(
             penalty=p["penalty"],
             alpha=p["alpha"],
             l1_ratio=p["l1_ratio"],
-            random_state=random_state,
-        ),
-        "DecisionTreeClassifier": DecisionTreeClassifier(
-            max_depth=p["max_depth"],
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-        ),
-        "DecisionTreeRegressor": DecisionTreeRegressor(
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-        ),
-        "RandomForestClassifier": RandomForestClassifier(
-            n_estimators=p["n_estimators"],
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-            n_jobs=n_jobs,
-            oob_score=True,
+            random_state=rs,
         ),
-        "RandomForestRegressor": RandomForestRegressor(
-            n_estimators=p["n_estimators"],
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-            n_jobs=n_jobs,
-            oob_score=True,
-        ),
-        "ExtraTreesClassifier": ExtraTreesClassifier(
-            n_estimators=p["n_estimators"],
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-            n_jobs=n_jobs,
-            bootstrap=True,
-            oob_score=True,
-        ),
-        "ExtraTreesRegressor": ExtraTreesRegressor(
-            n_estimators=p["n_estimators"],
-            max_features=p["max_features"],
-            min_samples_leaf=p["min_samples_leaf"],
-            random_state=random_state,
-            bootstrap=True,
-            n_jobs=n_jobs,
-            oob_score=True,
-        ),
-        "GradientBoostingClassifier": GradientBoostingClassifier(
-            learning_rate=p["learning_rate"],
-            n_estimators=p["n_estimators"],
+    ),
+    "DecisionTreeClassifier": (
+        "sklearn.tree",
+        "DecisionTreeClassifier",
+        "classification",
+        lambda p, rs, nj: dict(
             max_depth=p["max_depth"],
-            min_samples_leaf=p["min_samples_leaf"],
-            subsample=p["subsample"],
             max_features=p["max_features"],
-            random_state=random_state,
-        ),
-        "GradientBoostingRegressor": GradientBoostingRegressor(
-            learning_rate=p["learning_rate"],
-            n_estimators=p["n_estimators"],
-            max_depth=p["max_depth"],
             min_samples_leaf=p["min_samples_leaf"],
-            subsample=p["subsample"],
-            max_features=p["max_features"],
-            random_state=random_state,
+            random_state=rs,
         ),
-        "HistGradientBoostingClassifier": GradientBoostingClassifier(
-            learning_rate=p["learning_rate"],
-            n_estimators=p["n_estimators"],
-            max_depth=p["max_depth"],
-            min_samples_leaf=p["min_samples_leaf"],
-            subsample=p["subsample"],
+    ),
+    "DecisionTreeRegressor": (
+        "sklearn.tree",
+        "DecisionTreeRegressor",
+        "regression",
+        lambda p, rs, nj: dict(
             max_features=p["max_features"],
-            random_state=random_state,
-        ),
-        "HistGradientBoostingRegressor": GradientBoostingRegressor(
-            learning_rate=p["learning_rate"],
-            n_estimators=p["n_estimators"],
-            max_depth=p["max_depth"],
             min_samples_leaf=p["min_samples_leaf"],
-            subsample=p["subsample"],
-            max_features=p["max_features"],
-            random_state=random_state,
+            random_state=rs,
         ),
-        "MLPClassifier": MLPClassifier(
+    ),
+    "RandomForestClassifier": (
+        "sklearn.ensemble",
+        "RandomForestClassifier",
+        "classification",
+        _forest,
+    ),
+    "RandomForestRegressor": (
+        "sklearn.ensemble",
+        "RandomForestRegressor",
+        "regression",
+        _forest,
+    ),
+    "ExtraTreesClassifier": (
+        "sklearn.ensemble",
+        "ExtraTreesClassifier",
+        "classification",
+        lambda p, rs, nj: _forest(p, rs, nj, bootstrap=True),
+    ),
+    "ExtraTreesRegressor": (
+        "sklearn.ensemble",
+        "ExtraTreesRegressor",
+        "regression",
+        lambda p, rs, nj: _forest(p, rs, nj, bootstrap=True),
+    ),
+    "GradientBoostingClassifier": (
+        "sklearn.ensemble",
+        "GradientBoostingClassifier",
+        "classification",
+        _boosting,
+    ),
+    "GradientBoostingRegressor": (
+        "sklearn.ensemble",
+        "GradientBoostingRegressor",
+        "regression",
+        _boosting,
+    ),
+    "HistGradientBoostingClassifier": (
+        "sklearn.ensemble",
+        "GradientBoostingClassifier",
+        "classification",
+        _boosting,
+    ),
+    "HistGradientBoostingRegressor": (
+        "sklearn.ensemble",
+        "GradientBoostingRegressor",
+        "regression",
+        _boosting,
+    ),
+    "MLPClassifier": (
+        "sklearn.neural_network",
+        "MLPClassifier",
+        "classification",
+        lambda p, rs, nj: dict(
             hidden_layer_sizes=p["hidden_layer_sizes"],
             alpha=p["alpha"],
-            random_state=random_state,
+            random_state=rs,
         ),
-        "MLPRegressor": MLPRegressor(
+    ),
+    "MLPRegressor": (
+        "sklearn.neural_network",
+        "MLPRegressor",
+        "regression",
+        lambda p, rs, nj: dict(
             hidden_layer_sizes=p["hidden_layer_sizes"],
             alpha=p["alpha"],
-            random_state=random_state,
+            random_state=rs,
         ),
-        "GaussianNB": GaussianNB(),
-        "LinearDiscriminantAnalysis": LinearDiscriminantAnalysis(),
-        "QuadraticDiscriminantAnalysis": QuadraticDiscriminantAnalysis(),
-        "KNeighborsClassifier": KNeighborsClassifier(
-            n_neighbors=p["n_neighbors"], weights=p["weights"], n_jobs=n_jobs
+    ),
+    "GaussianNB": (
+        "sklearn.naive_bayes",
+        "GaussianNB",
+        "classification",
+        lambda p, rs, nj: dict(),
+    ),
+    "LinearDiscriminantAnalysis": (
+        "sklearn.discriminant_analysis",
+        "LinearDiscriminantAnalysis",
+        "classification",
+        lambda p, rs, nj: dict(),
+    ),
+    "QuadraticDiscriminantAnalysis": (
+        "sklearn.discriminant_analysis",
+        "QuadraticDiscriminantAnalysis",
+        "classification",
+        lambda p, rs, nj: dict(),
+    ),
+    "KNeighborsClassifier": (
+        "sklearn.neighbors",
+        "KNeighborsClassifier",
+        "classification",
+        lambda p, rs, nj: dict(
+            n_neighbors=p["n_neighbors"], weights=p["weights"], n_jobs=nj
         ),
-        "KNeighborsRegressor": KNeighborsRegressor(
-            n_neighbors=p["n_neighbors"], weights=p["weights"], n_jobs=n_jobs
+    ),
+    "KNeighborsRegressor": (
+        "sklearn.neighbors",
+        "KNeighborsRegressor",
+        "regression",
+        lambda p, rs, nj: dict(
+            n_neighbors=p["n_neighbors"], weights=p["weights"], n_jobs=nj
         ),
-    }
+    ),
+}
 
-    # define classifier
-    model = estimators[estimator]
-
-    # classification or regression
-    if (
-        estimator == "LogisticRegression"
-        or estimator == "SGDClassifier"
-        or estimator == "MLPClassifier"
-        or estimator == "DecisionTreeClassifier"
-        or estimator == "RandomForestClassifier"
-        or estimator == "ExtraTreesClassifier"
-        or estimator == "GradientBoostingClassifier"
-        or estimator == "HistGradientBoostingClassifier"
-        or estimator == "GaussianNB"
-        or estimator == "LinearDiscriminantAnalysis"
-        or estimator == "QuadraticDiscriminantAnalysis"
-        or estimator == "SVC"
-        or estimator == "KNeighborsClassifier"
-    ):
-        mode = "classification"
-    else:
-        mode = "regression"
+
+def predefined_estimators(estimator, random_state, n_jobs, p):
+    """
+    Provides the classifiers and parameters using by the module
+
+    Only the scikit-learn module of the selected estimator is imported.
+
+    Parameters
+    -----------
+    estimator : str
+        Name of scikit learn estimator.
+
+    random_state : Any number
+        Seed to use in randomized components.
+    
+    n_jobs : int
+        Number of processing cores to use.
+    
+    p : dict
+        Classifier setttings (keys) and values.
+
+    Returns
+    -------
+    clf : object
+        Scikit-learn classifier object
+
+    mode : str
+        Flag to indicate whether classifier performs classification or regression.
+    """
+    import importlib
+
+    module, name, mode, params = ESTIMATORS[estimator]
+    model = getattr(importlib.import_module(module), name)
+    model = model(**params(p, random_state, n_jobs))
 
     return (model, mode)
 
@@ -323,6 +364,57 @@ def scoring_metrics(mode):
     return (scoring, search_scorer)
 
 
+class TransformCache(object):
+    """
+    Disk-based cache of the fitted preprocessing steps of a Pipeline
+
+    The cache can be passed as the `memory` parameter of a
+    sklearn.pipeline.Pipeline. The fitted transformers and transformed data
+    are stored for each unique combination of transformer parameters and
+    training rows, so that a fold's transformation is computed once and then
+    reused by every hyperparameter candidate that is fitted on that fold. The
+    cache is stored on disk so that it is shared between worker processes.
+
+    Parameters
+    ----------
+    location : str
+        Path to a directory to store the cache.
+
+    bytes_limit : int (opt)
+        Maximum size of the cache in bytes. The least recently accessed items
+        are removed when the cache exceeds this size.
+    """
+
+    def __init__(self, location, bytes_limit=None):
+        import joblib
+
+        self.location = location
+        self.bytes_limit = bytes_limit
+        self.memory = joblib.Memory(location=location, verbose=0)
+
+    def reduce_size(self):
+        """Remove the least recently accessed items exceeding the size limit"""
+        if self.bytes_limit is None:
+            return
+
+        try:
+            self.memory.reduce_size(bytes_limit=self.bytes_limit)
+        except TypeError:
+            # joblib < 1.3 sets the limit on the Memory object
+            self.memory.bytes_limit = self.bytes_limit
+            self.memory.reduce_size()
+
+    def cache(self, func=None, **kwargs):
+        cached = self.memory.cache(func, **kwargs)
+
+        def func_with_eviction(*args, **kwargs):
+            result = cached(*args, **kwargs)
+            self.reduce_size()
+            return result
+
+        return func_with_eviction
+
+
 def save_training_data(file, X, y, cat, class_labels=None, groups=None, names=None):
     """
     Saves any extracted training data to a csv file.
@@ -370,7 +462,9 @@ def save_training_data(file, X, y, cat, class_labels=None, groups=None, names=No
         groups[:] = np.nan
 
     if class_labels:
-        labels_arr = np.asarray([class_labels[yi] for yi in y]).astype(np.object)
+        from .transformers import CategoryEncoder
+
+        labels_arr = CategoryEncoder().fit(class_labels).transform(y)
     else:
         labels_arr = np.empty((y.shape[0]))
         labels_arr[:] = np.nan
@@ -394,7 +488,7 @@ def load_training_data(file):
 
     Returns
     -------
-    X (2d numpy array): Numpy array containing predictor values
+    X (2d numpy array): Numpy float32 array containing predictor values
     y (1d numpy array): Numpy array containing labels
     cat (1d numpy array): Numpy array of GRASS key column
     class_labels (1d numpy array): Numpy array of labels
@@ -417,11 +511,240 @@ def load_training_data(file):
 
     cat = training_data.cat.values.astype(np.int64)
     y = training_data.response.values
-    X = training_data.drop(columns=["groups", "class_labels", "cat", "response"]).values
+    X = training_data.drop(columns=["groups", "class_labels", "cat", "response"])
+    X = X.to_numpy(dtype=np.float32, na_value=np.nan)
 
     return (X, y, cat, class_labels, groups)
 
 
+def _row_bytes(arr):
+    """Raw bytes of each row of an array, as a 2d uint8 array"""
+    arr = np.asarray(arr)
+
+    if arr.dtype == object:
+        arr = np.unique(arr.astype(str), return_inverse=True)[1]
+
+    arr = np.ascontiguousarray(arr.reshape(arr.shape[0], -1))
+
+    return arr.view(np.uint8).reshape(arr.shape[0], -1)
+
+
+def compress_duplicates(X, y, cat, groups=None):
+    """
+    Collapse identical training samples into unique samples and their counts
+
+    Samples are identical if they have the same feature values, response and
+    group label. Each unique sample keeps the cat value of its first
+    occurrence, and the samples remain in the order of their first occurrence.
+
+    Parameters
+    ----------
+    X : ndarray
+        2d numpy array containing predictor values
+
+    y : ndarray
+        1d numpy array containing labels
+
+    cat : ndarray
+        1d numpy array of GRASS key column
+
+    groups : ndarray (opt)
+        1d numpy array containing group labels
+
+    Returns
+    -------
+    tuple
+        Tuple of X, y, cat and groups of the unique samples, and a 1d array
+        of the number of samples that each unique sample represents, which is
+        used as the sample_weight when fitting.
+    """
+    arrays = [X, y] if groups is None else [X, y, groups]
+    raw = np.ascontiguousarray(np.hstack([_row_bytes(i) for i in arrays]))
+    keys = raw.view(np.dtype((np.void, raw.shape[1]))).ravel()
+
+    _, index, counts = np.unique(keys, return_index=True, return_counts=True)
+    order = np.argsort(index)
+    index, counts = index[order], counts[order]
+
+    if groups is not None:
+        groups = groups[index]
+
+    return X[index], y[index], cat[index], groups, counts.astype(np.float64)
+
+
+def model_metadata(
+    model_name,
+    mode,
+    y,
+    class_labels,
+    stack,
+    region=None,
+    timings=None,
+    group_features=None,
+    dtype="float32",
+):
+    """
+    Summary of a fitted model that is stored alongside the estimator
+
+    Parameters
+    ----------
+    model_name : str
+        Name of the estimator.
+
+    mode : str
+        'classification' or 'regression'.
+
+    y : ndarray
+        1d array of the response variable used to fit the model.
+
+    class_labels : dict
+        Dict of class values (keys) and labels (values), or None.
+
+    stack : RasterStack
+        RasterStack of the features that were used to fit the model. Any focal
+        features, virtual layers and distance fields of the stack follow the
+        rasters in the features.
+
+    region : grass.pygrass.gis.region.Region (opt)
+        Computational region that was used to extract the training data.
+
+    timings : dict (opt)
+        Dict of stage names (keys) and the elapsed time in seconds.
+
+    group_features : list (opt)
+        Names of all of the rasters in the imagery group if the model uses a
+        subset of them after feature selection. Defaults to the rasters in the
+        stack.
+
+    dtype : str (opt). Default is 'float32'
+        Data type of the features that the model was fitted with, which is
+        also the data type of the windows that are read for prediction.
+
+    Returns
+    -------
+    dict
+    """
+    import sklearn
+
+    if region is not None:
+        keys = ["north", "south", "east", "west", "nsres", "ewres", "rows", "cols"]
+        region = {k: getattr(region, k) for k in keys}
+
+    if group_features is None:
+        group_features = stack.names
+
+    focal = getattr(stack, "focal", [])
+    virtual = getattr(stack, "virtual", [])
+    distance = getattr(stack, "distance", [])
+    derived = (
+        [f.name for f in focal]
+        + [v.name for v in virtual]
+        + [name for name, _ in distance]
+    )
+
+    return {
+        "model_name": model_name,
+        "mode": mode,
+        "classes": np.unique(y) if mode == "classification" else None,
+        "class_labels": class_labels,
+        "features": list(stack.names) + derived,
+        "dtypes": [stack.mtypes[n] for n in stack.names] + ["FCELL"] * len(derived),
+        "focal": [vars(f) for f in focal],
+        "virtual": [v.to_dict() for v in virtual],
+        "distance": [[name, list(p)] for name, p in distance],
+        "group_features": list(group_features),
+        "feature_indices": [list(group_features).index(n) for n in stack.names],
+        "region": region,
+        "timings": timings if timings is not None else {},
+        "dtype": str(dtype),
+        "sklearn_version": sklearn.__version__,
+    }
+
+
+def save_model(file, estimator, metadata):
+    """
+    Save a fitted estimator and its metadata to a file
+
+    The numpy arrays within the estimator are stored uncompressed, unless a
+    compressed file extension such as '.gz' is used, so that they can be
+    memory-mapped when the model is loaded.
+
+    Parameters
+    ----------
+    file : str
+        Path to the file.
+
+    estimator : estimator object
+        Fitted scikit-learn estimator.
+
+    metadata : dict
+        Metadata of the model, see `model_metadata`.
+    """
+    import joblib
+
+    joblib.dump({"metadata": metadata, "estimator": estimator}, file)
+
+
+def load_model(file, mmap_mode="r"):
+    """
+    Load a fitted estimator and its metadata from a file
+
+    Models saved by previous versions as a tuple of (estimator, y,
+    class_labels), and bare pickled estimators, are also supported, in which
+    case the metadata is derived from the response values or from the
+    estimator.
+
+    Parameters
+    ----------
+    file : str
+        Path to the file.
+
+    mmap_mode : str (opt). Default is 'r'
+        Memory-map the numpy arrays within an uncompressed model so that
+        several processes share a single copy through the page cache. None
+        reads the arrays into memory.
+
+    Returns
+    -------
+    estimator : estimator object
+        Fitted scikit-learn estimator.
+
+    metadata : dict
+        Metadata of the model.
+    """
+    import warnings
+    import joblib
+    from sklearn.base import is_classifier
+
+    # compressed models cannot be memory-mapped and are read into memory
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        model = joblib.load(file, mmap_mode=mmap_mode)
+
+    if isinstance(model, tuple):
+        estimator, y, class_labels = model
+        metadata = {
+            "mode": "classification" if is_classifier(estimator) else "regression",
+            "classes": np.unique(y),
+            "class_labels": class_labels,
+            "features": None,
+            "dtypes": None,
+        }
+        return estimator, metadata
+
+    if not isinstance(model, dict):
+        metadata = {
+            "mode": "classification" if is_classifier(model) else "regression",
+            "classes": getattr(model, "classes_", None),
+            "class_labels": None,
+            "features": None,
+            "dtypes": None,
+        }
+        return model, metadata
+
+    return model["estimator"], model["metadata"]
+
+
 def grass_read_vect_sql(vect):
     """
     Read a GRASS GIS vector map containing point geometries into a geopandas
@@ -568,10 +891,119 @@ def grass_write_vect(gpdf, output, overwrite=False, flags=""):
     gvect.in_ogr(input=temp_out, output=output, overwrite=overwrite, flags=flags)
 
 
-def euclidean_distance_fields(prefix, region, overwrite=False):
+def _cell_centres(region, x, y):
+    """Coordinates of the centres of the cells of a region that contain the
+    x, y coordinates, with coordinates outside of the region being clipped to
+    the edge cells"""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+
+    cols = np.clip(np.floor((x - region.west) / region.ewres), 0, region.cols - 1)
+    rows = np.clip(np.floor((region.north - y) / region.nsres), 0, region.rows - 1)
+
+    return (
+        region.west + (cols + 0.5) * region.ewres,
+        region.north - (rows + 0.5) * region.nsres,
+    )
+
+
+def distance_field_points(region):
+    """
+    Coordinates of the map corner and centre points used to generate
+    euclidean distance fields
+
+    The points are located at the centres of the cells that contain the
+    corners and the centre of the region, so that the distances are the same
+    as those of a rasterized point
+
+    Parameters
+    ----------
+    region : grass.pygrass.gis.region.Region
+        Region
+
+    Returns
+    -------
+    points : dict
+        Dict of point names (keys) and (x, y) coordinate tuples (values)
+    """
+
+    x = [region.west, region.east, region.west, region.east]
+    y = [region.north, region.north, region.south, region.south]
+
+    x.append(region.west + (region.east - region.west) / 2)
+    y.append(region.south + (region.north - region.south) / 2)
+
+    x, y = _cell_centres(region, x, y)
+    names = ["topleft", "topright", "lowerleft", "lowerright", "centre"]
+
+    return {name: (float(x[i]), float(y[i])) for i, name in enumerate(names)}
+
+
+def distance_field_sample(region, point, x, y):
+    """
+    Calculate the euclidean distance from the cell centres at sample locations
+    to a point
+
+    Parameters
+    ----------
+    region : grass.pygrass.gis.region.Region
+        Region
+
+    point : tuple
+        The (x, y) coordinates of the point to calculate distances to.
+
+    x, y : ndarray
+        1d arrays of the coordinates of the samples.
+
+    Returns
+    -------
+    ndarray
+        1d numpy array of the distances in map units.
+    """
+
+    xs, ys = _cell_centres(region, x, y)
+
+    return np.hypot(xs - point[0], ys - point[1])
+
+
+def distance_field_window(region, point, rows):
+    """
+    Calculate the euclidean distance from the cell centres within a window of
+    rows to a point
+
+    Parameters
+    ----------
+    region : grass.pygrass.gis.region.Region
+        Region
+
+    point : tuple
+        The (x, y) coordinates of the point to calculate distances to.
+
+    rows : tuple
+        Tuple of integers representing the start and end numbers of rows
+        in the window.
+
+    Returns
+    -------
+    ndarray
+        2d numpy array with the dimensions of (rows, cols) containing
+        distances in map units.
+    """
+
+    row_start, row_stop = rows
+
+    xs = region.west + (np.arange(region.cols) + 0.5) * region.ewres
+    ys = region.north - (np.arange(row_start, row_stop) + 0.5) * region.nsres
+
+    return np.hypot(xs[np.newaxis, :] - point[0], ys[:, np.newaxis] - point[1])
+
+
+def euclidean_distance_fields(prefix, region, overwrite=False, height=25):
     """
     Generate euclidean distance fields from map corner and centre coordinates
 
+    The distances are calculated directly from the region geometry and
+    written to the output rasters in windows of rows.
+
     Parameters
     ----------
     prefix : str
@@ -582,57 +1014,20 @@ def euclidean_distance_fields(prefix, region, overwrite=False):
 
     overwrite : bool
         Whether to overwrite existing maps
-    """
-
-    point_topleft = Point(
-        region.west + region.ewres / 2, region.north - region.nsres / 2
-    )
-    point_topright = Point(
-        region.east - region.ewres / 2, region.north - region.nsres / 2
-    )
-    point_lowerleft = Point(
-        region.west + region.ewres / 2, region.south + region.nsres / 2
-    )
-    point_lowerright = Point(
-        region.east - region.ewres / 2, region.south + region.nsres / 2
-    )
-    point_centre = Point(
-        region.west + (region.east - region.west) / 2,
-        region.south + (region.north - region.south) / 2,
-    )
-
-    points = {
-        "topleft": point_topleft,
-        "topright": point_topright,
-        "lowerleft": point_lowerleft,
-        "lowerright": point_lowerright,
-        "centre": point_centre,
-    }
 
-    for name, p in points.items():
+    height : int (opt). Default is 25
+        Number of rows to calculate at one time.
+    """
 
-        point_name = "_".join([prefix, name])
+    for name, p in distance_field_points(region).items():
+        rastname = "distance_to_" + "_".join([prefix, name])
 
-        vect = VectorTopo(name=point_name)
-        vect.open(
-            mode="w",
-            tab_name=point_name,
-            tab_cols=[("cat", "INTEGER PRIMARY KEY"), ("name", "TEXT")],
-        )
-        vect.write(p, ("point",))
-        vect.table.conn.commit()
-        vect.close()
-
-        gvect.to_rast(
-            input=point_name,
-            type="point",
-            use="val",
-            output=point_name,
-            overwrite=overwrite,
-        )
-        grast.grow_distance(
-            point_name, distance="distance_to_" + point_name, overwrite=overwrite
-        )
+        with RasterRow(rastname, mode="w", mtype="FCELL", overwrite=overwrite) as dst:
+            for row_start in range(0, region.rows, height):
+                rows = (row_start, min(row_start + height, region.rows))
+                arr = distance_field_window(region, p, rows)
 
-        g.remove(name=point_name, type="raster", flags="f")
-        g.remove(name=point_name, type="raster", flags="f")
+                for i in range(arr.shape[0]):
+                    newrow = Buffer((region.cols,), mtype="FCELL")
+                    newrow[:] = arr[i, :]
+                    dst.put_row(newrow)
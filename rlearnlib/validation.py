@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The validation module contains a cross-validation engine that fits each
+outer fold exactly once, and vectorized scoring functions that compute the
+performance measures of every fold in a single pass over the out-of-fold
+predictions."""
+
+import numpy as np
+
+
+class CrossValidationResult(object):
+    """Results of a cross-validation
+
+    Attributes
+    ----------
+    predictions : ndarray
+        1d array of out-of-fold predictions in the order of the samples.
+
+    probabilities : ndarray or None
+        2d array of out-of-fold class probabilities with the dimensions of
+        (n_samples, n_classes), if requested and supported by the estimator.
+
+    folds : ndarray
+        1d array of the fold index of each sample.
+
+    classes : ndarray or None
+        Sorted class labels for classification.
+
+    estimators : list or None
+        The estimators fitted on each fold, if requested.
+    """
+
+    def __init__(self, predictions, probabilities, folds, classes, estimators):
+        self.predictions = predictions
+        self.probabilities = probabilities
+        self.folds = folds
+        self.classes = classes
+        self.estimators = estimators
+
+
+def _fit_params_subset(fit_params, n_samples, indices):
+    """Index any sample-aligned fit parameters"""
+    subset = {}
+
+    for key, value in fit_params.items():
+        if hasattr(value, "__len__") and len(value) == n_samples:
+            value = np.asarray(value)[indices]
+        subset[key] = value
+
+    return subset
+
+
+def _fit_predict_fold(estimator, X, y, groups, train, test, fit_params, proba):
+    """Fit an estimator on the training partition of a fold and predict the
+    test partition"""
+    fit_params = _fit_params_subset(fit_params, X.shape[0], train)
+
+    if groups is not None and hasattr(estimator, "cv"):
+        estimator.fit(X[train], y[train], groups=groups[train], **fit_params)
+    else:
+        estimator.fit(X[train], y[train], **fit_params)
+
+    pred = estimator.predict(X[test])
+
+    if proba is True:
+        prob = estimator.predict_proba(X[test])
+    else:
+        prob = None
+
+    return estimator, pred, prob
+
+
+def cross_validate_folds(
+    estimator,
+    X,
+    y,
+    cv,
+    groups=None,
+    fit_params=None,
+    predict_proba=False,
+    return_estimators=False,
+    n_jobs=None,
+):
+    """
+    Fit each fold of a cross-validation once and collect the out-of-fold
+    predictions, class probabilities and fold indices
+
+    Parameters
+    ----------
+    estimator : estimator object implementing 'fit'
+        The object to use to fit the data.
+
+    X : ndarray
+        2d array of training data with the dimensions of
+        (n_samples, n_features).
+
+    y : ndarray
+        1d array of the response variable.
+
+    cv : cross-validation generator
+        Cross-validation splitting strategy.
+
+    groups : ndarray (opt)
+        1d array of group labels used while splitting the data into folds.
+
+    fit_params : dict (opt)
+        Parameters to pass to the fit method of the estimator. Sample-aligned
+        parameters such as sample_weight are subset for each fold.
+
+    predict_proba : bool (opt). Default is False
+        Whether to also collect the out-of-fold class probabilities.
+
+    return_estimators : bool (opt). Default is False
+        Whether to keep the fitted estimators of each fold.
+
+    n_jobs : int (opt)
+        Number of folds to fit in parallel.
+
+    Returns
+    -------
+    CrossValidationResult
+    """
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+
+    if fit_params is None:
+        fit_params = {}
+
+    splits = list(cv.split(X, y, groups))
+
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_predict_fold)(
+            clone(estimator), X, y, groups, train, test, fit_params, predict_proba
+        )
+        for train, test in splits
+    )
+
+    folds = np.empty(X.shape[0], dtype=np.int64)
+    predictions = None
+    probabilities = None
+    classes = None
+
+    if predict_proba is True:
+        classes = np.unique(y)
+        probabilities = np.zeros((X.shape[0], classes.shape[0]), dtype=np.float64)
+
+    for fold, ((train, test), (fold_estimator, pred, prob)) in enumerate(
+        zip(splits, fitted)
+    ):
+        folds[test] = fold
+
+        if predictions is None:
+            predictions = np.empty(X.shape[0], dtype=np.asarray(pred).dtype)
+
+        predictions[test] = pred
+
+        # align the probabilities of each fold to the classes of all folds
+        if prob is not None:
+            cols = np.searchsorted(classes, fold_estimator.classes_)
+            probabilities[np.ix_(test, cols)] = prob
+
+    estimators = [i[0] for i in fitted] if return_estimators is True else None
+
+    return CrossValidationResult(predictions, probabilities, folds, classes, estimators)
+
+
+def confusion_matrices(y_true, y_pred, folds, classes=None, sample_weight=None):
+    """
+    Compute a confusion matrix for each fold using a single bincount
+
+    Parameters
+    ----------
+    y_true, y_pred : ndarray
+        1d arrays of the true and predicted labels.
+
+    folds : ndarray
+        1d array of the fold index of each sample.
+
+    classes : ndarray (opt)
+        Sorted class labels. Defaults to the union of y_true and y_pred.
+
+    sample_weight : ndarray (opt)
+        1d array of sample weights.
+
+    Returns
+    -------
+    cm : ndarray
+        3d array with the dimensions of (n_folds, n_classes, n_classes) where
+        the rows are the true classes and the columns are the predictions.
+
+    classes : ndarray
+        Sorted class labels.
+    """
+    if classes is None:
+        classes = np.union1d(y_true, y_pred)
+
+    k = classes.shape[0]
+    n_folds = int(folds.max()) + 1
+    t = np.searchsorted(classes, y_true)
+    p = np.searchsorted(classes, y_pred)
+
+    cm = np.bincount(
+        (folds * k + t) * k + p, weights=sample_weight, minlength=n_folds * k * k
+    )
+
+    return cm.reshape((n_folds, k, k)), classes
+
+
+def classification_scores(cm):
+    """
+    Global classification performance measures for each fold
+
+    Parameters
+    ----------
+    cm : ndarray
+        3d array of confusion matrices with the dimensions of
+        (n_folds, n_classes, n_classes).
+
+    Returns
+    -------
+    dict
+        Dict of metric names (keys) and 1d arrays of the score for each fold.
+    """
+    n = cm.sum(axis=(1, 2))
+    correct = np.trace(cm, axis1=1, axis2=2)
+    t_sum = cm.sum(axis=2)
+    p_sum = cm.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = np.diagonal(cm, axis1=1, axis2=2) / t_sum
+        balanced = np.nanmean(np.where(t_sum > 0, recall, np.nan), axis=1)
+
+        po = correct / n
+        pe = (t_sum * p_sum).sum(axis=1) / n ** 2
+        kappa = (po - pe) / (1 - pe)
+
+        cov_ytyp = correct * n - (t_sum * p_sum).sum(axis=1)
+        cov_ypyp = n ** 2 - (p_sum ** 2).sum(axis=1)
+        cov_ytyt = n ** 2 - (t_sum ** 2).sum(axis=1)
+        mcc = cov_ytyp / np.sqrt(cov_ytyt * cov_ypyp)
+
+    return {
+        "accuracy": po,
+        "balanced_accuracy": balanced,
+        "matthews_correlation_coefficient": np.nan_to_num(mcc),
+        "kappa": kappa,
+    }
+
+
+def regression_scores(y_true, y_pred, folds, sample_weight=None):
+    """
+    Global regression performance measures for each fold
+
+    The sums that are required by each metric are computed for all folds at
+    once using bincounts.
+
+    Parameters
+    ----------
+    y_true, y_pred : ndarray
+        1d arrays of the true and predicted values.
+
+    folds : ndarray
+        1d array of the fold index of each sample.
+
+    sample_weight : ndarray (opt)
+        1d array of sample weights.
+
+    Returns
+    -------
+    dict
+        Dict of metric names (keys) and 1d arrays of the score for each fold.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = y_true - np.asarray(y_pred, dtype=np.float64)
+
+    w = np.ones(y_true.shape[0]) if sample_weight is None else sample_weight
+
+    def fold_sum(values):
+        return np.bincount(folds, weights=values * w)
+
+    n = np.bincount(folds, weights=w)
+    sum_y, sum_y2 = fold_sum(y_true), fold_sum(y_true ** 2)
+    sum_e, sum_e2 = fold_sum(err), fold_sum(err ** 2)
+    sum_abs_e = fold_sum(np.abs(err))
+
+    var_y = sum_y2 / n - (sum_y / n) ** 2
+    var_e = sum_e2 / n - (sum_e / n) ** 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = 1 - (sum_e2 / n) / var_y
+        explained = 1 - var_e / var_y
+
+    return {
+        "r2": r2,
+        "explained_variance": explained,
+        "mean_absolute_error": sum_abs_e / n,
+        "mean_squared_error": sum_e2 / n,
+    }
+
+
+def classification_report(cm, classes):
+    """
+    Per-class precision, recall, f1-score and support from a confusion matrix
+
+    Parameters
+    ----------
+    cm : ndarray
+        2d confusion matrix with the true classes as rows.
+
+    classes : ndarray
+        Class labels.
+
+    Returns
+    -------
+    report : pandas.DataFrame
+        DataFrame in the same layout as sklearn.metrics.classification_report
+        with `output_dict=True`.
+
+    report_str : str
+        Text summary of the report.
+    """
+    import pandas as pd
+
+    tp = np.diagonal(cm)
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.nan_to_num(tp / predicted)
+        recall = np.nan_to_num(tp / support)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+
+    total = support.sum()
+    accuracy = tp.sum() / total
+
+    report = pd.DataFrame(
+        np.vstack((precision, recall, f1, support)),
+        index=["precision", "recall", "f1-score", "support"],
+        columns=[str(i) for i in classes],
+    )
+    report["accuracy"] = accuracy
+    report["macro avg"] = [precision.mean(), recall.mean(), f1.mean(), total]
+    report["weighted avg"] = [
+        np.average(precision, weights=support),
+        np.average(recall, weights=support),
+        np.average(f1, weights=support),
+        total,
+    ]
+
+    # text summary
+    width = max([len(c) for c in report.columns] + [12])
+    head = "{:>{w}} {:>9} {:>9} {:>9} {:>9}".format(
+        "", "precision", "recall", "f1-score", "support", w=width
+    )
+    row_fmt = "{:>{w}} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.0f}"
+
+    lines = [head, ""]
+
+    for name in report.columns[:-3]:
+        lines.append(row_fmt.format(name, *report[name].values, w=width))
+
+    lines.append("")
+    lines.append(
+        "{:>{w}} {:>9} {:>9} {:>9.2f} {:>9.0f}".format(
+            "accuracy", "", "", accuracy, total, w=width
+        )
+    )
+
+    for name in ["macro avg", "weighted avg"]:
+        lines.append(row_fmt.format(name, *report[name].values, w=width))
+
+    return report, "\n".join(lines)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -- coding: utf-8 --
+
+"""The virtual module contains layers that are defined by numpy expressions of
+the rasters in a RasterStack, such as spectral indices. The layers are
+evaluated for each window of rows that is read, and are never written to
+disk."""
+
+import ast
+import re
+
+import numpy as np
+
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "arctan": np.arctan,
+    "arctan2": np.arctan2,
+    "clip": np.clip,
+    "cos": np.cos,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "maximum": np.maximum,
+    "minimum": np.minimum,
+    "power": np.power,
+    "sin": np.sin,
+    "sqrt": np.sqrt,
+    "tan": np.tan,
+    "where": np.where,
+}
+
+_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+
+
+def _variables(tree):
+    """Names of the variables that are used in a parsed expression"""
+    for node in ast.walk(tree):
+        if not isinstance(node, _NODES):
+            raise ValueError(
+                "{0} is not allowed in an expression".format(type(node).__name__)
+            )
+
+        if isinstance(node, ast.Constant) and not isinstance(
+            node.value, (int, float)
+        ):
+            raise ValueError("Only numeric constants are allowed in an expression")
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ValueError(
+                    "Only the functions {0} are allowed in an expression".format(
+                        ", ".join(sorted(FUNCTIONS))
+                    )
+                )
+
+            if node.keywords:
+                raise ValueError("Keyword arguments are not allowed in an expression")
+
+    calls = set(
+        node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call)
+    )
+
+    return sorted(
+        set(node.id for node in ast.walk(tree) if isinstance(node, ast.Name)) - calls
+    )
+
+
+def split_definitions(value):
+    """
+    Split a comma-separated option of virtual layer definitions
+
+    Commas are only treated as separators when they are followed by the name
+    of the next layer, so that functions with several arguments can be used
+    within the expressions.
+
+    Parameters
+    ----------
+    value : str
+        Definitions of the form 'name = expression' separated by commas.
+
+    Returns
+    -------
+    list
+        List of the definitions, or None if the value is empty.
+    """
+    if not value or not value.strip():
+        return None
+
+    return [
+        i.strip() for i in re.split(r",(?=\s*[A-Za-z_]\w*\s*=(?!=))", value)
+    ]
+
+
+class VirtualLayer(object):
+    def __init__(self, name, expression, variables):
+        """A layer that is computed from other layers using a numpy expression
+
+        Parameters
+        ----------
+        name : str
+            Name of the layer.
+
+        expression : str
+            Expression of the layer, containing numeric constants, arithmetic
+            and comparison operators, the functions within FUNCTIONS, and
+            variables that refer to the rasters of the stack.
+
+        variables : dict
+            Dict of the variable names (keys) in the expression and the index
+            of the raster (values) in the stack that they refer to. Using the
+            indexes allows the layer to be computed for other imagery groups
+            with the same structure.
+        """
+        self.name = name
+        self.expression = expression
+        self.variables = {k: int(v) for k, v in variables.items()}
+
+        tree = ast.parse(expression, mode="eval")
+        missing = set(_variables(tree)) - set(self.variables)
+
+        if missing:
+            raise ValueError(
+                "Unknown variables in the expression of {0}: {1}".format(
+                    name, ", ".join(sorted(missing))
+                )
+            )
+
+        self._code = compile(tree, "<{0}>".format(name), "eval")
+
+    def __repr__(self):
+        return "VirtualLayer({0} = {1})".format(self.name, self.expression)
+
+    def __eq__(self, other):
+        return isinstance(other, VirtualLayer) and (
+            self.to_dict() == other.to_dict()
+        )
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def to_dict(self):
+        """Definition of the layer that is stored with a model"""
+        return {
+            "name": self.name,
+            "expression": self.expression,
+            "variables": dict(self.variables),
+        }
+
+    @classmethod
+    def parse(cls, definition, names):
+        """
+        Create a VirtualLayer from a 'name = expression' string
+
+        Parameters
+        ----------
+        definition : str
+            Name of the layer and its expression separated by '=', e.g.
+            'ndvi = (lsat7_2002_40 - lsat7_2002_30) / (lsat7_2002_40 +
+            lsat7_2002_30)'.
+
+        names : list
+            Names of the rasters in the stack. The variables of the expression
+            are the names of the rasters without their mapset, and with any
+            '.' replaced by '_'.
+
+        Returns
+        -------
+        VirtualLayer
+        """
+        name, sep, expression = definition.partition("=")
+        name, expression = name.strip(), expression.strip()
+
+        if not sep or not name.isidentifier() or not expression:
+            raise ValueError(
+                "Virtual layers are defined as name = expression, not {0}".format(
+                    definition
+                )
+            )
+
+        keys = [i.split("@")[0].replace(".", "_") for i in names]
+
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError:
+            raise ValueError("Invalid expression of {0}: {1}".format(name, expression))
+
+        variables = {}
+
+        for var in _variables(tree):
+            if var not in keys:
+                raise ValueError(
+                    "{0} in the expression of {1} is not a raster in the imagery "
+                    "group".format(var, name)
+                )
+
+            variables[var] = keys.index(var)
+
+        return cls(name, expression, variables)
+
+    def evaluate(self, data):
+        """
+        Evaluate the expression
+
+        Parameters
+        ----------
+        data : ndarray
+            Array of the rasters of the stack with the rasters in the first
+            dimension, and nan representing nodata.
+
+        Returns
+        -------
+        ndarray
+            Array with the dimensions of the data excluding the first, with
+            nan where the expression is undefined.
+        """
+        env = dict(FUNCTIONS)
+        env.update({k: data[i] for k, i in self.variables.items()})
+
+        with np.errstate(all="ignore"):
+            result = eval(self._code, {"__builtins__": {}}, env)
+
+        result = np.asarray(result, dtype=np.float64)
+
+        if result.shape != data.shape[1:]:
+            result = np.broadcast_to(result, data.shape[1:]).copy()
+
+        result[~np.isfinite(result)] = np.nan
+
+        return result
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the cache of the fitted preprocessing steps
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import shutil
+import tempfile
+
+import grass.script as gs
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.utils import TransformCache
+
+
+class CountingScaler(StandardScaler):
+    """StandardScaler that counts the number of times that it is fitted. The
+    count is a class attribute so that it does not change the hash of the
+    transformer"""
+
+    n_fits = 0
+
+    def fit(self, X, y=None, sample_weight=None):
+        CountingScaler.n_fits += 1
+        return super(CountingScaler, self).fit(X, y, sample_weight)
+
+
+class TestTransformCache(TestCase):
+    """Test that the fitted transformers are reused from the cache"""
+
+    X, y = make_classification(n_samples=100, n_features=4, random_state=1)
+
+    def setUp(self):
+        CountingScaler.n_fits = 0
+        self.location = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def pipeline(self, bytes_limit=None):
+        return Pipeline(
+            [("scaling", CountingScaler()), ("estimator", LogisticRegression())],
+            memory=TransformCache(self.location, bytes_limit=bytes_limit),
+        )
+
+    def test_reuse(self):
+        """Checks that a second fit with the same data reuses the transformer"""
+        first = self.pipeline().fit(self.X, self.y)
+        second = self.pipeline().fit(self.X, self.y)
+
+        self.assertEqual(CountingScaler.n_fits, 1)
+        np.testing.assert_array_equal(
+            first.predict_proba(self.X), second.predict_proba(self.X)
+        )
+
+    def test_invalidate(self):
+        """Checks that changed data or parameters invalidate the cache"""
+        self.pipeline().fit(self.X, self.y)
+
+        X = self.X.copy()
+        X[0, 0] += 1.0
+        self.pipeline().fit(X, self.y)
+        self.assertEqual(CountingScaler.n_fits, 2)
+
+        self.pipeline().set_params(scaling__with_mean=False).fit(self.X, self.y)
+        self.assertEqual(CountingScaler.n_fits, 3)
+
+        self.pipeline().fit(self.X[:50], self.y[:50])
+        self.assertEqual(CountingScaler.n_fits, 4)
+
+    def test_bytes_limit(self):
+        """Checks that items are evicted when the cache exceeds its size"""
+        self.pipeline(bytes_limit=1).fit(self.X, self.y)
+        self.pipeline(bytes_limit=1).fit(self.X, self.y)
+
+        self.assertEqual(CountingScaler.n_fits, 2)
+
+
+if __name__ == "__main__":
+    test()
@@ -17,6 +17,7 @@ import tempfile
 import os
 
 import grass.script as gs
+import joblib
 
 from grass.gunittest.case import TestCase
 from grass.gunittest.main import test
@@ -47,6 +48,7 @@ class TestClassification(TestCase):
     # files created during test
     model_file = tempfile.NamedTemporaryFile(suffix=".gz").name
     training_file = tempfile.NamedTemporaryFile(suffix=".gz").name
+    ensemble_file = tempfile.NamedTemporaryFile(suffix=".gz").name
 
     @classmethod
     def setUpClass(cls):
@@ -99,6 +101,11 @@ class TestClassification(TestCase):
         except FileNotFoundError:
             pass
 
+        try:
+            os.remove(self.ensemble_file)
+        except FileNotFoundError:
+            pass
+
     def test_output_created_labelled_pixels(self):
         """Checks that the output is created"""
         # train model
@@ -159,6 +166,28 @@ class TestClassification(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
+    def test_compress_duplicates(self):
+        """Checks that duplicate training samples can be compressed"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            cv=2,
+            save_model=self.model_file,
+            flags="db",
+        )
+        self.assertFileExists(filename=self.model_file)
+
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+
     def test_save_load_training(self):
         """Test that training data can be saved and loaded"""
 
@@ -187,6 +216,10 @@ class TestClassification(TestCase):
             overwrite=True
         )
 
+        # the loaded training data is kept in single precision
+        metadata = joblib.load(self.model_file)["metadata"]
+        self.assertEqual(metadata["dtype"], "float32")
+
         # predict after loading training data
         self.assertModule(
             "r.learn.predict",
@@ -196,6 +229,164 @@ class TestClassification(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
+    def test_ensemble_prediction(self):
+        """Checks that several models can be combined during prediction"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+        )
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="LogisticRegression",
+            save_model=self.ensemble_file,
+        )
+
+        for voting in ["soft", "hard"]:
+            self.assertModule(
+                "r.learn.predict",
+                group=self.group,
+                load_model=[self.model_file, self.ensemble_file],
+                output=self.output,
+                voting=voting,
+                overwrite=True,
+            )
+            self.assertRasterExists(self.output, msg="Output was not created")
+
+        # regression voting cannot be used with classification models
+        self.assertModuleFail(
+            "r.learn.predict",
+            group=self.group,
+            load_model=[self.model_file, self.ensemble_file],
+            output=self.output,
+            voting="median",
+            overwrite=True,
+        )
+
+    def test_batch_prediction(self):
+        """Checks that one model can be applied to several groups"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+        )
+
+        outputs = [self.output, self.output + "_batch"]
+
+        self.assertModule(
+            "r.learn.predict",
+            group=[self.group, self.group],
+            load_model=self.model_file,
+            output=outputs,
+            batch_jobs=2,
+        )
+
+        for output in outputs:
+            self.assertRasterExists(output, msg="Output was not created")
+
+        self.assertRastersNoDifference(outputs[0], outputs[1], precision=0)
+        self.runModule("g.remove", flags="f", type="raster", name=outputs[1])
+
+    def test_unique_prediction(self):
+        """Checks that predicting the unique pixel values gives the same result"""
+        memoized = self.output + "_unique"
+
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+        )
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+        )
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=memoized,
+            memo_size=10000,
+            chunksize=10000,
+            flags="u",
+        )
+        self.assertRasterExists(memoized, msg="Output was not created")
+        self.assertRastersNoDifference(self.output, memoized, precision=0)
+        self.runModule("g.remove", flags="f", type="raster", name=memoized)
+
+    def test_progressive_prediction(self):
+        """Checks that a preview and a refined prediction are created"""
+        preview = self.output + "_preview"
+
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+        )
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+            preview=4,
+            tolerance=0,
+        )
+        self.assertRasterExists(preview, msg="Preview was not created")
+        self.assertRasterExists(self.output, msg="Output was not created")
+        self.assertRasterFitsInfo(
+            raster=self.output,
+            reference=dict(rows=gs.region()["rows"], cols=gs.region()["cols"]),
+        )
+        self.runModule("g.remove", flags="f", type="raster", name=preview)
+
+    def test_cascade_prediction(self):
+        """Checks that a cascade creates the classification and the stage raster"""
+        stage = self.output + "_stage"
+
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=10,
+            save_model=self.model_file,
+        )
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="ExtraTreesClassifier",
+            n_estimators=200,
+            save_model=self.ensemble_file,
+        )
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            cascade_model=self.ensemble_file,
+            threshold=0.8,
+            output=self.output,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+        self.assertRasterExists(stage, msg="Stage raster was not created")
+        self.assertRasterMinMax(stage, refmin=1, refmax=2)
+        self.runModule("g.remove", flags="f", type="raster", name=stage)
+
 
 if __name__ == "__main__":
     test()
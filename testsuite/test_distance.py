@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the euclidean distance fields
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import math
+
+import grass.script as gs
+import numpy as np
+from grass.pygrass.gis.region import Region
+from grass.pygrass.raster import RasterRow
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.raster import RasterStack
+from rlearnlib.utils import (
+    distance_field_points,
+    distance_field_sample,
+    distance_field_window,
+    euclidean_distance_fields,
+)
+from rlearnlib.virtual import VirtualLayer
+
+
+class TestDistanceFields(TestCase):
+    """Test the distance fields against a brute-force distance"""
+
+    prefix = "test_distance"
+    centre = "test_distance_point"
+    grown = "test_distance_grown"
+    names = ["topleft", "topright", "lowerleft", "lowerright", "centre"]
+
+    @classmethod
+    def setUpClass(cls):
+        """Use a small temporary region with an even number of rows and columns so
+        that the centre of the region is on the edge of a cell"""
+        cls.use_temp_region()
+        cls.runModule("g.region", n=1000, s=0, e=1200, w=0, rows=20, cols=24)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary region"""
+        cls.del_temp_region()
+
+    def tearDown(self):
+        """Remove the rasters created by the tests"""
+        names = ["distance_to_" + self.prefix + "_" + i for i in self.names]
+        self.runModule(
+            "g.remove",
+            flags="f",
+            type="raster",
+            name=names + [self.centre, self.grown],
+        )
+
+    def brute_force(self, region, point):
+        """Distance from the centre of each cell to the centre of the cell that
+        contains a point"""
+        col = int(math.floor((point[0] - region.west) / region.ewres))
+        row = int(math.floor((region.north - point[1]) / region.nsres))
+        col, row = min(col, region.cols - 1), min(row, region.rows - 1)
+        px = region.west + (col + 0.5) * region.ewres
+        py = region.north - (row + 0.5) * region.nsres
+
+        arr = np.zeros((region.rows, region.cols))
+
+        for i in range(region.rows):
+            for j in range(region.cols):
+                x = region.west + (j + 0.5) * region.ewres
+                y = region.north - (i + 0.5) * region.nsres
+                arr[i, j] = math.sqrt((x - px) ** 2 + (y - py) ** 2)
+
+        return arr
+
+    def test_points(self):
+        """Checks that the points are located at cell centres"""
+        region = Region()
+        points = distance_field_points(region)
+
+        self.assertEqual(list(points.keys()), self.names)
+        self.assertEqual(points["topleft"], (25.0, 975.0))
+        self.assertEqual(points["lowerright"], (1175.0, 25.0))
+        self.assertEqual(points["centre"], (625.0, 475.0))
+
+    def test_window(self):
+        """Checks the distances of windows of rows against a brute-force distance"""
+        region = Region()
+
+        for point in distance_field_points(region).values():
+            expected = self.brute_force(region, point)
+
+            for start in range(0, region.rows, 7):
+                rows = (start, min(start + 7, region.rows))
+                arr = distance_field_window(region, point, rows)
+                np.testing.assert_allclose(arr, expected[rows[0] : rows[1], :])
+
+    def test_sample(self):
+        """Checks that samples are measured from the centres of their cells"""
+        region = Region()
+        point = distance_field_points(region)["centre"]
+        expected = self.brute_force(region, point)
+
+        x = np.array([10.0, 610.0, 1199.0])
+        y = np.array([990.0, 480.0, 1.0])
+        distance = distance_field_sample(region, point, x, y)
+
+        np.testing.assert_allclose(
+            distance, [expected[0, 0], expected[10, 12], expected[19, 23]]
+        )
+
+    def test_rasterized_point(self):
+        """Checks the written rasters against r.grow.distance of the rasterized
+        centre point"""
+        region = Region()
+        euclidean_distance_fields(self.prefix, region, overwrite=True, height=7)
+
+        self.runModule(
+            "r.mapcalc",
+            expression="{0} = if(x() == 625 && y() == 475, 1, null())".format(
+                self.centre
+            ),
+        )
+        self.runModule(
+            "r.grow.distance",
+            input=self.centre,
+            distance=self.grown,
+            metric="euclidean",
+        )
+
+        with RasterRow("distance_to_" + self.prefix + "_centre") as src:
+            arr = np.asarray(src)
+
+        with RasterRow(self.grown) as src:
+            grown = np.asarray(src)
+
+        np.testing.assert_allclose(arr, grown, atol=1e-3)
+
+
+class TestDistancePoints(TestCase):
+    """Test the order of the features that are extracted at point locations"""
+
+    cx = "test_distance_cx"
+    cy = "test_distance_cy"
+    points = "test_distance_points"
+
+    @classmethod
+    def setUpClass(cls):
+        """Create rasters of the coordinates of the cell centres and random
+        points with an attribute"""
+        cls.use_temp_region()
+        cls.runModule("g.region", n=1000, s=0, e=1200, w=0, rows=20, cols=24)
+        cls.runModule("r.mapcalc", expression="{0} = x()".format(cls.cx))
+        cls.runModule("r.mapcalc", expression="{0} = y()".format(cls.cy))
+        cls.runModule(
+            "v.random",
+            output=cls.points,
+            npoints=30,
+            seed=1234,
+            column="value",
+            column_type="double precision",
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary region, rasters and points"""
+        cls.del_temp_region()
+        cls.runModule("g.remove", flags="f", type="raster", name=[cls.cx, cls.cy])
+        cls.runModule("g.remove", flags="f", type="vector", name=cls.points)
+
+    def test_feature_order(self):
+        """Checks that the rasters are followed by the virtual layers and the
+        distance fields, in the same order as the features of a model"""
+        region = Region()
+        fields = distance_field_points(region)
+
+        stack = RasterStack([self.cx, self.cy])
+        total = "total = {0} + 2 * {1}".format(self.cx, self.cy)
+        stack.virtual = [VirtualLayer.parse(total, stack.names)]
+        stack.distance = [
+            ("distance_to_" + k, fields[k]) for k in ["topleft", "centre"]
+        ]
+
+        X, values, cat = stack.extract_points(self.points, fields="value")
+
+        self.assertEqual(X.shape, (30, 5))
+        x, y = X[:, 0].astype(np.float64), X[:, 1].astype(np.float64)
+
+        np.testing.assert_allclose(X[:, 2], x + 2 * y, rtol=1e-6)
+
+        for i, k in enumerate(["topleft", "centre"]):
+            px, py = fields[k]
+            np.testing.assert_allclose(
+                X[:, 3 + i], np.sqrt((x - px) ** 2 + (y - py) ** 2), rtol=1e-6
+            )
+
+
+if __name__ == "__main__":
+    test()
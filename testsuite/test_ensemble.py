@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the ensembles of fitted models
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from sklearn.datasets import make_classification, make_regression
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.ensemble import CascadeClassifier, MemoizedEstimator, VotingEnsemble
+
+
+class CountingEstimator(object):
+    """Fitted estimator that records the number of rows that it predicts"""
+
+    def __init__(self, estimator):
+        self.estimator = estimator
+        self.rows = []
+        self.data = []
+
+    @property
+    def classes_(self):
+        return self.estimator.classes_
+
+    def predict(self, X):
+        self.rows.append(X.shape[0])
+        self.data.append(X)
+        return self.estimator.predict(X)
+
+    def predict_proba(self, X):
+        self.rows.append(X.shape[0])
+        self.data.append(X)
+        return self.estimator.predict_proba(X)
+
+
+class TestVotingEnsemble(TestCase):
+    """Test the soft and hard voting of the fold models"""
+
+    X, y = make_classification(
+        n_samples=150, n_features=5, n_informative=3, n_classes=3, random_state=1
+    )
+
+    def members(self, estimator):
+        """Fit an estimator on three partitions of the data"""
+        return [
+            estimator.set_params(random_state=i).fit(self.X[i::3], self.y[i::3])
+            for i in range(3)
+        ]
+
+    def test_soft(self):
+        """Checks that soft voting averages the class probabilities"""
+        members = self.members(DecisionTreeClassifier(max_depth=3))
+        ensemble = VotingEnsemble(members, voting="soft")
+
+        proba = np.mean([m.predict_proba(self.X) for m in members], axis=0)
+        np.testing.assert_allclose(ensemble.predict_proba(self.X), proba)
+        np.testing.assert_array_equal(
+            ensemble.predict(self.X), ensemble.classes_[proba.argmax(axis=1)]
+        )
+
+    def test_hard(self):
+        """Checks that hard voting uses the majority of the predictions of
+        estimators that do not provide probabilities"""
+        members = self.members(SVC())
+        self.assertFalse(hasattr(members[0], "predict_proba"))
+
+        ensemble = VotingEnsemble(members, voting="hard")
+        pred = np.asarray([m.predict(self.X) for m in members])
+
+        votes = np.stack([(pred == c).sum(axis=0) for c in ensemble.classes_], axis=1)
+        np.testing.assert_array_equal(
+            ensemble.predict(self.X), ensemble.classes_[votes.argmax(axis=1)]
+        )
+
+        with self.assertRaises(AttributeError):
+            VotingEnsemble(members, voting="soft").predict(self.X)
+
+    def test_missing_class(self):
+        """Checks that the probabilities of an estimator that was fitted on a
+        subset of the classes are aligned to the union of the classes"""
+        subset = self.y != 2
+        members = [
+            DecisionTreeClassifier(random_state=0).fit(self.X, self.y),
+            DecisionTreeClassifier(random_state=0).fit(self.X[subset], self.y[subset]),
+        ]
+        ensemble = VotingEnsemble(members)
+        proba = ensemble.predict_proba(self.X)
+
+        np.testing.assert_array_equal(ensemble.classes_, [0, 1, 2])
+        np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+        np.testing.assert_allclose(
+            proba[:, 2], members[0].predict_proba(self.X)[:, 2] / 2
+        )
+
+    def test_regression(self):
+        """Checks the mean and median of the predictions of regressors"""
+        X, y = make_regression(n_samples=90, n_features=3, random_state=1)
+        members = [LinearRegression().fit(X[i::3], y[i::3]) for i in range(3)]
+        pred = np.asarray([m.predict(X) for m in members])
+
+        np.testing.assert_allclose(
+            VotingEnsemble(members, voting="hard").predict(X), pred.mean(axis=0)
+        )
+        np.testing.assert_allclose(
+            VotingEnsemble(members, voting="median").predict(X),
+            np.median(pred, axis=0),
+        )
+
+
+class TestMemoizedEstimator(TestCase):
+    """Test the prediction of the unique rows and the cache of their results"""
+
+    rng = np.random.RandomState(1)
+    X = rng.randint(0, 3, size=(300, 3)).astype(np.float32)
+    y = (X.sum(axis=1) > 3).astype(int)
+    fitted = DecisionTreeClassifier(random_state=0).fit(X, y)
+    n_unique = np.unique(X, axis=0).shape[0]
+
+    def test_unique(self):
+        """Checks the predictions and probabilities of the unique rows against
+        the estimator"""
+        counting = CountingEstimator(self.fitted)
+        memoized = MemoizedEstimator(counting)
+
+        np.testing.assert_array_equal(
+            memoized.predict(self.X), self.fitted.predict(self.X)
+        )
+        np.testing.assert_allclose(
+            memoized.predict_proba(self.X), self.fitted.predict_proba(self.X)
+        )
+        self.assertEqual(counting.rows, [self.n_unique, self.n_unique])
+
+        # only the rows within each call are deduplicated without a cache
+        memoized.predict(self.X)
+        self.assertEqual(counting.rows[-1], self.n_unique)
+
+    def test_reuse(self):
+        """Checks that the cached results are reused across calls"""
+        counting = CountingEstimator(self.fitted)
+        memoized = MemoizedEstimator(counting, cache_size=100)
+
+        first = memoized.predict(self.X[:150])
+        second = memoized.predict(self.X)
+
+        np.testing.assert_array_equal(first, self.fitted.predict(self.X[:150]))
+        np.testing.assert_array_equal(second, self.fitted.predict(self.X))
+        self.assertEqual(sum(counting.rows), self.n_unique)
+
+        memoized.predict(self.X[::-1])
+        self.assertEqual(sum(counting.rows), self.n_unique)
+
+    def test_eviction(self):
+        """Checks that the least recently used results are removed from the
+        cache once it exceeds cache_size"""
+        a, b, c = np.eye(3, dtype=np.float32)
+        counting = CountingEstimator(self.fitted)
+        memoized = MemoizedEstimator(counting, cache_size=2)
+
+        for row in [a, b, c]:
+            memoized.predict(row[np.newaxis, :])
+
+        self.assertEqual(counting.rows, [1, 1, 1])
+        self.assertEqual(len(memoized._cached("predict")), 2)
+
+        # a was evicted, and b becomes the most recently used
+        memoized.predict(b[np.newaxis, :])
+        self.assertEqual(counting.rows, [1, 1, 1])
+
+        memoized.predict(a[np.newaxis, :])
+        self.assertEqual(counting.rows, [1, 1, 1, 1])
+
+        # c was evicted when a was added
+        memoized.predict(np.stack([b, c]))
+        self.assertEqual(counting.rows, [1, 1, 1, 1, 1])
+
+
+class TestCascadeClassifier(TestCase):
+    """Test the referral of the uncertain samples to the slow classifier"""
+
+    X, y = make_classification(
+        n_samples=200, n_features=5, n_informative=3, n_classes=3, random_state=1
+    )
+    fast = LogisticRegression(max_iter=1000).fit(X, y)
+    slow = DecisionTreeClassifier(random_state=0).fit(X, y)
+
+    # the median of the maximum probabilities is reached by one sample
+    confidence = fast.predict_proba(X).max(axis=1)
+    threshold = float(np.median(confidence))
+    uncertain = confidence < threshold
+
+    def test_routing(self):
+        """Checks that only the samples below the threshold are passed to the
+        slow classifier"""
+        counting = CountingEstimator(self.slow)
+        cascade = CascadeClassifier(self.fast, counting, threshold=self.threshold)
+        cascade.predict(self.X)
+
+        self.assertEqual(counting.rows, [self.uncertain.sum()])
+        np.testing.assert_array_equal(counting.data[0], self.X[self.uncertain])
+        self.assertEqual(self.uncertain.sum(), self.X.shape[0] // 2)
+
+    def test_stages(self):
+        """Checks the predictions and the classifier that decided each sample"""
+        cascade = CascadeClassifier(self.fast, self.slow, threshold=self.threshold)
+        pred, stage = cascade.predict_stages(self.X)
+
+        np.testing.assert_array_equal(stage, np.where(self.uncertain, 2, 1))
+        expected = np.where(
+            self.uncertain, self.slow.predict(self.X), self.fast.predict(self.X)
+        )
+        np.testing.assert_array_equal(pred, expected)
+        np.testing.assert_array_equal(cascade.predict(self.X), pred)
+
+        # all of the samples are decided by the fast classifier at a threshold of 0
+        cascade = CascadeClassifier(self.fast, self.slow, threshold=0)
+        np.testing.assert_array_equal(cascade.predict_stages(self.X)[1], 1)
+
+    def test_proba_classes(self):
+        """Checks that the probabilities of classifiers with different classes
+        are aligned to the union of the classes"""
+        subset = self.y != 2
+        fast = LogisticRegression(max_iter=1000).fit(self.X[subset], self.y[subset])
+        confidence = fast.predict_proba(self.X).max(axis=1)
+        threshold = float(np.median(confidence))
+        uncertain = confidence < threshold
+
+        cascade = CascadeClassifier(fast, self.slow, threshold=threshold)
+        proba = cascade.predict_proba(self.X)
+
+        np.testing.assert_array_equal(cascade.classes_, [0, 1, 2])
+        np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+        np.testing.assert_allclose(
+            proba[~uncertain, :2], fast.predict_proba(self.X[~uncertain])
+        )
+        np.testing.assert_array_equal(proba[~uncertain, 2], 0)
+        np.testing.assert_allclose(
+            proba[uncertain], self.slow.predict_proba(self.X[uncertain])
+        )
+
+    def test_proba_fallback(self):
+        """Checks that the uncertain samples have a probability of one for the
+        prediction of a slow classifier without probabilities"""
+        slow = SVC().fit(self.X, self.y)
+        self.assertFalse(hasattr(slow, "predict_proba"))
+
+        cascade = CascadeClassifier(self.fast, slow, threshold=self.threshold)
+        proba = cascade.predict_proba(self.X)
+        expected = np.eye(3)[slow.predict(self.X[self.uncertain])]
+
+        np.testing.assert_array_equal(proba[self.uncertain], expected)
+        np.testing.assert_allclose(
+            proba[~self.uncertain], self.fast.predict_proba(self.X[~self.uncertain])
+        )
+
+
+if __name__ == "__main__":
+    test()
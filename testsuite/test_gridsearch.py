@@ -108,6 +108,30 @@ class TestGridSearch(TestCase):
         self.assertEquals(df.shape[0], 2)
         self.assertIn("param_min_samples_leaf", df.columns.values)
 
+    def test_halving_search(self):
+        """Checks that hyperparameter tuning using successive halving executes"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=27,
+            min_samples_leaf=[1, 5, 10],
+            search="halving",
+            param_file=self.param_file,
+            save_model=self.model_file,
+        )
+        self.assertFileExists(filename=self.param_file)
+        self.assertFileExists(filename=self.model_file)
+
+        # later iterations only evaluate the best candidates
+        df = pd.read_csv(self.param_file)
+        self.assertIn("param_min_samples_leaf", df.columns.values)
+        self.assertIn("n_resources", df.columns.values)
+        self.assertLess(
+            df.loc[df.n_resources == df.n_resources.max()].shape[0], 3
+        )
+
 
 if __name__ == "__main__":
     test()
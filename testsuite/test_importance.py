@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the permutation feature importance
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.importance import permutation_importance
+
+
+class TestPermutationImportance(TestCase):
+    """Test the permutation importance of an informative and a noise feature"""
+
+    rng = np.random.RandomState(1)
+    informative = rng.normal(size=300)
+    noise = rng.normal(size=300)
+    weak = rng.normal(size=300)
+    X = np.column_stack((noise, informative, weak))
+    y = (informative + 0.2 * weak + 0.3 * rng.normal(size=300) > 0).astype(int)
+    scorer = get_scorer("accuracy")
+
+    def importances(self, **kwargs):
+        estimator = LogisticRegression().fit(self.X, self.y)
+        params = dict(n_repeats=5, random_state=1234)
+        params.update(kwargs)
+
+        return permutation_importance(estimator, self.X, self.y, self.scorer, **params)
+
+    def test_ranking(self):
+        """Checks that the noise feature ranks below the informative features"""
+        fimp = self.importances().set_index("feature")["importance"]
+
+        self.assertGreater(fimp["1"], fimp["2"])
+        self.assertGreater(fimp["2"], fimp["0"])
+        self.assertAlmostEqual(fimp["0"], 0.0, delta=0.02)
+
+    def test_workers(self):
+        """Checks that the importances do not depend on the number of workers
+        and that the data are not modified"""
+        X = self.X.copy()
+        serial = self.importances(n_jobs=1)
+        parallel = self.importances(n_jobs=2)
+
+        np.testing.assert_array_equal(serial.values, parallel.values)
+        np.testing.assert_array_equal(self.X, X)
+
+    def test_folds(self):
+        """Checks that each fold estimator is scored on its own partition and
+        that grouped columns are permuted together"""
+        folds = np.arange(self.X.shape[0]) % 2
+        estimators = [
+            LogisticRegression().fit(self.X[folds != i], self.y[folds != i])
+            for i in range(2)
+        ]
+        fimp = permutation_importance(
+            estimators,
+            self.X,
+            self.y,
+            self.scorer,
+            folds=folds,
+            feature_groups={"noise": [0], "signal": [1, 2]},
+            random_state=1234,
+        )
+
+        self.assertEqual(list(fimp["feature"]), ["noise", "signal"])
+        self.assertGreater(fimp["importance"][1], fimp["importance"][0])
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test that importing rlearnlib defers the heavy dependencies
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import subprocess
+import sys
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+
+IMPORT_SCRIPT = """
+import sys
+import time
+
+import grass.script as gs
+from grass.pygrass.raster import RasterRow
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+start = time.time()
+import rlearnlib.raster
+import rlearnlib.utils
+elapsed = time.time() - start
+
+heavy = ["pandas", "matplotlib", "sklearn", "scipy"]
+heavy = ",".join(m for m in heavy if m in sys.modules)
+print("{0};{1}".format(elapsed, heavy))
+"""
+
+
+class TestImports(TestCase):
+    """Test the import time of rlearnlib"""
+
+    # maximum time in seconds to import rlearnlib once grass is imported
+    budget = 0.5
+
+    def test_lazy_imports(self):
+        """Checks that pandas, matplotlib and scikit-learn are not imported
+        and that the import time is within the budget"""
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT], universal_newlines=True
+        )
+        elapsed, heavy = output.strip().splitlines()[-1].split(";")
+
+        self.assertEqual(heavy, "", msg="Modules imported eagerly: " + heavy)
+        self.assertLess(float(elapsed), self.budget)
+
+
+if __name__ == "__main__":
+    test()
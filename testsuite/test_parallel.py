@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the division of the processing cores and the sharing of
+           training data
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import os
+import shutil
+import tempfile
+
+import grass.script as gs
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GridSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.parallel import (
+    allocate_cores,
+    effective_n_jobs,
+    set_estimator_n_jobs,
+    share_array,
+)
+
+
+class TestAllocateCores(TestCase):
+    """Test the division of the cores between the levels of parallelism"""
+
+    def test_outer_first(self):
+        """Checks that the outer folds are assigned first and the remaining
+        cores are divided between the search fits and estimator threads"""
+        self.assertEqual(tuple(allocate_cores(8, n_outer=5, n_search=10)), (5, 1, 1))
+        self.assertEqual(tuple(allocate_cores(8, n_outer=2, n_search=10)), (2, 4, 1))
+        self.assertEqual(tuple(allocate_cores(16, n_outer=2, n_search=3)), (2, 3, 2))
+        self.assertEqual(tuple(allocate_cores(4)), (1, 1, 4))
+
+    def test_estimator_threads(self):
+        """Checks that estimators without threads use a single core"""
+        cores = allocate_cores(16, n_outer=2, n_search=3, estimator_threads=False)
+        self.assertEqual(tuple(cores), (2, 3, 1))
+
+    def test_budget(self):
+        """Checks that the total number of workers never exceeds n_jobs"""
+        for n_jobs in [1, 2, 3, 4, 7, 8, 16, -1]:
+            budget = effective_n_jobs(n_jobs)
+
+            for n_outer in [1, 2, 3, 5, 10]:
+                for n_search in [1, 2, 6, 20]:
+                    cores = allocate_cores(n_jobs, n_outer, n_search)
+                    self.assertGreaterEqual(min(cores), 1)
+                    self.assertLessEqual(
+                        cores.outer * cores.search * cores.estimator, budget
+                    )
+
+    def test_effective_n_jobs(self):
+        """Checks the conversion of negative and missing n_jobs"""
+        n_cores = os.cpu_count() or 1
+
+        self.assertEqual(effective_n_jobs(None), 1)
+        self.assertEqual(effective_n_jobs(3), 3)
+        self.assertEqual(effective_n_jobs(-1), n_cores)
+        self.assertEqual(effective_n_jobs(-n_cores - 5), 1)
+
+
+class TestSetEstimatorNJobs(TestCase):
+    """Test the setting of the threads of nested estimators"""
+
+    def test_estimator(self):
+        """Checks an estimator with and without an n_jobs parameter"""
+        estimator = RandomForestClassifier()
+        self.assertTrue(set_estimator_n_jobs(estimator, 3))
+        self.assertEqual(estimator.n_jobs, 3)
+
+        self.assertFalse(set_estimator_n_jobs(DecisionTreeClassifier(), 3))
+
+    def test_nested(self):
+        """Checks that the n_jobs of the steps of a Pipeline within a search
+        are set"""
+        pipeline = Pipeline(
+            [
+                ("preprocessing", StandardScaler()),
+                ("estimator", RandomForestClassifier()),
+            ]
+        )
+        search = GridSearchCV(pipeline, {"estimator__max_depth": [1, 2]})
+
+        self.assertTrue(set_estimator_n_jobs(search, 2))
+        self.assertEqual(search.n_jobs, 2)
+        self.assertEqual(search.get_params()["estimator__estimator__n_jobs"], 2)
+
+
+class TestShareArray(TestCase):
+    """Test the memory-mapping of training data"""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_memmap(self):
+        """Checks that a read-only memory-map equal to the input is returned"""
+        arr = np.random.RandomState(1).normal(size=(50, 4)).astype(np.float32)
+        shared = share_array(arr[:, ::2], self.folder)
+
+        self.assertIsInstance(shared, np.memmap)
+        self.assertFalse(shared.flags.writeable)
+        self.assertEqual(shared.dtype, np.float32)
+        np.testing.assert_array_equal(shared, arr[:, ::2])
+        self.assertTrue(os.path.exists(os.path.join(self.folder, "X.mmap")))
+
+        with self.assertRaises(ValueError):
+            shared[0, 0] = 1
+
+
+if __name__ == "__main__":
+    test()
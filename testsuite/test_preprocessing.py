@@ -109,7 +109,7 @@ class TestPreprocessing(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
-        estimator, y, class_labels = joblib.load(self.model_file)
+        estimator = joblib.load(self.model_file)["estimator"]
         trans = estimator.named_steps['preprocessing'].transformers[0]
         self.assertIsInstance(trans[1], OneHotEncoder)
         estimator = None
@@ -134,7 +134,7 @@ class TestPreprocessing(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
-        estimator, y, class_labels = joblib.load(self.model_file)
+        estimator = joblib.load(self.model_file)["estimator"]
         trans = estimator.named_steps['preprocessing'].transformers[0]
         self.assertIsInstance(trans[1], StandardScaler)
         estimator = None
@@ -160,12 +160,117 @@ class TestPreprocessing(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
-        estimator, y, class_labels = joblib.load(self.model_file)
+        estimator = joblib.load(self.model_file)["estimator"]
         ohe = estimator.named_steps['preprocessing'].transformers[0]
         scaler = estimator.named_steps['preprocessing'].transformers[1]
         self.assertIsInstance(ohe[1], OneHotEncoder)
         self.assertIsInstance(scaler[1], StandardScaler)
         estimator = None
 
+    def test_pca(self):
+        """Checks that the principal components transformation execution passes"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+            category_maps=self.geology,
+            n_components=3,
+            pca_statistics="stack",
+        )
+        self.assertFileExists(filename=self.model_file)
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+
+        estimator = joblib.load(self.model_file)["estimator"]
+        pca = estimator.named_steps['preprocessing'].transformers[1]
+        self.assertEqual(pca[1].components_.shape, (3, 6))
+        estimator = None
+
+    def test_focal(self):
+        """Checks that focal features are stored with the model and predicted"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+            focal=["lsat7_2002_40:std:5", "lsat7_2002_70:gradient:3"],
+        )
+        self.assertFileExists(filename=self.model_file)
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+            chunksize=10000,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+
+        metadata = joblib.load(self.model_file)["metadata"]
+        self.assertEqual(len(metadata["focal"]), 2)
+        self.assertEqual(metadata["features"][-1], "lsat7_2002_70_gradient3")
+
+    def test_virtual(self):
+        """Checks that virtual layers are stored with the model and predicted"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+            virtual=[
+                "ndvi = (lsat7_2002_40 - lsat7_2002_30) / (lsat7_2002_40 + lsat7_2002_30)",
+                "bright = maximum(lsat7_2002_10, lsat7_2002_20)",
+            ],
+        )
+        self.assertFileExists(filename=self.model_file)
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+            chunksize=10000,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+
+        metadata = joblib.load(self.model_file)["metadata"]
+        self.assertEqual([v["name"] for v in metadata["virtual"]], ["ndvi", "bright"])
+        self.assertEqual(metadata["features"][-2:], ["ndvi", "bright"])
+
+    def test_distance_fields(self):
+        """Checks that distance fields are stored with the model and predicted"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=100,
+            save_model=self.model_file,
+            flags="x",
+        )
+        self.assertFileExists(filename=self.model_file)
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+            chunksize=10000,
+        )
+        self.assertRasterExists(self.output, msg="Output was not created")
+
+        metadata = joblib.load(self.model_file)["metadata"]
+        self.assertEqual(len(metadata["distance"]), 5)
+        self.assertEqual(metadata["features"][-1], "distance_to_centre")
+
 if __name__ == "__main__":
     test()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the preview and refinement of a prediction
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import math
+
+import grass.script as gs
+import numpy as np
+from grass.pygrass.gis.region import Region
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.progressive import coarse_region, homogeneous_cells, preview_index
+
+
+class TestHomogeneousCells(TestCase):
+    """Test the detection of the homogeneous cells of a preview"""
+
+    def test_constant(self):
+        """Checks that all of the cells of a constant preview are homogeneous,
+        including the edges"""
+        preview = np.full((4, 5), 3.0)
+        self.assertTrue(homogeneous_cells(preview, 0).all())
+
+    def test_tolerance(self):
+        """Checks that the neighbours of a different value are heterogeneous
+        unless the difference is within the tolerance"""
+        preview = np.zeros((5, 6))
+        preview[2, 2] = 1.0
+
+        expected = np.ones((5, 6), dtype=bool)
+        expected[1:4, 1:4] = False
+        np.testing.assert_array_equal(homogeneous_cells(preview, 0), expected)
+        np.testing.assert_array_equal(homogeneous_cells(preview, 0.5), expected)
+        self.assertTrue(homogeneous_cells(preview, 1.0).all())
+
+    def test_corner(self):
+        """Checks the neighbourhood of a cell at the corner of the preview"""
+        preview = np.zeros((4, 4))
+        preview[0, 0] = 2.0
+
+        expected = np.ones((4, 4), dtype=bool)
+        expected[0:2, 0:2] = False
+        np.testing.assert_array_equal(homogeneous_cells(preview, 1), expected)
+
+    def test_gradient(self):
+        """Checks the range of a gradient against the tolerance, where the
+        edges of the preview are extended beyond the first and last columns"""
+        preview = np.tile(np.arange(6, dtype=np.float64), (4, 1))
+
+        expected = np.zeros((4, 6), dtype=bool)
+        expected[:, [0, 5]] = True
+        np.testing.assert_array_equal(homogeneous_cells(preview, 1.5), expected)
+        self.assertTrue(homogeneous_cells(preview, 2.0).all())
+
+    def test_nodata(self):
+        """Checks that nodata cells are never homogeneous, and that they are
+        ignored in the neighbourhood of the other cells"""
+        preview = np.zeros((5, 6))
+        preview[2, 2] = np.nan
+        preview[:, 5] = np.nan
+
+        expected = np.isfinite(preview)
+        np.testing.assert_array_equal(homogeneous_cells(preview, 0), expected)
+
+        self.assertFalse(homogeneous_cells(np.full((3, 3), np.nan), 1).any())
+
+
+class TestPreviewIndex(TestCase):
+    """Test the mapping between the rows and columns of the region and the
+    cells of the preview"""
+
+    def test_coverage(self):
+        """Checks that every preview row or column is used, in order, by at most
+        factor rows or columns of the region"""
+        for n in [1, 7, 40, 101, 256]:
+            for factor in [1, 2, 3, 4, 10]:
+                n_preview = max(int(math.ceil(n / factor)), 1)
+                index = preview_index(n, n_preview)
+
+                self.assertEqual(index.shape, (n,))
+                np.testing.assert_array_equal(np.unique(index), np.arange(n_preview))
+                self.assertTrue((np.diff(index) >= 0).all())
+                self.assertLessEqual(np.bincount(index).max(), factor)
+
+    def test_centres(self):
+        """Checks that each row is assigned to the preview cell that contains
+        its centre"""
+        np.testing.assert_array_equal(preview_index(8, 2), [0, 0, 0, 0, 1, 1, 1, 1])
+        np.testing.assert_array_equal(preview_index(6, 4), [0, 1, 1, 2, 3, 3])
+
+
+class TestCoarseRegion(TestCase):
+    """Test the region of the preview"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Use a temporary region whose size is not a multiple of the factor"""
+        cls.use_temp_region()
+        cls.runModule("g.region", n=1010, s=0, e=750, w=0, res=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary region"""
+        cls.del_temp_region()
+
+    def test_extent(self):
+        """Checks that the preview has the same extent and rounded up numbers of
+        rows and columns, and that every preview cell maps to the region"""
+        region = Region()
+        coarse = coarse_region(region, 4)
+
+        self.assertEqual((coarse.rows, coarse.cols), (26, 19))
+        self.assertEqual(
+            (coarse.north, coarse.south, coarse.east, coarse.west),
+            (region.north, region.south, region.east, region.west),
+        )
+
+        rows = preview_index(region.rows, coarse.rows)
+        cols = preview_index(region.cols, coarse.cols)
+        np.testing.assert_array_equal(np.unique(rows), np.arange(coarse.rows))
+        np.testing.assert_array_equal(np.unique(cols), np.arange(coarse.cols))
+
+
+if __name__ == "__main__":
+    test()
@@ -112,6 +112,31 @@ class TestRegression(TestCase):
         )
         self.assertRasterExists(self.output, msg="Output was not created")
 
+    def test_bilinear_resampling(self):
+        """Checks that coarse rasters can be interpolated during prediction"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_points=self.training_points,
+            field="value",
+            model_name="RandomForestRegressor",
+            n_estimators=50,
+            save_model=self.model_file,
+        )
+
+        # predict using a finer resolution than all of the predictors
+        self.runModule("g.region", raster=self.input_map, res=10)
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.output,
+            resampling="bilinear",
+        )
+        self.runModule("g.region", raster=self.input_map)
+
+        self.assertRasterExists(self.output, msg="Output was not created")
+
     def test_save_load_training(self):
         """Test that training data can be saved and loaded"""
 
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the resampling of coarse rasters during prediction
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from grass.pygrass.raster import RasterRow
+from sklearn.base import BaseEstimator, RegressorMixin
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.raster import RasterStack
+
+
+class CoarseColumn(RegressorMixin, BaseEstimator):
+    """Estimator that predicts the values of the coarse raster"""
+
+    def fit(self, X, y=None):
+        return self
+
+    def predict(self, X):
+        return X[:, 1]
+
+
+class TestBilinearResampling(TestCase):
+    """Test that a coarse raster is interpolated when a stack is read and
+    predicted"""
+
+    fine = "test_resample_fine"
+    coarse = "test_resample_coarse"
+    output = "test_resample_output"
+
+    # the interior cells of the fine region lie between the centres of the
+    # coarse cells, where the bilinear interpolation of a plane is exact
+    interior = slice(2, 38)
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a plane at a coarse resolution and a raster at a four times
+        finer resolution"""
+        cls.use_temp_region()
+        cls.runModule("g.region", n=1000, s=0, e=1000, w=0, res=100)
+        cls.runModule(
+            "r.mapcalc", expression="{0} = float(x() + 2 * y())".format(cls.coarse)
+        )
+        cls.runModule("g.region", res=25)
+        cls.runModule("r.mapcalc", expression="{0} = float(1)".format(cls.fine))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary region and rasters"""
+        cls.del_temp_region()
+        cls.runModule(
+            "g.remove", flags="f", type="raster", name=[cls.fine, cls.coarse]
+        )
+
+    def tearDown(self):
+        self.runModule("g.remove", flags="f", type="raster", name=self.output)
+
+    def expected(self):
+        """Values of the plane at the centres of the fine cells"""
+        x = 12.5 + 25 * np.arange(40)
+        y = 1000 - 12.5 - 25 * np.arange(40)
+
+        return x[np.newaxis, :] + 2 * y[:, np.newaxis]
+
+    def test_read(self):
+        """Checks the interpolated values of windows of rows"""
+        stack = RasterStack([self.fine, self.coarse], resampling="bilinear")
+        arr = np.concatenate(
+            [stack.read(rows=rows)[1] for rows in stack.row_windows(height=7)]
+        )
+
+        np.testing.assert_allclose(
+            arr[self.interior, self.interior],
+            self.expected()[self.interior, self.interior],
+            rtol=1e-6,
+        )
+
+        # the fine raster is read using the region after the coarse raster
+        np.testing.assert_array_equal(stack.read(index=0), 1)
+
+    def test_predict(self):
+        """Checks that the interpolated values are written by a prediction while
+        the coarse raster is read"""
+        stack = RasterStack([self.fine, self.coarse], resampling="bilinear")
+        stack.predict(CoarseColumn(), self.output, height=7, overwrite=True)
+
+        with RasterRow(self.output) as src:
+            arr = np.asarray(src)
+
+        self.assertEqual(arr.shape, (40, 40))
+        np.testing.assert_allclose(
+            arr[self.interior, self.interior],
+            self.expected()[self.interior, self.interior],
+            rtol=1e-6,
+        )
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the hyperparameter search strategies
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import os
+import shutil
+import tempfile
+
+import grass.script as gs
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+from sklearn.base import is_classifier
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import GridSearchCV, cross_val_score
+from sklearn.tree import DecisionTreeClassifier
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.bayesian import BayesianSearchCV, Categorical, Integer
+from rlearnlib.search import (
+    HyperbandSearchCV,
+    ResumableGridSearchCV,
+    WarmStartSearchCV,
+)
+
+
+class TestBayesianSearchCV(TestCase):
+    """Test the model-based hyperparameter search"""
+
+    X, y = make_classification(n_samples=200, n_features=6, random_state=1)
+
+    def search(self, **kwargs):
+        params = dict(
+            estimator=DecisionTreeClassifier(random_state=0),
+            param_distributions={
+                "max_depth": Integer(1, 8),
+                "min_samples_leaf": Integer(1, 20),
+            },
+            n_iter=10,
+            batch_size=2,
+            n_initial=4,
+            scoring="accuracy",
+            cv=3,
+            random_state=1234,
+        )
+        params.update(kwargs)
+
+        return BayesianSearchCV(**params).fit(self.X, self.y)
+
+    def test_n_iter(self):
+        """Checks that n_iter unique candidates are evaluated"""
+        search = self.search()
+        candidates = [tuple(sorted(p.items())) for p in search.cv_results_["params"]]
+
+        self.assertEqual(len(candidates), 10)
+        self.assertEqual(len(set(candidates)), 10)
+
+    def test_small_space(self):
+        """Checks that the search stops once the space is exhausted"""
+        search = self.search(
+            param_distributions={"max_depth": Categorical([1, 2, 3])}
+        )
+        self.assertEqual(len(search.cv_results_["params"]), 3)
+
+    def test_best_params(self):
+        """Checks that best_params_ is the best candidate and that the
+        estimator is refitted with it"""
+        search = self.search()
+        scores = search.cv_results_["mean_test_score"]
+
+        self.assertEqual(search.best_score_, np.max(scores))
+        self.assertEqual(
+            search.best_params_, search.cv_results_["params"][search.best_index_]
+        )
+
+        params = search.best_estimator_.get_params()
+        for key, value in search.best_params_.items():
+            self.assertEqual(params[key], value)
+
+        expected = (
+            DecisionTreeClassifier(random_state=0, **search.best_params_)
+            .fit(self.X, self.y)
+            .predict(self.X)
+        )
+        np.testing.assert_array_equal(search.predict(self.X), expected)
+
+    def test_seed(self):
+        """Checks that the candidates are reproducible with the same seed"""
+        first = self.search().cv_results_["params"]
+        second = self.search().cv_results_["params"]
+        self.assertEqual(first, second)
+
+
+class TestHyperbandSearchCV(TestCase):
+    """Test the brackets of successive halving and the refit of the best
+    candidate"""
+
+    X, y = make_classification(n_samples=200, n_features=6, random_state=1)
+    param_grid = {"max_depth": list(range(1, 10)), "min_samples_leaf": [1, 5, 10]}
+
+    def search(self):
+        return HyperbandSearchCV(
+            RandomForestClassifier(random_state=0),
+            self.param_grid,
+            scoring="accuracy",
+            cv=3,
+            factor=3,
+            resource="n_estimators",
+            max_resources=27,
+            random_state=1234,
+        ).fit(self.X, self.y)
+
+    def test_brackets(self):
+        """Checks the number of candidates and the initial resource of each
+        bracket"""
+        search = HyperbandSearchCV(None, {}, factor=3)
+
+        self.assertEqual(
+            search._brackets(27, 81, 1), [(27, 3), (12, 9), (6, 27), (4, 81)]
+        )
+        # exact powers of the factor include the most exploratory bracket
+        self.assertEqual(search._brackets(243, 243, 1)[0], (243, 1))
+        search = HyperbandSearchCV(None, {}, factor=10)
+        self.assertEqual(len(search._brackets(1000, 10000, 1)), 4)
+
+        # brackets that start below the minimum resource are not used
+        search = HyperbandSearchCV(None, {}, factor=3)
+        self.assertEqual(search._brackets(27, 81, 10), [(3, 27), (2, 81)])
+
+    def test_resources(self):
+        """Checks that each bracket starts from its own resource and that no
+        candidate uses more than the full budget"""
+        search = self.search()
+        results = pd.DataFrame(search.cv_results_)
+        brackets = search._brackets(27, 27, 1)
+
+        self.assertEqual(results["bracket"].nunique(), len(brackets))
+        self.assertLessEqual(results["n_resources"].max(), 27)
+
+        for i, (n, r) in enumerate(brackets):
+            first = results[(results["bracket"] == i) & (results["iter"] == 0)]
+            self.assertEqual(first.shape[0], n)
+            self.assertTrue((first["n_resources"] == r).all())
+
+    def test_refit(self):
+        """Checks that the best candidate is scored and refitted using the full
+        budget"""
+        search = self.search()
+
+        self.assertEqual(search.best_params_["n_estimators"], 27)
+        self.assertTrue(is_classifier(search))
+
+        estimator = RandomForestClassifier(random_state=0, **search.best_params_)
+        expected = cross_val_score(estimator, self.X, self.y, cv=3).mean()
+        self.assertAlmostEqual(search.best_score_, expected)
+
+        np.testing.assert_array_equal(
+            search.predict(self.X), estimator.fit(self.X, self.y).predict(self.X)
+        )
+
+
+class TestWarmStartSearchCV(TestCase):
+    """Test that the warm-started search matches an exhaustive grid search"""
+
+    X, y = make_classification(n_samples=200, n_features=6, random_state=1)
+    param_grid = {"n_estimators": [5, 10, 20, 40], "max_depth": [1, 3]}
+
+    def compare(self, estimator, scoring):
+        warm = WarmStartSearchCV(
+            estimator, self.param_grid, scoring=get_scorer(scoring), cv=3
+        ).fit(self.X, self.y)
+        grid = GridSearchCV(estimator, self.param_grid, scoring=scoring, cv=3).fit(
+            self.X, self.y
+        )
+
+        # the candidates are ordered by the other parameters and n_estimators
+        results = zip(grid.cv_results_["params"], grid.cv_results_["mean_test_score"])
+        scores = {(p["max_depth"], p["n_estimators"]): s for p, s in results}
+        expected = [
+            scores[(p["max_depth"], p["n_estimators"])]
+            for p in warm.cv_results_["params"]
+        ]
+
+        np.testing.assert_allclose(warm.cv_results_["mean_test_score"], expected)
+        self.assertEqual(warm.best_params_, grid.best_params_)
+
+    def test_staged_predict(self):
+        """Checks the staged predictions of a boosting model"""
+        self.compare(GradientBoostingClassifier(random_state=0), "accuracy")
+
+    def test_staged_predict_proba(self):
+        """Checks the staged probabilities of a boosting model"""
+        self.compare(GradientBoostingClassifier(random_state=0), "neg_log_loss")
+
+    def test_staged_decision_function(self):
+        """Checks the staged decision function of a boosting model"""
+        self.compare(GradientBoostingClassifier(random_state=0), "roc_auc")
+
+    def test_warm_start(self):
+        """Checks a random forest that is grown using warm-starting"""
+        self.compare(RandomForestClassifier(random_state=0), "roc_auc")
+
+    def test_classifier(self):
+        """Checks that the fitted search is a classifier that can be scored using
+        the probabilities"""
+        estimator = GradientBoostingClassifier(random_state=0)
+        warm = WarmStartSearchCV(
+            estimator, self.param_grid, scoring=get_scorer("accuracy"), cv=3
+        ).fit(self.X, self.y)
+
+        self.assertTrue(is_classifier(warm))
+        self.assertAlmostEqual(
+            get_scorer("roc_auc")(warm, self.X, self.y),
+            get_scorer("roc_auc")(warm.best_estimator_, self.X, self.y),
+        )
+
+
+class TestResumableGridSearchCV(TestCase):
+    """Test that the checkpointed search is resumed and invalidated"""
+
+    X, y = make_classification(n_samples=200, n_features=6, random_state=1)
+    param_grid = {"max_depth": [1, 2, 3], "min_samples_leaf": [1, 5]}
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.location, "checkpoint.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def search(self, estimator=None, scoring="accuracy", **fit_params):
+        if estimator is None:
+            estimator = DecisionTreeClassifier(random_state=0)
+
+        return ResumableGridSearchCV(
+            estimator,
+            self.param_grid,
+            scoring=get_scorer(scoring),
+            checkpoint=self.checkpoint,
+            cv=3,
+        ).fit(self.X, self.y, **fit_params)
+
+    def test_resume(self):
+        """Checks that an interrupted search is resumed from the completed
+        evaluations and gives the same results as an uninterrupted search"""
+        expected = self.search()
+        self.assertEqual(expected.n_resumed_, 0)
+
+        # keep five evaluations and a line that was left incomplete
+        with open(self.checkpoint) as src:
+            lines = src.readlines()
+
+        with open(self.checkpoint, "w") as dst:
+            dst.writelines(lines[:5])
+            dst.write(lines[5][:20])
+
+        resumed = self.search()
+        self.assertEqual(resumed.n_resumed_, 5)
+        self.assertEqual(resumed.best_params_, expected.best_params_)
+        np.testing.assert_allclose(
+            resumed.cv_results_["mean_test_score"],
+            expected.cv_results_["mean_test_score"],
+        )
+
+        self.assertEqual(self.search().n_resumed_, 18)
+
+    def test_invalidate(self):
+        """Checks that changing a fixed parameter, the scorer or the fit
+        parameters invalidates the checkpoint"""
+        self.search()
+
+        estimator = DecisionTreeClassifier(random_state=0, criterion="entropy")
+        self.assertEqual(self.search(estimator).n_resumed_, 0)
+        self.assertEqual(self.search(scoring="balanced_accuracy").n_resumed_, 0)
+
+        weights = np.ones(self.y.shape[0])
+        weights[:10] = 2
+        self.assertEqual(self.search(sample_weight=weights).n_resumed_, 0)
+
+        # the searched parameters of the estimator are replaced by the grid
+        estimator = DecisionTreeClassifier(random_state=0, max_depth=5)
+        self.assertEqual(self.search(estimator).n_resumed_, 18)
+
+    def test_classifier(self):
+        """Checks that the fitted search is a classifier that can be scored using
+        the probabilities"""
+        search = self.search()
+
+        self.assertTrue(is_classifier(search))
+        self.assertAlmostEqual(
+            get_scorer("roc_auc")(search, self.X, self.y),
+            get_scorer("roc_auc")(search.best_estimator_, self.X, self.y),
+        )
+
+
+if __name__ == "__main__":
+    test()
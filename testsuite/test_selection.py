@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the feature selection methods
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.selection import (
+    recursive_elimination,
+    select_important,
+    select_uncorrelated,
+    symmetric_correlation,
+)
+
+
+class TestCorrelationSelection(TestCase):
+    """Test the selection of one feature from each cluster of correlated
+    features"""
+
+    rng = np.random.RandomState(1)
+    a, b = rng.normal(size=500), rng.normal(size=500)
+
+    # features 0-2 and 3-4 are two clusters of correlated features
+    X = np.column_stack(
+        (
+            a,
+            a + 0.05 * rng.normal(size=500),
+            a + 0.1 * rng.normal(size=500),
+            b,
+            -b + 0.05 * rng.normal(size=500),
+            rng.normal(size=500),
+        )
+    )
+    corr = np.corrcoef(X, rowvar=False)
+
+    def test_symmetric(self):
+        """Checks that a lower triangle matrix is made symmetric"""
+        lower = np.where(np.tri(6, k=-1, dtype=bool), self.corr, np.nan)
+        np.testing.assert_allclose(symmetric_correlation(lower), self.corr)
+
+    def test_clusters(self):
+        """Checks that one feature is retained from each cluster, including a
+        negatively correlated cluster"""
+        selected = select_uncorrelated(self.corr, threshold=0.9)
+
+        self.assertEqual(len(selected), 3)
+        self.assertEqual(len(set(selected) & {0, 1, 2}), 1)
+        self.assertEqual(len(set(selected) & {3, 4}), 1)
+        self.assertIn(5, selected)
+
+        # the central member of the cluster has the largest total correlation
+        self.assertIn(0, selected)
+
+    def test_threshold(self):
+        """Checks that all features are retained using a threshold of 1"""
+        selected = select_uncorrelated(self.corr, threshold=1.0)
+        np.testing.assert_array_equal(selected, np.arange(6))
+
+    def test_keep(self):
+        """Checks that the kept features are retained and not clustered"""
+        selected = select_uncorrelated(self.corr, threshold=0.9, keep=[1, 2])
+
+        self.assertIn(1, selected)
+        self.assertIn(2, selected)
+        self.assertIn(0, selected)
+        self.assertEqual(len(selected), 5)
+
+
+class TestSupervisedSelection(TestCase):
+    """Test the selection of features using permutation importances"""
+
+    rng = np.random.RandomState(1)
+    n_informative = 3
+    informative = rng.normal(size=(300, n_informative))
+    X = np.column_stack((informative, rng.normal(size=(300, 4))))
+    y = (informative.sum(axis=1) + 0.3 * rng.normal(size=300) > 0).astype(int)
+
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=1)
+    scorer = get_scorer("accuracy")
+
+    def test_importance(self):
+        """Checks that the noise features are removed"""
+        selected, importances = select_important(
+            LogisticRegression(),
+            self.X,
+            self.y,
+            self.cv,
+            self.scorer,
+            threshold=0.01,
+            random_state=1,
+        )
+
+        np.testing.assert_array_equal(selected, np.arange(self.n_informative))
+        self.assertEqual(importances.shape[0], self.X.shape[1])
+
+    def test_importance_fallback(self):
+        """Checks that the most important feature is retained if none are above
+        the threshold"""
+        selected, importances = select_important(
+            LogisticRegression(),
+            self.X,
+            self.y,
+            self.cv,
+            self.scorer,
+            threshold=1.0,
+            random_state=1,
+        )
+
+        self.assertEqual(len(selected), 1)
+        self.assertEqual(selected[0], np.argmax(importances["importance"].values))
+
+    def test_rfe(self):
+        """Checks that recursive elimination retains the informative features
+        and records the score of each iteration"""
+        selected, scores = recursive_elimination(
+            LogisticRegression(),
+            self.X,
+            self.y,
+            self.cv,
+            self.scorer,
+            step=0.2,
+            random_state=1,
+        )
+
+        self.assertTrue(set(range(self.n_informative)).issubset(selected))
+        self.assertLess(len(selected), self.X.shape[1])
+
+        n_features = [n for n, score in scores]
+        self.assertEqual(n_features[0], self.X.shape[1])
+        self.assertEqual(n_features[-1], 1)
+        self.assertEqual(n_features, sorted(n_features, reverse=True))
+
+    def test_rfe_min_features(self):
+        """Checks that the elimination stops at min_features"""
+        selected, scores = recursive_elimination(
+            LogisticRegression(),
+            self.X,
+            self.y,
+            self.cv,
+            self.scorer,
+            step=0.5,
+            min_features=3,
+            random_state=1,
+        )
+
+        self.assertEqual(scores[-1][0], 3)
+        self.assertGreaterEqual(len(selected), 3)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of r.learn.ml
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of r.learn.ml for prediction of space-time raster datasets
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import tempfile
+import os
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+
+class TestTemporal(TestCase):
+    """Test prediction of each timestep of a space-time raster dataset"""
+
+    # input rasters
+    band1 = "lsat7_2002_10@PERMANENT"
+    band2 = "lsat7_2002_20@PERMANENT"
+    band3 = "lsat7_2002_30@PERMANENT"
+    band4 = "lsat7_2002_40@PERMANENT"
+    band5 = "lsat7_2002_50@PERMANENT"
+    band7 = "lsat7_2002_70@PERMANENT"
+    classif_map = "landclass96@PERMANENT"
+
+    # imagery group and space-time dataset created during test
+    group = "predictors"
+    strds = "bands"
+
+    # training data created during test
+    labelled_pixels = "training_pixels"
+
+    # raster maps created as output during test
+    output = "temporal_result"
+    outputs = ["temporal_result_1", "temporal_result_2"]
+    group_output = "group_result"
+
+    # files created during test
+    model_file = tempfile.NamedTemporaryFile(suffix=".gz").name
+
+    @classmethod
+    def setUpClass(cls):
+        """Setup that is required for all tests
+
+        Uses a temporary region for testing, creates an imagery group of the
+        features of the first timestep, and a space-time raster dataset of two
+        timesteps using the first and second bands
+        """
+        cls.use_temp_region()
+        cls.runModule("g.region", raster=cls.classif_map)
+        cls.runModule(
+            "i.group",
+            group=cls.group,
+            input=[cls.band1, cls.band3, cls.band4, cls.band5, cls.band7],
+        )
+        cls.runModule(
+            "r.random",
+            input=cls.classif_map,
+            npoints=1000,
+            raster=cls.labelled_pixels,
+            seed=1234,
+        )
+        cls.runModule(
+            "t.create",
+            output=cls.strds,
+            type="strds",
+            temporaltype="relative",
+            title="bands",
+            description="bands",
+        )
+        cls.runModule(
+            "t.register",
+            input=cls.strds,
+            maps=[cls.band1, cls.band2],
+            start=0,
+            increment=1,
+            unit="days",
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the temporary region (and anything else we created)"""
+        cls.del_temp_region()
+        cls.runModule("t.remove", flags="f", inputs=cls.strds)
+        cls.runModule("g.remove", flags="f", type="raster", name=cls.labelled_pixels)
+        cls.runModule("g.remove", flags="f", type="group", name=cls.group)
+
+    def tearDown(self):
+        """Remove the output created from the tests"""
+        self.runModule(
+            "g.remove",
+            flags="f",
+            type="raster",
+            name=self.outputs + [self.group_output],
+        )
+
+        try:
+            os.remove(self.model_file)
+        except FileNotFoundError:
+            pass
+
+    def test_strds_prediction(self):
+        """Checks that each timestep is predicted using the static rasters"""
+        self.assertModule(
+            "r.learn.train",
+            group=self.group,
+            training_map=self.labelled_pixels,
+            model_name="RandomForestClassifier",
+            n_estimators=50,
+            random_state=1,
+            save_model=self.model_file,
+        )
+
+        self.assertModule(
+            "r.learn.predict",
+            strds=self.strds,
+            static=[self.band3, self.band4, self.band5, self.band7],
+            load_model=self.model_file,
+            output=self.output,
+        )
+
+        for output in self.outputs:
+            self.assertRasterExists(output, msg="Output was not created")
+
+        # the first timestep uses the same rasters as the imagery group
+        self.assertModule(
+            "r.learn.predict",
+            group=self.group,
+            load_model=self.model_file,
+            output=self.group_output,
+        )
+        self.assertRastersNoDifference(
+            self.outputs[0], self.group_output, precision=0
+        )
+
+
+if __name__ == "__main__":
+    test()
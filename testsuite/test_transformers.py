@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the transformers
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import pickle
+
+import grass.script as gs
+import numpy as np
+from sklearn.base import clone
+from sklearn.decomposition import PCA
+from sklearn.exceptions import NotFittedError
+from sklearn.pipeline import Pipeline
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.transformers import CategoryEncoder, StackPCA
+
+
+class TestCategoryEncoder(TestCase):
+    """Test the encoding of GRASS GIS categories"""
+
+    cats = [("water", 1, None), ("forest", 4, None), ("urban", 2, None)]
+
+    def test_unfitted(self):
+        """Checks that the fitted attributes are only set by fit"""
+        enc = CategoryEncoder()
+
+        self.assertFalse(hasattr(enc, "codes_"))
+        self.assertFalse(hasattr(enc, "categories_"))
+
+        with self.assertRaises(NotFittedError):
+            enc.transform([1, 2])
+
+        enc.fit(self.cats)
+        np.testing.assert_array_equal(enc.codes_, [1, 2, 4])
+        self.assertEqual(sorted(enc.categories_), ["forest", "urban", "water"])
+
+    def test_encoding(self):
+        """Checks that values are encoded into labels and back"""
+        values = np.array([4, 1, 1, 2, 4])
+        enc = CategoryEncoder().fit(self.cats)
+
+        labels = enc.transform(values)
+        self.assertEqual(
+            list(labels), ["forest", "water", "water", "urban", "forest"]
+        )
+        np.testing.assert_array_equal(enc.inverse_transform(labels), values)
+
+    def test_mapping(self):
+        """Checks that a dict of values and labels is encoded like a list of
+        categories, including sparse values that are located by a search"""
+        enc = CategoryEncoder().fit({1: "water", 2: "urban", 10 ** 9: "forest"})
+
+        labels = enc.transform([10 ** 9, 2])
+        self.assertEqual(list(labels), ["forest", "urban"])
+        self.assertIsNone(enc._table)
+
+    def test_unseen(self):
+        """Checks that unseen values and labels raise a ValueError"""
+        enc = CategoryEncoder().fit(self.cats)
+
+        with self.assertRaises(ValueError):
+            enc.transform([1, 3])
+
+        with self.assertRaises(ValueError):
+            enc.transform([1.5])
+
+        with self.assertRaises(ValueError):
+            enc.inverse_transform(["water", "grass"])
+
+    def test_pipeline(self):
+        """Checks that the encoder round trips within a cloned and pickled
+        Pipeline"""
+        values = np.array([2, 4, 1])
+        pipe = clone(Pipeline([("enc", CategoryEncoder())]))
+        pipe.fit(self.cats)
+        pipe = pickle.loads(pickle.dumps(pipe))
+
+        labels = pipe.transform(values)
+        self.assertEqual(list(labels), ["urban", "forest", "water"])
+        np.testing.assert_array_equal(pipe.inverse_transform(labels), values)
+        self.assertEqual(
+            pipe.named_steps["enc"].category_rules(), "1,water\n2,urban\n4,forest"
+        )
+
+
+class TestStackPCA(TestCase):
+    """Test the principal components fitted from the moments of a stack against
+    scikit-learn"""
+
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(500, 4)) @ rng.normal(size=(4, 4)) + [10, -5, 0, 100]
+
+    # the moments use the same (n - 1) denominator as RasterStack.moments
+    mean = X.mean(axis=0)
+    cov = np.cov(X, rowvar=False)
+
+    def assert_equal_components(self, pca, expected, X):
+        """Compare the components and the transformed data up to the sign of
+        each component"""
+        signs = np.sign(np.sum(pca.components_ * expected.components_, axis=1))
+        np.testing.assert_array_equal(np.abs(signs), 1)
+
+        np.testing.assert_allclose(
+            pca.components_, expected.components_ * signs[:, np.newaxis], atol=1e-8
+        )
+        np.testing.assert_allclose(
+            pca.explained_variance_, expected.explained_variance_, rtol=1e-8
+        )
+        np.testing.assert_allclose(
+            pca.explained_variance_ratio_,
+            expected.explained_variance_ratio_,
+            rtol=1e-8,
+        )
+        np.testing.assert_allclose(
+            pca.transform(X), expected.transform(X) * signs, atol=1e-8
+        )
+
+    def test_moments(self):
+        """Checks the components fitted from the mean and covariance with and
+        without whitening"""
+        for whiten in [False, True]:
+            pca = StackPCA(
+                n_components=3, whiten=whiten, mean=self.mean, covariance=self.cov
+            ).fit(None)
+            expected = PCA(n_components=3, whiten=whiten, svd_solver="full").fit(
+                self.X
+            )
+            self.assert_equal_components(pca, expected, self.X)
+
+    def test_training_data(self):
+        """Checks that fitting from the training data gives the same components
+        as fitting from the moments"""
+        fitted = StackPCA().fit(self.X)
+        moments = StackPCA(mean=self.mean, covariance=self.cov).fit(None)
+
+        np.testing.assert_allclose(fitted.components_, moments.components_)
+        np.testing.assert_allclose(fitted.transform(self.X), moments.transform(self.X))
+
+    def test_dtype(self):
+        """Checks that single precision data is returned in single precision"""
+        pca = StackPCA(mean=self.mean, covariance=self.cov).fit(None)
+        X = self.X.astype(np.float32)
+
+        self.assertEqual(pca.transform(X).dtype, np.float32)
+        self.assertEqual(pca.transform(self.X).dtype, np.float64)
+
+
+if __name__ == "__main__":
+    test()
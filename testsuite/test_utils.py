@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the compression of duplicate training samples
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.utils import compress_duplicates
+
+
+class TestCompressDuplicates(TestCase):
+    """Test that duplicate samples are compressed into weighted unique samples"""
+
+    rng = np.random.RandomState(1)
+    unique = rng.randint(0, 4, size=(40, 3)).astype(np.float32)
+    repeats = rng.randint(1, 5, size=40)
+
+    # each row is repeated, and the repeats are shuffled
+    order = rng.permutation(repeats.sum())
+    X = np.repeat(unique, repeats, axis=0)[order]
+    y = (X.sum(axis=1) + X[:, 0] > 5).astype(np.int64)
+    cat = np.arange(X.shape[0]) + 1
+
+    def test_unique(self):
+        """Checks the unique rows, their counts and the cat of their first
+        occurrence"""
+        X, y, cat, groups, counts = compress_duplicates(self.X, self.y, self.cat)
+
+        self.assertIsNone(groups)
+        self.assertEqual(counts.sum(), self.X.shape[0])
+        self.assertEqual(
+            X.shape[0], np.unique(np.column_stack((self.X, self.y)), axis=0).shape[0]
+        )
+
+        for i in range(X.shape[0]):
+            match = (self.X == X[i]).all(axis=1) & (self.y == y[i])
+            self.assertEqual(counts[i], match.sum())
+            self.assertEqual(cat[i], self.cat[np.flatnonzero(match)[0]])
+
+        # the samples remain in the order of their first occurrence
+        self.assertTrue((np.diff(cat) > 0).all())
+
+    def test_response(self):
+        """Checks that identical features with different responses are kept"""
+        X = np.zeros((4, 2))
+        y = np.array([0, 1, 0, 1])
+        X, y, cat, groups, counts = compress_duplicates(X, y, np.arange(4))
+
+        np.testing.assert_array_equal(y, [0, 1])
+        np.testing.assert_array_equal(counts, [2, 2])
+
+    def test_groups(self):
+        """Checks that identical samples in different groups are kept apart"""
+        groups = self.cat % 3
+        X, y, cat, grp, counts = compress_duplicates(
+            self.X, self.y, self.cat, groups
+        )
+
+        np.testing.assert_array_equal(grp, groups[cat - 1])
+        self.assertEqual(counts.sum(), self.X.shape[0])
+
+        for g in range(3):
+            expected = np.unique(self.X[groups == g], axis=0).shape[0]
+            self.assertEqual((grp == g).sum(), expected)
+
+    def test_weighted_fit(self):
+        """Checks that a fit using the counts as the sample weights is the same
+        as the fit using the uncompressed samples"""
+        X, y, cat, groups, counts = compress_duplicates(self.X, self.y, self.cat)
+
+        expected = LogisticRegression().fit(self.X, self.y)
+        weighted = LogisticRegression().fit(X, y, sample_weight=counts)
+        np.testing.assert_allclose(weighted.coef_, expected.coef_, rtol=1e-4)
+        np.testing.assert_allclose(
+            weighted.intercept_, expected.intercept_, rtol=1e-4, atol=1e-6
+        )
+
+        response = 2 * self.X[:, 0] - self.X[:, 1] ** 2 + self.X[:, 1] * self.X[:, 2]
+        X, r, cat, groups, counts = compress_duplicates(self.X, response, self.cat)
+
+        expected = LinearRegression().fit(self.X, response)
+        weighted = LinearRegression().fit(X, r, sample_weight=counts)
+        np.testing.assert_allclose(weighted.coef_, expected.coef_, rtol=1e-5)
+        np.testing.assert_allclose(
+            weighted.predict(self.X), expected.predict(self.X), rtol=1e-5
+        )
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+MODULE:    Test of rlearnlib
+
+AUTHOR(S): Steven Pawley <dr.stevenpawley gmail com>
+
+PURPOSE:   Test of the cross-validation engine and scoring functions
+
+COPYRIGHT: (C) 2020 by Steven Pawley and the GRASS Development Team
+
+This program is free software under the GNU General Public
+License (>=v2). Read the file COPYING that comes with GRASS
+for details.
+"""
+import grass.script as gs
+import numpy as np
+from sklearn import metrics
+from sklearn.datasets import make_classification, make_regression
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.model_selection import KFold, StratifiedKFold, cross_val_predict
+
+from grass.gunittest.case import TestCase
+from grass.gunittest.main import test
+
+gs.utils.set_path(modulename="r.learn.ml2", dirname="rlearnlib")
+
+from rlearnlib.validation import (
+    classification_scores,
+    confusion_matrices,
+    cross_validate_folds,
+    regression_scores,
+)
+
+
+class TestCrossValidateFolds(TestCase):
+    """Test that each fold is fitted once and the out-of-fold results match
+    scikit-learn"""
+
+    X, y = make_classification(
+        n_samples=150, n_features=5, n_informative=3, n_classes=3, random_state=1
+    )
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=1)
+
+    def test_predictions(self):
+        """Checks the out-of-fold predictions, probabilities and folds"""
+        estimator = LogisticRegression(max_iter=1000)
+        result = cross_validate_folds(
+            estimator, self.X, self.y, self.cv, predict_proba=True
+        )
+
+        expected = cross_val_predict(estimator, self.X, self.y, cv=self.cv)
+        np.testing.assert_array_equal(result.predictions, expected)
+
+        expected = cross_val_predict(
+            estimator, self.X, self.y, cv=self.cv, method="predict_proba"
+        )
+        np.testing.assert_allclose(result.probabilities, expected)
+        np.testing.assert_array_equal(result.classes, [0, 1, 2])
+
+        for fold, (train_idx, test_idx) in enumerate(self.cv.split(self.X, self.y)):
+            np.testing.assert_array_equal(result.folds[test_idx], fold)
+
+        self.assertIsNone(result.estimators)
+
+    def test_sample_weight(self):
+        """Checks that the sample weights are subset for each fold"""
+        weights = np.random.RandomState(1).randint(1, 5, size=self.y.shape[0])
+        result = cross_validate_folds(
+            LogisticRegression(max_iter=1000),
+            self.X,
+            self.y,
+            self.cv,
+            fit_params={"sample_weight": weights},
+            return_estimators=True,
+        )
+
+        self.assertEqual(len(result.estimators), 3)
+
+        for estimator, (train_idx, test_idx) in zip(
+            result.estimators, self.cv.split(self.X, self.y)
+        ):
+            expected = LogisticRegression(max_iter=1000).fit(
+                self.X[train_idx], self.y[train_idx], sample_weight=weights[train_idx]
+            )
+            np.testing.assert_allclose(estimator.coef_, expected.coef_)
+
+
+class TestScores(TestCase):
+    """Test the vectorized scores of each fold against scikit-learn"""
+
+    rng = np.random.RandomState(1)
+    y_true = rng.randint(0, 4, size=200)
+    y_pred = np.where(rng.uniform(size=200) < 0.7, y_true, rng.randint(0, 4, size=200))
+    folds = rng.randint(0, 3, size=200)
+    weights = rng.randint(1, 4, size=200).astype(float)
+
+    def test_confusion_matrices(self):
+        """Checks the unweighted and weighted confusion matrix of each fold"""
+        for weights in [None, self.weights]:
+            cm, classes = confusion_matrices(
+                self.y_true, self.y_pred, self.folds, sample_weight=weights
+            )
+            np.testing.assert_array_equal(classes, [0, 1, 2, 3])
+            self.assertEqual(cm.shape, (3, 4, 4))
+
+            for fold in range(3):
+                idx = self.folds == fold
+                expected = metrics.confusion_matrix(
+                    self.y_true[idx],
+                    self.y_pred[idx],
+                    labels=classes,
+                    sample_weight=None if weights is None else weights[idx],
+                )
+                np.testing.assert_allclose(cm[fold], expected)
+
+    def test_missing_class(self):
+        """Checks that a class that is absent from a fold has an empty row"""
+        y_true = np.array([0, 1, 2, 0, 1])
+        folds = np.array([0, 0, 0, 1, 1])
+        cm, classes = confusion_matrices(y_true, y_true, folds)
+
+        self.assertEqual(cm[1, 2].sum(), 0)
+        self.assertEqual(cm[1].sum(), 2)
+
+    def test_classification_scores(self):
+        """Checks the global classification scores of each fold"""
+        cm, classes = confusion_matrices(self.y_true, self.y_pred, self.folds)
+        scores = classification_scores(cm)
+
+        functions = {
+            "accuracy": metrics.accuracy_score,
+            "balanced_accuracy": metrics.balanced_accuracy_score,
+            "matthews_correlation_coefficient": metrics.matthews_corrcoef,
+            "kappa": metrics.cohen_kappa_score,
+        }
+
+        for fold in range(3):
+            idx = self.folds == fold
+
+            for name, func in functions.items():
+                expected = func(self.y_true[idx], self.y_pred[idx])
+                self.assertAlmostEqual(scores[name][fold], expected)
+
+    def test_regression_scores(self):
+        """Checks the weighted regression scores of each fold"""
+        X, y = make_regression(n_samples=200, n_features=3, noise=10, random_state=1)
+        pred = cross_val_predict(LinearRegression(), X, y, cv=KFold(3))
+        scores = regression_scores(y, pred, self.folds, sample_weight=self.weights)
+
+        functions = {
+            "r2": metrics.r2_score,
+            "explained_variance": metrics.explained_variance_score,
+            "mean_absolute_error": metrics.mean_absolute_error,
+            "mean_squared_error": metrics.mean_squared_error,
+        }
+
+        for fold in range(3):
+            idx = self.folds == fold
+
+            for name, func in functions.items():
+                expected = func(y[idx], pred[idx], sample_weight=self.weights[idx])
+                self.assertAlmostEqual(scores[name][fold], expected)
+
+
+if __name__ == "__main__":
+    test()